@@ -0,0 +1,142 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the member definitions loading from the content DB.
+
+It creates synthetic content DB and measures per-definition cost of the
+:meth:`ContentDb.get_member_definitions` with args loaded one query per member
+(``args_chunk_size=1``) and with args loaded by chunks.
+
+Loading with one query per member is very slow on big DBs, so only first
+``--sample`` members are loaded in this mode.
+
+Then all members are loaded into a list as :class:`MemberDefinition` and as
+:class:`CompactMemberDefinition` to compare throughput and memory used by
+the definitions.
+
+Usage::
+
+    python benchmarks/bench_contentdb.py [--members N]
+"""
+import sys
+import os.path as op
+import argparse
+import tempfile
+import time
+import tracemalloc
+from itertools import islice
+
+sys.path.insert(0, op.join(op.dirname(__file__), '..'))
+sys.path.insert(0, op.join(op.dirname(__file__), '..', 'src'))
+
+from autodoc.contentdb import (
+    ContentDb, MemberDefinition, CompactMemberDefinition)
+from tests.dbutils import ContentDbWriter, create_context
+
+
+def create_db(filename, num_members, members_per_file=100):
+    """Create content DB with the given number of functions.
+
+    Args:
+        filename: DB filename.
+        num_members: Number of member definitions.
+        members_per_file: Number of member definitions per file.
+    """
+    writer = ContentDbWriter(filename)
+    id_file = None
+    for i in range(num_members):
+        if i % members_per_file == 0:
+            id_file = writer.add_file('file%d.py' % i)
+        line = (i % members_per_file) * 5 + 1
+        writer.add_function(id_file, 'func%d' % i, line, line + 4,
+                            args=('a', 'b', '*args', '**kwargs'),
+                            docstring=('Function.', line + 1, 5, line + 1, 18))
+    writer.close()
+
+
+def load_members(filename, chunk_size, limit=None):
+    """Load member definitions.
+
+    Args:
+        filename: DB filename.
+        chunk_size: Number of members to load args for in a single query.
+        limit: Max number of members to load.
+
+    Returns:
+        Tuple ``(number of members, elapsed time)``.
+    """
+    db = ContentDb(create_context(), filename)
+    db.args_chunk_size = chunk_size
+    start = time.perf_counter()
+    count = sum(1 for _ in islice(db.get_member_definitions(), limit))
+    return count, time.perf_counter() - start
+
+
+def load_all(filename, cls):
+    """Load all member definitions into a list.
+
+    Args:
+        filename: DB filename.
+        cls: Member definition class.
+
+    Returns:
+        Tuple ``(number of members, elapsed time, allocated memory)``.
+    """
+    db = ContentDb(create_context(), filename)
+    db.get_member_classes = lambda: {'python': cls}
+    # Load indexes and warm up the connection.
+    next(db.get_member_definitions())
+
+    start = time.perf_counter()
+    definitions = list(db.get_member_definitions())
+    elapsed = time.perf_counter() - start
+
+    # Measure memory separately, since tracing slows down allocations.
+    del definitions
+    tracemalloc.start()
+    definitions = list(db.get_member_definitions())
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return len(definitions), elapsed, size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--members', type=int, default=100000,
+                        help='Number of member definitions.')
+    parser.add_argument('--sample', type=int, default=1000,
+                        help='Number of members to load one by one.')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        filename = op.join(temp_dir, 'content.db')
+        create_db(filename, args.members)
+
+        for name, chunk_size, limit in (
+                ('per member', 1, args.sample),
+                ('chunked', ContentDb.args_chunk_size, None)):
+            count, elapsed = load_members(filename, chunk_size, limit)
+            print('%-12s %d members, %.3f s, %.2f us per definition'
+                  % (name, count, elapsed, elapsed / count * 1e6))
+
+        for cls in (MemberDefinition, CompactMemberDefinition):
+            count, elapsed, size = load_all(filename, cls)
+            print('%-24s %d members, %.3f s, %.2f us, %d bytes per definition'
+                  % (cls.__name__, count, elapsed, elapsed / count * 1e6,
+                     size // count))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,99 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the patches applying.
+
+It generates python source with functions and measures
+:meth:`LinePatcher.patch` which replaces all docstrings, inserts docstrings
+for the functions without them and removes some docstrings.
+
+Usage::
+
+    python benchmarks/bench_patch.py [--lines N] [--docstrings N]
+"""
+import sys
+import os.path as op
+import argparse
+import time
+
+sys.path.insert(0, op.join(op.dirname(__file__), '..', 'src'))
+
+from autodoc.patch import Patch, LinePatcher
+
+
+def create_source(num_lines, num_docstrings):
+    """Create source lines and patches.
+
+    Args:
+        num_lines: Number of lines.
+        num_docstrings: Number of functions.
+
+    Returns:
+        Tuple ``(lines, patches)``.
+    """
+    step = max(num_lines // num_docstrings, 6)
+    lines = []
+    patches = []
+    for i in range(num_docstrings):
+        line = len(lines) + 1
+        lines.append('def func%d(a, b):' % i)
+        if i % 10 == 9:
+            # Function without docstring.
+            text = '"""Function %d.\n\nArgs:\n    a: A.\n    b: B.\n"""' % i
+            patches.append(Patch(text, line, 5, None, None))
+        else:
+            lines.append('    """Function %d."""' % i)
+            if i % 10 == 8:
+                # Remove docstring.
+                patches.append(Patch(None, line + 1, 1, line + 1, 24))
+            else:
+                text = ('"""Function %d.\n\nArgs:\n    a: A.\n    b: B.\n"""'
+                        % i)
+                patches.append(Patch(text, line + 1, 5, line + 1, 24))
+        lines.extend('    a = b  # code' for _ in range(step - len(lines)
+                                                         + line - 1))
+    lines.extend('# tail' for _ in range(num_lines - len(lines)))
+    return lines, patches
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--lines', type=int, default=50000,
+                        help='Number of source lines.')
+    parser.add_argument('--docstrings', type=int, default=2000,
+                        help='Number of patched docstrings.')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of runs.')
+    args = parser.parse_args()
+
+    lines, patches = create_source(args.lines, args.docstrings)
+
+    times = []
+    for _ in range(args.repeat):
+        patcher = LinePatcher()
+        for patch in patches:
+            patcher.add(patch)
+        content = list(lines)
+        start = time.perf_counter()
+        result = patcher.patch(content)
+        times.append(time.perf_counter() - start)
+
+    print('%d lines, %d patches -> %d lines, best of %d: %.2f ms'
+          % (len(lines), len(patches), len(result), args.repeat,
+             min(times) * 1e3))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,367 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark suite of the docstring processing pipeline.
+
+It runs the main pipeline stages on a synthetic corpus and prints results
+in JSON format, so they may be compared between releases::
+
+    python benchmarks/bench_pipeline.py --size 200 --output results.json
+
+Each benchmark is run ``--repeat`` times, result contains best and mean
+time of a run and best time per item in microseconds.
+"""
+import sys
+import os.path as op
+import argparse
+import contextlib
+import json
+import platform
+import tempfile
+import time
+
+sys.path.insert(0, op.dirname(__file__))
+sys.path.insert(0, op.join(op.dirname(__file__), '..'))
+sys.path.insert(0, op.join(op.dirname(__file__), '..', 'src'))
+
+from autodoc import __version__
+from autodoc.contentdb import ContentDb
+from autodoc.docstring.builder import DocumentBuilder
+from autodoc.docstring.reader import TextReader
+from autodoc.patch import LinePatcher
+from autodoc.python.napoleon import Config, GoogleDocstring, NumpyDocstring
+from autodoc.textblock import WrapBlock
+from tests.dbutils import ContentDbWriter, create_context
+from bench_contentdb import create_db
+from bench_patch import create_source
+
+
+GOOGLE_DOCSTRING = """Summary line of the function number %d.
+
+    Extended description of the function which is long enough to be wrapped
+    to multiple lines. It also has some ``inline literals``, *emphasis* and
+    references to the :class:`SomeClass` and :func:`some_function`.
+
+    Args:
+        a: First argument with description which is also long enough to be
+            wrapped.
+        b: Second argument.
+
+    Returns:
+        Result value.
+
+    Raises:
+        ValueError: If arguments are wrong.
+    """
+
+NUMPY_DOCSTRING = """Summary line of the function number %d.
+
+    Extended description of the function.
+
+    Parameters
+    ----------
+    a : int
+        First argument.
+    b : str
+        Second argument.
+
+    Returns
+    -------
+    int
+        Result value.
+    """
+
+PARAGRAPH = ('Extended description of the function which is long enough to '
+             'be wrapped to multiple lines (with some "quoted" words, '
+             'punctuation; and `literals`). ') * 4
+
+
+def create_corpus_db(filename, size):
+    """Create content DB with documented functions.
+
+    Args:
+        filename: DB filename.
+        size: Number of functions.
+    """
+    writer = ContentDbWriter(filename)
+    id_file = writer.add_file('module.py')
+    for i in range(size):
+        line = i * 20 + 1
+        text = GOOGLE_DOCSTRING % i
+        writer.add_function(id_file, 'func%d' % i, line, line + 19,
+                            args=('a', 'b'),
+                            docstring=(text, line + 1, 5, line + 18, 8))
+    writer.close()
+
+
+class Pipeline:
+    """Helper to run pipeline stages for the corpus definitions.
+
+    Domain settings are activated on creation and stay active, so the
+    measured code may use them outside of :meth:`run`.
+
+    Args:
+        filename: Content DB filename.
+        style: Output docstring style.
+    """
+    def __init__(self, filename, style):
+        self.context = create_context({'py': {'style': style}})
+        self.domain = self.context.domains['python']
+        self.db = ContentDb(self.context, filename)
+        self.definitions = list(self.db.get_definitions())
+        self.docstrings = [x.doc_block.docstring for x in self.definitions]
+
+        settings = self.context.settings
+        self._stack = contextlib.ExitStack()
+        self._stack.enter_context(
+            settings.with_settings(self.domain.settings_section))
+        self._stack.enter_context(settings.from_key('style'))
+
+    def run(self, func):
+        """Call ``func(handler)`` for each definition.
+
+        Returns:
+            List of results.
+        """
+        result = []
+        for definition, docstring in zip(self.definitions, self.docstrings):
+            definition.doc_block.docstring = docstring
+            definition.doc_block.document = None
+            env = self.domain.create_env(content_db=self.db,
+                                         definition=definition,
+                                         report_filename=definition.filename)
+            self.domain.reporter.env = env
+            handler = self.domain.definition_handler_task(self.domain, env)
+            handler.setup()
+            result.append(func(handler))
+            self.domain.reporter.reset()
+        return result
+
+
+def measure(func, repeat):
+    """Measure function run time.
+
+    Args:
+        func: Function which returns a callable to measure and number of
+            items it processes. So preparation is not measured.
+        repeat: Number of runs.
+
+    Returns:
+        Dict with results.
+    """
+    times = []
+    count = 0
+    for _ in range(repeat):
+        target, count = func()
+        start = time.perf_counter()
+        target()
+        times.append(time.perf_counter() - start)
+    best = min(times)
+    return {
+        'count': count,
+        'best': best,
+        'mean': sum(times) / len(times),
+        'per_item_us': best / count * 1e6 if count else None,
+    }
+
+
+def bench_get_document(db_filename, size):
+    pipeline = Pipeline(db_filename, 'google')
+    styled = pipeline.run(
+        lambda h: (h.build_document(), h.definition.doc_block.docstring)[1])
+
+    def prepare():
+        envs = pipeline.run(lambda h: h.env)
+
+        def target():
+            for env, text in zip(envs, styled):
+                env['definition'].doc_block.docstring = text
+                DocumentBuilder(env).get_document()
+        return target, len(envs)
+    return prepare
+
+
+def bench_builder_init(size, shared=True):
+    env = {}
+    DocumentBuilder(env)
+
+    def prepare():
+        if shared:
+            def target():
+                for _ in range(size):
+                    DocumentBuilder(env)
+        else:
+            # Cost of building components and settings for every builder.
+            def target():
+                for _ in range(size):
+                    builder = DocumentBuilder(env, reader=TextReader())
+                    builder._get_document_settings()
+        return target, size
+    return prepare
+
+
+def bench_apply_transforms(db_filename, size):
+    pipeline = Pipeline(db_filename, 'google')
+
+    def prepare():
+        # Transforms change documents, so they are rebuilt for every run.
+        handlers = pipeline.run(lambda h: (h.build_document(), h)[1])
+
+        def target():
+            for handler in handlers:
+                handler.apply_transforms()
+        return target, len(handlers)
+    return prepare
+
+
+def bench_to_string(db_filename, size, style):
+    pipeline = Pipeline(db_filename, style)
+    style_obj = pipeline.domain.get_style(style)
+
+    def build(handler):
+        handler.build_document()
+        handler.apply_transforms()
+        return handler.env
+
+    def prepare():
+        envs = pipeline.run(build)
+
+        def target():
+            for env in envs:
+                style_obj.to_string(env)
+        return target, len(envs)
+    return prepare
+
+
+def bench_napoleon(converter, text, size):
+    texts = [text % i for i in range(size)]
+    config = Config()
+
+    def prepare():
+        def target():
+            for x in texts:
+                converter(x, config).lines()
+        return target, len(texts)
+    return prepare
+
+
+def bench_wrap_block(size):
+    def prepare():
+        blocks = []
+        for _ in range(size):
+            block = WrapBlock(parent_width=72)
+            block.add_text(PARAGRAPH)
+            blocks.append(block)
+
+        def target():
+            for block in blocks:
+                list(block.get_lines())
+        return target, len(blocks)
+    return prepare
+
+
+def bench_line_patcher(size):
+    lines, patches = create_source(size * 25, size)
+
+    def prepare():
+        patcher = LinePatcher()
+        for patch in patches:
+            patcher.add(patch)
+        content = list(lines)
+        return lambda: patcher.patch(content), len(patches)
+    return prepare
+
+
+def bench_content_db(temp_dir, size):
+    filename = op.join(temp_dir, 'members.db')
+    create_db(filename, size)
+
+    def prepare():
+        db = ContentDb(create_context(), filename)
+
+        def target():
+            for _ in db.get_definitions():
+                pass
+        return target, size
+    return prepare
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--size', type=int, default=200,
+                        help='Corpus size (number of docstrings).')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of runs of each benchmark.')
+    parser.add_argument('--output', help='Output JSON file.')
+    parser.add_argument('--only', action='append',
+                        help='Run only benchmarks which names start with '
+                             'the given prefix.')
+    args = parser.parse_args()
+    size = args.size
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        db_filename = op.join(temp_dir, 'corpus.db')
+        create_corpus_db(db_filename, size)
+
+        benchmarks = [
+            ('DocumentBuilder.get_document',
+             lambda: bench_get_document(db_filename, size)),
+            ('DocumentBuilder.__init__', lambda: bench_builder_init(size)),
+            ('DocumentBuilder.__init__ (not shared)',
+             lambda: bench_builder_init(size, shared=False)),
+            ('DefinitionHandlerTask.apply_transforms',
+             lambda: bench_apply_transforms(db_filename, size)),
+            ('RstStyle.to_string',
+             lambda: bench_to_string(db_filename, size, 'rst')),
+            ('GoogleStyle.to_string',
+             lambda: bench_to_string(db_filename, size, 'google')),
+            ('NumpyStyle.to_string',
+             lambda: bench_to_string(db_filename, size, 'numpy')),
+            ('GoogleDocstring',
+             lambda: bench_napoleon(GoogleDocstring, GOOGLE_DOCSTRING, size)),
+            ('NumpyDocstring',
+             lambda: bench_napoleon(NumpyDocstring, NUMPY_DOCSTRING, size)),
+            ('WrapBlock.get_lines', lambda: bench_wrap_block(size)),
+            ('LinePatcher.patch', lambda: bench_line_patcher(size)),
+            ('ContentDb.get_definitions',
+             lambda: bench_content_db(temp_dir, size * 10)),
+        ]
+
+        results = {}
+        for name, factory in benchmarks:
+            if args.only and not any(name.startswith(x) for x in args.only):
+                continue
+            results[name] = measure(factory(), args.repeat)
+            print('%-40s %10.2f us per item' % (name,
+                                                 results[name]['per_item_us']),
+                  file=sys.stderr)
+
+    data = {
+        'autodoc': __version__,
+        'python': platform.python_version(),
+        'size': size,
+        'repeat': args.repeat,
+        'results': results,
+    }
+    text = json.dumps(data, indent=2, sort_keys=True)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == '__main__':
+    main()
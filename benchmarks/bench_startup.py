@@ -0,0 +1,111 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+Benchmark of the autodoc command line startup time.
+
+It runs the CLI in new processes for commands which don't process sources
+and prints the best wall time of each command, bare interpreter startup
+is shown for reference. With ``--top N`` it also prints the slowest
+imported modules (from ``python -X importtime``)::
+
+    python benchmarks/bench_startup.py [--repeat N] [--top N]
+"""
+import sys
+import os
+import os.path as op
+import argparse
+import subprocess
+import tempfile
+import time
+
+SRC_DIR = op.abspath(op.join(op.dirname(__file__), '..', 'src'))
+
+
+def run(args, env):
+    """Run python with given arguments and measure wall time.
+
+    Args:
+        args: Interpreter arguments.
+        env: Environment dict.
+
+    Returns:
+        Tuple ``(time, stderr)``.
+    """
+    start = time.perf_counter()
+    proc = subprocess.run([sys.executable] + args, env=env,
+                          stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+                          universal_newlines=True)
+    elapsed = time.perf_counter() - start
+    if proc.returncode:
+        raise RuntimeError(proc.stderr)
+    return elapsed, proc.stderr
+
+
+def get_slowest_imports(args, env, top):
+    """Get the slowest imported modules.
+
+    Args:
+        args: Interpreter arguments.
+        env: Environment dict.
+        top: Number of modules to return.
+
+    Returns:
+        List of ``(cumulative time in us, module name)``.
+    """
+    _, output = run(['-X', 'importtime'] + args, env)
+    result = []
+    for line in output.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        result.append((int(cumulative), name.strip()))
+    result.sort(reverse=True)
+    return result[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[1])
+    parser.add_argument('--repeat', type=int, default=10,
+                        help='Number of runs of each command.')
+    parser.add_argument('--top', type=int, default=0,
+                        help='Number of the slowest imports to show.')
+    args = parser.parse_args()
+
+    env = os.environ.copy()
+    env['PYTHONPATH'] = os.pathsep.join(
+        [SRC_DIR] + [x for x in [env.get('PYTHONPATH')] if x])
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        commands = [
+            ('python', ['-c', 'pass']),
+            ('import autodoc.cli', ['-c', 'import autodoc.cli']),
+            ('--version', ['-m', 'autodoc.cli', '--version']),
+            ('--dump-config', ['-m', 'autodoc.cli', '--dump-config']),
+            ('--create-config', ['-m', 'autodoc.cli', '--create-config',
+                                 op.join(temp_dir, 'config.yml')]),
+        ]
+
+        for name, cmd in commands:
+            times = [run(cmd, env)[0] for _ in range(args.repeat)]
+            print('%-20s best of %d: %.1f ms' % (name, args.repeat,
+                                                 min(times) * 1e3))
+            if args.top and cmd[0] == '-m':
+                for cumulative, module in get_slowest_imports(cmd, env,
+                                                              args.top):
+                    print('    %8.1f ms  %s' % (cumulative / 1e3, module))
+
+
+if __name__ == '__main__':
+    main()
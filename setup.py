@@ -48,7 +48,11 @@ setup(
         'PyYAML'
     ],
     entry_points={
-        'console_scripts': ['autodoc=autodoc.cli:cli']
+        'console_scripts': [
+            'autodoc=autodoc.cli:cli',
+            'autodoc-serve=autodoc.server:serve',
+            'autodoc-client=autodoc.client:client',
+        ]
     },
     # TODO: set license.
     classifiers=[
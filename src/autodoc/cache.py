@@ -0,0 +1,275 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements docstrings and documents caches for incremental
+analysis.
+"""
+import hashlib
+import json
+import sqlite3
+from collections import OrderedDict
+from . import __version__
+
+
+class DocstringCache:
+    """This class maps definition's input state to result docstring.
+
+    Cache key is a hash of the raw docstring, definition's signature, settings
+    and autodoc version. So cached docstring is valid while all of them are
+    the same and the definition may be not processed at all.
+
+    Cache is stored in the ``docstring_cache`` table of the given SQLite DB,
+    it may be a separate file or the content DB itself. Reports of the
+    definition are stored with the docstring and repeated on cache hits, see
+    :meth:`DefinitionHandlerTask.process`.
+
+    Entries are looked up in the DB on demand, recently used ones are kept in
+    memory.
+
+    Args:
+        filename: Cache DB filename.
+        settings: Settings dict.
+        max_size: Max number of entries kept in memory. If not set then
+            :attr:`max_size` is used.
+        prune: Remove entries which are not used since the last
+            :meth:`save`. It must be set only if all definitions are
+            processed.
+    """
+
+    #: Cache table name.
+    table = 'docstring_cache'
+
+    #: Version of the stored data format, it's a part of the cache key.
+    data_version = 2
+
+    #: Default max number of entries kept in memory.
+    max_size = 10000
+
+    def __init__(self, filename, settings, max_size=None, prune=False):
+        self.filename = filename
+        data = json.dumps([__version__, self.data_version, settings],
+                          sort_keys=True)
+        self.digest = hashlib.sha1(data.encode('utf-8')).hexdigest()
+        if max_size is not None:
+            self.max_size = max_size
+        self.prune = prune
+        self._conn = None
+        # Recently used entries, least recently used goes first.
+        self._data = OrderedDict()
+        self._new = {}
+        # Keys used since the last save, see prune.
+        self._hits = set()
+
+    def __getstate__(self):
+        # Connection can't be pickled.
+        state = self.__dict__.copy()
+        state['_conn'] = None
+        return state
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.filename)
+            self._conn.execute("""CREATE TABLE IF NOT EXISTS %s(
+            hash TEXT PRIMARY KEY, data BLOB)
+            """ % self.table)
+        return self._conn
+
+    def _remember(self, key, docstring):
+        self._data[key] = docstring
+        if len(self._data) > self.max_size:
+            self._data.popitem(last=False)
+
+    def get(self, key, default=None):
+        """Get cached docstring.
+
+        Args:
+            key: Cache key.
+            default: Value to return if the key is not found.
+
+        Returns:
+            Cached docstring or ``default``.
+        """
+        docstring = self._data.get(key)
+        if docstring is not None:
+            self._data.move_to_end(key)
+        else:
+            docstring = self._new.get(key)
+            if docstring is None:
+                row = self.conn.execute(
+                    'SELECT data FROM %s WHERE hash=?' % self.table,
+                    (key,)).fetchone()
+                if row is None:
+                    return default
+                docstring = row[0]
+            self._remember(key, docstring)
+        if self.prune:
+            self._hits.add(key)
+        return docstring
+
+    def __len__(self):
+        """Number of entries in memory."""
+        return len(self._data)
+
+    def clear(self):
+        """Drop loaded and not saved entries from the memory."""
+        self._data = OrderedDict()
+        self._new = {}
+        self._hits = set()
+
+    def __contains__(self, key):
+        return self.get(key) is not None
+
+    def __getitem__(self, key):
+        docstring = self.get(key)
+        if docstring is None:
+            raise KeyError(key)
+        return docstring
+
+    def __setitem__(self, key, docstring):
+        self._new[key] = docstring
+        self._remember(key, docstring)
+        if self.prune:
+            self._hits.add(key)
+
+    def get_key(self, definition):
+        """Build cache key for the given definition.
+
+        Args:
+            definition: :class:`Definition` instance.
+
+        Returns:
+            str: Cache key.
+        """
+        state = [
+            self.digest,
+            definition.name,
+            int(definition.type),
+            getattr(definition, 'kind', None),
+            definition.compound_type,
+            definition.get_start_pos()[1],
+            [x.name for x in definition.args or ()],
+            definition.doc_block.docstring,
+        ]
+        data = json.dumps(state)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
+
+    def pop_new(self):
+        """Get docstrings added since last call.
+
+        Returns:
+            Dict ``{key: docstring}``.
+        """
+        new = self._new
+        self._new = {}
+        return new
+
+    def update(self, entries):
+        """Add docstrings to the cache.
+
+        Args:
+            entries: Dict ``{key: docstring}``.
+        """
+        for key, docstring in entries.items():
+            self[key] = docstring
+
+    def pop_changes(self):
+        """Get docstrings added and keys used since last call.
+
+        It's used to pass changes from worker processes, see :meth:`merge`.
+
+        Returns:
+            Tuple ``(new, hits)`` where ``new`` is a dict
+            ``{key: docstring}`` and ``hits`` is a set of used keys.
+        """
+        hits = self._hits
+        self._hits = set()
+        return self.pop_new(), hits
+
+    def merge(self, changes):
+        """Merge changes of other cache instance.
+
+        Args:
+            changes: Result of the :meth:`pop_changes`.
+        """
+        new, hits = changes
+        self.update(new)
+        if self.prune:
+            self._hits.update(hits)
+
+    def save(self):
+        """Save new docstrings to the DB.
+
+        If :attr:`prune` is set then entries not used since last call are
+        removed from the DB.
+        """
+        new = self.pop_new()
+        if new:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO %s VALUES (?,?)' % self.table,
+                new.items())
+        if self.prune:
+            self.conn.execute('CREATE TEMP TABLE IF NOT EXISTS hits'
+                              '(hash TEXT PRIMARY KEY)')
+            self.conn.executemany('INSERT OR IGNORE INTO temp.hits VALUES (?)',
+                                  ((x,) for x in self._hits))
+            self.conn.execute('DELETE FROM %s WHERE hash NOT IN '
+                              '(SELECT hash FROM temp.hits)' % self.table)
+            self.conn.execute('DELETE FROM temp.hits')
+            self._hits = set()
+        self.conn.commit()
+
+
+class DocumentCache(DocstringCache):
+    """This class maps docstring text to the parsed document tree.
+
+    It allows to skip docstring parsing for repeated runs and for identical
+    docstrings. Cache key is a hash of the text after styles transforms,
+    reader and parser classes, settings and autodoc version.
+
+    Documents are stored in the ``document_cache`` table, see
+    :meth:`DocumentBuilder.dump_document`.
+
+    Args:
+        filename: Cache DB filename.
+        settings: Settings dict.
+        max_size: Max number of documents kept in memory.
+        prune: Remove documents which are not used since the last
+            :meth:`save`.
+    """
+
+    #: Cache table name.
+    table = 'document_cache'
+
+    def get_key(self, text, builder):
+        """Build cache key for the given text.
+
+        Args:
+            text: Docstring text to parse.
+            builder: :class:`DocumentBuilder` instance.
+
+        Returns:
+            str: Cache key.
+        """
+        state = [
+            self.digest,
+            type(builder.reader).__module__,
+            type(builder.reader).__name__,
+            type(builder.parser).__module__,
+            type(builder.parser).__name__,
+            text,
+        ]
+        data = json.dumps(state)
+        return hashlib.sha1(data.encode('utf-8')).hexdigest()
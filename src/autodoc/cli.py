@@ -47,8 +47,15 @@ class SettingsOption(click.Option):
         return value
 
 
+def validate_builder(ctx, param, value):
+    # Builder is either 'python' or path to the external executable.
+    if value is None or value == 'python':
+        return value
+    return click.Path(dir_okay=False, exists=True).convert(value, param, ctx)
+
+
 def get_content_db(context, paths, exclude, exclude_patterns, exe, db_filename,
-                   out_db):
+                   out_db, jobs=1):
     try:
         if db_filename is None:
             if not paths:
@@ -56,7 +63,7 @@ def get_content_db(context, paths, exclude, exclude_patterns, exe, db_filename,
                     'At least one path must be specified.')
             db = context.build_content_db(out_db, paths, exclude=exclude,
                                           exclude_patterns=exclude_patterns,
-                                          exe=exe)
+                                          exe=exe, jobs=jobs)
         else:
             db = context.get_content_db(db_filename)
     except ContentDbError as e:
@@ -68,6 +75,23 @@ def get_content_db(context, paths, exclude, exclude_patterns, exe, db_filename,
     return db
 
 
+def get_changed_lines(changed_since, diff_file, lines):
+    from autodoc.diff import ChangedLines, get_git_diff
+
+    changed_lines = ChangedLines()
+    try:
+        if changed_since:
+            root, diff = get_git_diff(changed_since)
+            changed_lines.add_diff(diff, root=root)
+        if diff_file:
+            changed_lines.add_diff(diff_file)
+        for value in lines:
+            changed_lines.add_range(value)
+    except (AutodocError, ValueError) as e:
+        raise click.ClickException(str(e))
+    return changed_lines
+
+
 def init(logger):
     from autodoc.python.domain import PythonDomain
 
@@ -83,9 +107,9 @@ def init(logger):
               help='Verbose output.', cls=SettingsOption)
 @click.option('--fix/--no-fix', default=True, show_default=True,
               help='Auto fix detected issues.', cls=SettingsOption)
-@click.option('--builder', '-b', metavar='EXE',
-              type=click.Path(dir_okay=False, exists=True),
-              help='Content DB builder executable.')
+@click.option('--builder', '-b', metavar='EXE', callback=validate_builder,
+              help='Content DB builder executable or "python" to use '
+                   'built-in python builder.')
 @click.option('--db', type=click.Path(dir_okay=False, exists=True),
               help='Content DB to process.')
 @click.option('--out-db', type=click.Path(dir_okay=False))
@@ -95,6 +119,37 @@ def init(logger):
               metavar='PATH', help='Files and/or dirs to exclude.')
 @click.option('--exclude-pattern', '-x', cls=SettingsOption, multiple=True,
               metavar='WILDCARD', help='Exclude pattern.')
+@click.option('--jobs', '-j', type=click.IntRange(0), default=1,
+              show_default=True, metavar='N',
+              help='Number of processes to analyze and write files with '
+                   '(0 - number of CPUs).')
+@click.option('--fsync', is_flag=True, default=False,
+              help='Flush written files to the disk before replacing sources.')
+@click.option('--cache', type=click.Path(dir_okay=False),
+              help='Docstrings cache file to skip unchanged definitions. '
+                   'Entries not used by a full run are removed.')
+@click.option('--max-memory', type=click.IntRange(1), metavar='MB',
+              help='Stop if memory used by a process exceeds the limit.')
+@click.option('--watch', is_flag=True, default=False,
+              help='Watch paths and process changed files '
+                   '(requires python builder).')
+@click.option('--watch-interval', type=click.FloatRange(0.1), default=1.0,
+              show_default=True, metavar='SECONDS',
+              help='Watch polling interval.')
+@click.option('--changed-since', metavar='REF',
+              help='Process only definitions changed since the git revision.')
+@click.option('--diff', 'diff_file', type=click.File('r'), metavar='FILE',
+              help='Process only definitions changed in the unified diff '
+                   '("-" to read from stdin).')
+@click.option('--lines', multiple=True, metavar='FILE:START-END',
+              help='Process only definitions intersecting the lines range.')
+@click.option('--profile', is_flag=True, default=False,
+              help='Print timings of the processing stages.')
+@click.option('--profile-output', type=click.Path(dir_okay=False),
+              metavar='FILE', help='Write timings to the JSON file.')
+@click.option('--profile-top', type=click.IntRange(0), default=10,
+              show_default=True, metavar='N',
+              help='Number of the slowest definitions to report.')
 @click.option('--config', '-c', help='Configuration file.',
               type=click.Path(dir_okay=False, exists=True))
 @click.option('--dump-config', is_flag=True, default=False,
@@ -106,7 +161,9 @@ def init(logger):
 @click.argument('path', type=click.Path(exists=True), nargs=-1)
 @click.pass_context
 def cli(ctx, verbose, fix, builder, db, out_db, exclude, exclude_pattern,
-        config, create_config, dump_config, s, path, out_filename):
+        jobs, fsync, cache, max_memory, watch, watch_interval, changed_since,
+        diff_file, lines, profile, profile_output, profile_top, config,
+        create_config, dump_config, s, path, out_filename):
     """Autodoc tool."""
 
     logger = create_logger(verbose)
@@ -129,18 +186,59 @@ def cli(ctx, verbose, fix, builder, db, out_db, exclude, exclude_pattern,
         settings_builder.dump(sys.stdout)
         return
 
+    if watch and (builder != 'python' or db):
+        raise click.ClickException(
+            '--watch requires python builder (-b python) and no --db.')
+    if watch and (changed_since or diff_file or lines):
+        raise click.ClickException(
+            '--watch can\'t be used with --changed-since, --diff or --lines.')
+
     context.settings = settings_builder.get_settings()
+    if cache:
+        from autodoc.cache import DocstringCache, DocumentCache
+        # Unused entries are removed only if all definitions are processed.
+        prune = not (watch or changed_since or diff_file or lines)
+        context.cache = DocstringCache(cache, settings_builder.settings,
+                                       prune=prune)
+        context.document_cache = DocumentCache(cache,
+                                               settings_builder.settings,
+                                               prune=prune)
+    if profile or profile_output:
+        from autodoc.profiler import Profiler
+        context.profiler = Profiler(profile_top)
+    if max_memory:
+        from autodoc.memory import MemoryGuard
+        context.memory_guard = MemoryGuard(max_memory << 20)
+    if changed_since or diff_file or lines:
+        context.changed_lines = get_changed_lines(changed_since, diff_file,
+                                                  lines)
 
     content_db = get_content_db(context, paths=path, exclude=exclude,
                                 exclude_patterns=exclude_pattern,
-                                exe=builder, db_filename=db, out_db=out_db)
+                                exe=builder, db_filename=db, out_db=out_db,
+                                jobs=jobs)
 
     try:
-        context.analyze(content_db)
+        context.analyze(content_db, jobs=jobs)
+        if context.profiler is not None:
+            if profile:
+                context.profiler.report(sys.stderr)
+            if profile_output:
+                context.profiler.save(profile_output)
         content_db.save_settings(settings_builder.settings)
         content_db.finalize()
+        if context.cache is not None:
+            context.cache.save()
+            context.document_cache.save()
         if fix:
-            context.sync_sources(content_db, out_filename)
+            context.sync_sources(content_db, out_filename, jobs=jobs,
+                                 fsync=fsync)
+        if watch:
+            from autodoc.watch import Watcher
+            watcher = Watcher(context, content_db, path, exclude=exclude,
+                              exclude_patterns=exclude_pattern, fix=fix,
+                              jobs=jobs, interval=watch_interval)
+            watcher.run()
     except AutodocError as e:
         raise click.ClickException(str(e))
 
@@ -0,0 +1,95 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements thin client of the autodoc daemon.
+
+It doesn't import autodoc processing modules, so the client starts fast.
+See :mod:`autodoc.server` for the protocol.
+"""
+import os
+import os.path as op
+import json
+import socket
+import tempfile
+import click
+
+
+def get_default_address():
+    """Get default socket filename (per user)."""
+    uid = os.getuid() if hasattr(os, 'getuid') else 0
+    return op.join(tempfile.gettempdir(), 'autodoc-%d.sock' % uid)
+
+
+def send_request(address, request):
+    """Send request to the daemon.
+
+    Args:
+        address: Socket filename.
+        request: Request dict.
+
+    Returns:
+        Response dict.
+    """
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.connect(address)
+        sock.sendall(json.dumps(request).encode('utf-8') + b'\n')
+        with sock.makefile('rb') as f:
+            return json.loads(f.readline().decode('utf-8'))
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('--socket', 'address', type=click.Path(dir_okay=False),
+              default=get_default_address, show_default=True,
+              help='Daemon socket filename.')
+@click.option('--write', '-w', is_flag=True, default=False,
+              help='Patch files instead of printing patched content.')
+@click.option('--stop', is_flag=True, default=False, help='Stop the daemon.')
+@click.option('-s', help='Overwrite a setting.', metavar='VAR=VALUE',
+              multiple=True)
+@click.argument('path', type=click.Path(exists=True), nargs=-1)
+def client(address, write, stop, s, path):
+    """Autodoc daemon client.
+
+    Reports are printed to stderr and patched content to stdout
+    (if --write is not set). Content of multiple files is prefixed with
+    "==> filename <==" headers.
+    """
+    if stop:
+        request = {'command': 'stop'}
+    else:
+        request = {'command': 'process', 'settings': list(s), 'write': write,
+                   'paths': [op.abspath(x) for x in path]}
+
+    try:
+        response = send_request(address, request)
+    except OSError as e:
+        raise click.ClickException('Daemon is not available: %s' % e)
+
+    for _, msg in response['messages']:
+        click.echo(msg, err=True)
+    if response['error']:
+        raise click.ClickException(response['error'])
+    files = response['files']
+    for i, (filename, content) in enumerate(files):
+        # Single file content is printed as is, so it may be piped.
+        if len(files) > 1:
+            click.echo('%s==> %s <==' % ('\n' if i else '', filename))
+            if content and not content.endswith('\n'):
+                content += '\n'
+        click.echo(content, nl=False)
+
+
+if __name__ == '__main__':
+    client()
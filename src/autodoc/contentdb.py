@@ -16,13 +16,60 @@ import os
 import os.path as op
 import sys
 import sqlite3
-import subprocess
-import tempfile
 import json
 import enum
 from collections import namedtuple
 
 
+#: Content DB schema.
+#:
+#: This is a subset of the schema created by the external content DB builder
+#: which is used by the autodoc.
+SCHEMA = """
+CREATE TABLE files (name TEXT, language TEXT);
+CREATE TABLE compounddef (
+    refid TEXT, name TEXT, id_file INTEGER, line INTEGER, column INTEGER,
+    kind_id INTEGER
+);
+CREATE TABLE memberdef (
+    refid TEXT, name TEXT, id_file INTEGER, line INTEGER, column INTEGER,
+    type TEXT, scope TEXT, initializer TEXT, read TEXT, write TEXT,
+    prot INTEGER, static INTEGER, const INTEGER, explicit INTEGER,
+    inline INTEGER, final INTEGER, sealed INTEGER, new INTEGER,
+    optional INTEGER, required INTEGER, volatile INTEGER, virt INTEGER,
+    mutable INTEGER, initonly INTEGER, attribute INTEGER, property INTEGER,
+    readonly INTEGER, bound INTEGER, constrained INTEGER, transient INTEGER,
+    maybevoid INTEGER, maybedefault INTEGER, maybeambiguous INTEGER,
+    readable INTEGER, writable INTEGER, gettable INTEGER,
+    privategettable INTEGER, protectedgettable INTEGER, settable INTEGER,
+    privatesettable INTEGER, protectedsettable INTEGER, accessor INTEGER,
+    addable INTEGER, removable INTEGER, raisable INTEGER, kind INTEGER,
+    bodystart INTEGER, bodyend INTEGER, id_bodyfile INTEGER,
+    inherited_from TEXT, id_compound INTEGER
+);
+CREATE TABLE params (type TEXT, declname TEXT, defname TEXT);
+CREATE TABLE memberdef_params (id_memberdef INTEGER, id_param INTEGER);
+CREATE TABLE docblocks (
+    refid TEXT, type INTEGER, id_file INTEGER, start_line INTEGER,
+    start_col INTEGER, end_line INTEGER, end_col INTEGER, docstring TEXT,
+    doc BLOB
+);
+"""
+
+#: Content DB indexes ``(name, table, columns)``.
+#:
+#: External content DB builders may not create them, so they are created by
+#: the :class:`ContentDb` on open if missing.
+INDEXES = (
+    ('idx_compounddef_id_file', 'compounddef', 'id_file'),
+    ('idx_memberdef_id_file', 'memberdef', 'id_file'),
+    ('idx_memberdef_name', 'memberdef', 'name, id_compound'),
+    ('idx_memberdef_params_id_memberdef', 'memberdef_params', 'id_memberdef'),
+    ('idx_docblocks_refid', 'docblocks', 'refid'),
+    ('idx_docblocks_id_file', 'docblocks', 'id_file'),
+)
+
+
 class ContentDbError(Exception):
     """Content DB error."""
     pass
@@ -106,9 +153,15 @@ class ContentDbBuilder:
             raise ContentDbError('Content DB builder is not found: %s'
                                  % self._exe)
 
+        # Imported here to speed up the CLI startup.
+        import subprocess
+        import tempfile
+
         temp_dir = tempfile.mkdtemp()
 
-        if not output:
+        # DB in the temp dir is thrown away after the run.
+        temporary = not output
+        if temporary:
             output = op.join(temp_dir, 'content.db')
 
         cmd = [self._exe, '-T', temp_dir, '-o', output]
@@ -134,7 +187,7 @@ class ContentDbBuilder:
         if not op.exists(output):
             raise ContentDbError('Error creating content DB %s' % output)
 
-        return ContentDb(self.context, output)
+        return ContentDb(self.context, output, temporary=temporary)
 
 
 class DocBlock:
@@ -299,37 +352,64 @@ class CompoundDefinition(Definition):
         self.args = None
 
 
-class MemberDefinition(Definition):
-    """This class represents member definition (like function or method)."""
+#: Boolean flags of member definitions ``(attribute, memberdef column)``.
+#:
+#: The order defines bits of the :attr:`CompactMemberDefinition.flags`.
+MEMBER_FLAGS = (
+    ('is_static', 'static'),
+    ('is_const', 'const'),
+    ('is_explicit', 'explicit'),
+    ('is_inline', 'inline'),
+    ('is_final', 'final'),
+    ('is_sealed', 'sealed'),
+    ('is_new', 'new'),
+    ('is_optional', 'optional'),
+    ('is_required', 'required'),
+    ('is_volatile', 'volatile'),
+    ('is_mutable', 'mutable'),
+    ('is_initonly', 'initonly'),
+    ('is_attribute', 'attribute'),
+    ('is_property', 'property'),
+    ('is_readonly', 'readonly'),
+    ('is_bound', 'bound'),
+    ('is_constrained', 'constrained'),
+    ('is_transient', 'transient'),
+    ('is_maybevoid', 'maybevoid'),
+    ('is_maybedefault', 'maybedefault'),
+    ('is_maybeambiguous', 'maybeambiguous'),
+    ('is_readable', 'readable'),
+    ('is_writable', 'writable'),
+    ('is_gettable', 'gettable'),
+    ('is_privategettable', 'privategettable'),
+    ('is_protectedgettable', 'protectedgettable'),
+    ('is_settable', 'settable'),
+    ('is_privatesettable', 'privatesettable'),
+    ('is_protectedsettable', 'protectedsettable'),
+    ('is_addable', 'addable'),
+    ('is_removable', 'removable'),
+    ('is_raisable', 'raisable'),
+)
+
+
+class BaseMemberDefinition(Definition):
+    """Base class for member definitions (like function or method).
+
+    Subclasses define how boolean flags (see :data:`MEMBER_FLAGS`) are
+    stored.
+    """
     __slots__ = ['member_type', 'scope', 'initializer', 'read', 'write',
-                 'visibility', 'is_static', 'is_const', 'is_explicit',
-                 'is_inline', 'is_final', 'is_sealed', 'is_new', 'is_optional',
-                 'is_required', 'is_volatile', 'virtual', 'is_mutable',
-                 'is_initonly', 'is_attribute', 'is_property', 'is_readonly',
-                 'is_bound', 'is_constrained', 'is_transient', 'is_maybevoid',
-                 'is_maybedefault', 'is_maybeambiguous', 'is_readable',
-                 'is_writable', 'is_gettable', 'is_privategettable',
-                 'is_protectedgettable', 'is_settable', 'is_privatesettable',
-                 'is_protectedsettable', 'accessor', 'is_addable',
-                 'is_removable', 'is_raisable', 'kind', 'bodystart', 'bodyend',
-                 'id_bodyfile', 'inherited_from', 'compound_id',
+                 'visibility', 'virtual', 'accessor', 'kind', 'bodystart',
+                 'bodyend', 'id_bodyfile', 'inherited_from', 'compound_id',
                  'compound_type', 'args']
 
     def __init__(self, id, refid, name, language, id_file, filename,
                  start_line, start_col, member_type, scope, initializer, read,
-                 write, visibility, is_static, is_const, is_explicit, is_inline,
-                 is_final, is_sealed, is_new, is_optional, is_required,
-                 is_volatile, virtual, is_mutable, is_initonly, is_attribute,
-                 is_property, is_readonly, is_bound, is_constrained,
-                 is_transient, is_maybevoid, is_maybedefault, is_maybeambiguous,
-                 is_readable, is_writable, is_gettable, is_privategettable,
-                 is_protectedgettable, is_settable, is_privatesettable,
-                 is_protectedsettable, accessor, is_addable, is_removable,
-                 is_raisable, kind, bodystart, bodyend, id_bodyfile,
-                 inherited_from, compound_id, compound_type, doc_block, args):
-        super(MemberDefinition, self).__init__(
-            DefinitionType.MEMBER,id, refid, name, language, id_file, filename,
-            doc_block, start_line, start_col)
+                 write, visibility, virtual, accessor, kind, bodystart,
+                 bodyend, id_bodyfile, inherited_from, compound_id,
+                 compound_type, doc_block, args):
+        super(BaseMemberDefinition, self).__init__(
+            DefinitionType.MEMBER, id, refid, name, language, id_file,
+            filename, doc_block, start_line, start_col)
         self.member_type = member_type
         self.scope = scope
         self.initializer = initializer
@@ -338,45 +418,13 @@ class MemberDefinition(Definition):
         # 0:public 1:protected
         # 2:private 3:package
         self.visibility = visibility
-        self.is_static = bool(is_static)
-        self.is_const = bool(is_const)
-        self.is_explicit = bool(is_explicit)
-        self.is_inline = bool(is_inline)
-        self.is_final = bool(is_final)
-        self.is_sealed = bool(is_sealed)
-        self.is_new = bool(is_new)
-        self.is_optional = bool(is_optional)
-        self.is_required = bool(is_required)
-        self.is_volatile = bool(is_volatile)
         # 0:no 1:virtual
         # 2:pure-virtual
         self.virtual = virtual
-        self.is_mutable = bool(is_mutable)
-        self.is_initonly = bool(is_initonly)
-        self.is_attribute = bool(is_attribute)
-        self.is_property = bool(is_property)
-        self.is_readonly = bool(is_readonly)
-        self.is_bound = bool(is_bound)
-        self.is_constrained = bool(is_constrained)
-        self.is_transient = bool(is_transient)
-        self.is_maybevoid = bool(is_maybevoid)
-        self.is_maybedefault = bool(is_maybedefault)
-        self.is_maybeambiguous = bool(is_maybeambiguous)
-        self.is_readable = bool(is_readable)
-        self.is_writable = bool(is_writable)
-        self.is_gettable = bool(is_gettable)
-        self.is_privategettable = bool(is_privategettable)
-        self.is_protectedgettable = bool(is_protectedgettable)
-        self.is_settable = bool(is_settable)
-        self.is_privatesettable = bool(is_privatesettable)
-        self.is_protectedsettable = bool(is_protectedsettable)
         # 1:assign 2:copy
         # 3:retain
         # 4:string 5:weak
         self.accessor = accessor
-        self.is_addable = bool(is_addable)
-        self.is_removable = bool(is_removable)
-        self.is_raisable = bool(is_raisable)
         # from doxygen sqlite3gen.cpp:
         # 0:define 1:function 2:variable 3:typedef 4:enum 5:enumvalue
         # 6:signal 7:slot 8:friend 9:DCOP 10:property 11:event
@@ -388,13 +436,27 @@ class MemberDefinition(Definition):
         # ID of parent compound and its type.
         self.compound_id = compound_id
         self.compound_type = CompoundType.from_(compound_type)
-        self.filename = filename
-        self.language = language
         self.args = args
 
     def __str__(self):
         return '<MemberDefinition:%s>' % self.name
 
+    @classmethod
+    def from_row(cls, row, doc_block, args):
+        """Construct definition from the content DB row.
+
+        Args:
+            row: Tuple of :class:`BaseMemberDefinition` constructor args
+                (except ``doc_block`` and ``args``) followed by packed flags
+                (see :data:`MEMBER_FLAGS`).
+            doc_block: :class:`DocBlock` instance.
+            args: Tuple of :class:`Arg`.
+
+        Returns:
+            Definition instance.
+        """
+        raise NotImplementedError
+
     # TODO: test me
     @property
     def is_function(self):
@@ -416,29 +478,229 @@ class MemberDefinition(Definition):
         return False
 
 
+class MemberDefinition(BaseMemberDefinition):
+    """This class represents member definition (like function or method).
+
+    All flags are stored as separate attributes.
+    """
+    __slots__ = [x[0] for x in MEMBER_FLAGS]
+
+    def __init__(self, id, refid, name, language, id_file, filename,
+                 start_line, start_col, member_type, scope, initializer, read,
+                 write, visibility, is_static, is_const, is_explicit,
+                 is_inline, is_final, is_sealed, is_new, is_optional,
+                 is_required, is_volatile, virtual, is_mutable, is_initonly,
+                 is_attribute, is_property, is_readonly, is_bound,
+                 is_constrained, is_transient, is_maybevoid, is_maybedefault,
+                 is_maybeambiguous, is_readable, is_writable, is_gettable,
+                 is_privategettable, is_protectedgettable, is_settable,
+                 is_privatesettable, is_protectedsettable, accessor,
+                 is_addable, is_removable, is_raisable, kind, bodystart,
+                 bodyend, id_bodyfile, inherited_from, compound_id,
+                 compound_type, doc_block, args):
+        super(MemberDefinition, self).__init__(
+            id, refid, name, language, id_file, filename, start_line,
+            start_col, member_type, scope, initializer, read, write,
+            visibility, virtual, accessor, kind, bodystart, bodyend,
+            id_bodyfile, inherited_from, compound_id, compound_type,
+            doc_block, args)
+        self.is_static = bool(is_static)
+        self.is_const = bool(is_const)
+        self.is_explicit = bool(is_explicit)
+        self.is_inline = bool(is_inline)
+        self.is_final = bool(is_final)
+        self.is_sealed = bool(is_sealed)
+        self.is_new = bool(is_new)
+        self.is_optional = bool(is_optional)
+        self.is_required = bool(is_required)
+        self.is_volatile = bool(is_volatile)
+        self.is_mutable = bool(is_mutable)
+        self.is_initonly = bool(is_initonly)
+        self.is_attribute = bool(is_attribute)
+        self.is_property = bool(is_property)
+        self.is_readonly = bool(is_readonly)
+        self.is_bound = bool(is_bound)
+        self.is_constrained = bool(is_constrained)
+        self.is_transient = bool(is_transient)
+        self.is_maybevoid = bool(is_maybevoid)
+        self.is_maybedefault = bool(is_maybedefault)
+        self.is_maybeambiguous = bool(is_maybeambiguous)
+        self.is_readable = bool(is_readable)
+        self.is_writable = bool(is_writable)
+        self.is_gettable = bool(is_gettable)
+        self.is_privategettable = bool(is_privategettable)
+        self.is_protectedgettable = bool(is_protectedgettable)
+        self.is_settable = bool(is_settable)
+        self.is_privatesettable = bool(is_privatesettable)
+        self.is_protectedsettable = bool(is_protectedsettable)
+        self.is_addable = bool(is_addable)
+        self.is_removable = bool(is_removable)
+        self.is_raisable = bool(is_raisable)
+
+    @classmethod
+    def from_row(cls, row, doc_block, args):
+        obj = cls.__new__(cls)
+        BaseMemberDefinition.__init__(obj, *row[:-1], doc_block, args)
+        flags = row[-1]
+        for i, (name, _) in enumerate(MEMBER_FLAGS):
+            setattr(obj, name, bool(flags >> i & 1))
+        return obj
+
+
+class CompactMemberDefinition(BaseMemberDefinition):
+    """Member definition with flags packed into a single integer.
+
+    Flags are exposed as read-only properties with the same names as in
+    the :class:`MemberDefinition`. It saves memory and construction time if
+    a domain uses only a few flags.
+    """
+    __slots__ = ['flags']
+
+    def __init__(self, id, refid, name, language, id_file, filename,
+                 start_line, start_col, member_type, scope, initializer, read,
+                 write, visibility, virtual, accessor, kind, bodystart,
+                 bodyend, id_bodyfile, inherited_from, compound_id,
+                 compound_type, flags, doc_block, args):
+        super(CompactMemberDefinition, self).__init__(
+            id, refid, name, language, id_file, filename, start_line,
+            start_col, member_type, scope, initializer, read, write,
+            visibility, virtual, accessor, kind, bodystart, bodyend,
+            id_bodyfile, inherited_from, compound_id, compound_type,
+            doc_block, args)
+        #: Bits of the :data:`MEMBER_FLAGS`.
+        self.flags = flags
+
+    @classmethod
+    def from_row(cls, row, doc_block, args):
+        return cls(*row, doc_block, args)
+
+
+def _flag_property(bit):
+    return property(lambda self: bool(self.flags & bit))
+
+
+for _bit, (_name, _) in enumerate(MEMBER_FLAGS):
+    setattr(CompactMemberDefinition, _name, _flag_property(1 << _bit))
+del _bit, _name
+
+
+# Expression to pack member flags into a single integer.
+_flags_sql = ' | '.join('((coalesce(m.%s, 0) != 0) << %d)' % (column, i)
+                        for i, (_, column) in enumerate(MEMBER_FLAGS))
+
+
+def _sql_ids(ids):
+    """Build comma separated list of IDs for the SQL ``IN`` clause."""
+    return ','.join('%d' % x for x in ids)
+
+
 class ContentDb:
-    """This class represents content database."""
-    def __init__(self, context, filename):
+    """This class represents content database.
+
+    Args:
+        context: Application context :class:`Context`.
+        filename: Content DB filename or :attr:`MEMORY`.
+        conn: Optional open connection to use. It's required for in-memory
+            DB since it exists only while the connection is open.
+        temporary: ``True`` if the DB file is thrown away after the run.
+    """
+
+    #: Filename of the in-memory content DB.
+    MEMORY = ':memory:'
+
+    #: Number of member definitions to load args for in a single query.
+    args_chunk_size = 500
+
+    #: Number of doc blocks to buffer before writing to the DB.
+    write_chunk_size = 1000
+
+    #: Number of files to load definitions for at once, see
+    #: :meth:`get_definitions`.
+    files_chunk_size = 100
+
+    #: SQLite pragmas to set on connect to :attr:`temporary` DB.
+    #:
+    #: Temporary DB is thrown away after the run, so durability is traded
+    #: for speed. User's DB files are kept crash-safe.
+    temporary_pragmas = (
+        ('journal_mode', 'MEMORY'),
+        ('synchronous', 'OFF'),
+    )
+
+    def __init__(self, context, filename, conn=None, temporary=False):
         self.context = context
         self.filename = filename
-        self._conn = None
+        self._conn = conn
+        self._temporary = temporary
+        self._inserts = []
+        self._updates = []
+        #: Set of reference IDs of saved doc blocks, collected only if it's
+        #: not ``None``.
+        self.saved_refids = None
+        # Constructors of the current files chunk, see get_definitions().
+        self._constructors = None
+        self._constructor_ids = None
+        if conn is not None:
+            self.create_indexes()
+            self._set_pragmas()
+
+    @property
+    def in_memory(self):
+        """``True`` if the DB is not backed by a file."""
+        return self.filename == self.MEMORY
+
+    @property
+    def temporary(self):
+        """``True`` if the DB is not kept after the run."""
+        return self._temporary or self.in_memory
 
     @property
     def conn(self):
         if self._conn is None:
             self._conn = sqlite3.connect(self.filename)
+            self.create_indexes()
+            # Indexes may be added to user's DB, so they are created before.
+            self._set_pragmas()
         return self._conn
 
+    def _set_pragmas(self):
+        if self.temporary:
+            for name, value in self.temporary_pragmas:
+                self._conn.execute('PRAGMA %s=%s' % (name, value))
+
+    def create_indexes(self, schema='main', tables=None):
+        """Create missing indexes (see :data:`INDEXES`).
+
+        Read-only DB is used as is.
+
+        Args:
+            schema: Schema to create indexes in.
+            tables: Optional list of tables to create indexes for.
+        """
+        conn = self._conn
+        try:
+            for name, table, columns in INDEXES:
+                if tables is not None and table not in tables:
+                    continue
+                conn.execute('CREATE INDEX IF NOT EXISTS %s.%s ON %s (%s)'
+                             % (schema, name, table, columns))
+            conn.commit()
+        except sqlite3.OperationalError as e:
+            self.context.logger.debug('Content DB indexes are not created: %s',
+                                      e)
+
     def finalize(self):
+        self.flush()
         self.conn.commit()
 
-    def get_compound_definitions(self, rowid=None):
+    def get_compound_definitions(self, rowid=None, files=None):
         """Get compound definitions from the DB.
 
         Args:
             rowid: Optional definition ID in the DB. If not specified then
                 yields all definitions. Otherwise *returns* single definition
                 with the specified ``rowid``.
+            files: Optional list of file IDs to get definitions from.
 
         Yields:
             :class:`CompoundDefinition`
@@ -456,11 +718,15 @@ class ContentDb:
         LEFT JOIN docblocks d ON d.refid=c.refid
         """
 
-        if rowid is None:
-            sql += ' WHERE c.id_file != -1'
-        else:
+        if rowid is not None:
             sql += ' WHERE c.rowid = %d' % rowid
+        elif files is not None:
+            sql += ' WHERE c.id_file IN (%s)' % _sql_ids(files)
+        else:
+            sql += ' WHERE c.id_file != -1'
 
+        # Make sure buffered doc blocks are visible.
+        self.flush()
         for row in self.conn.execute(sql):
             doc = DocBlock(*row[-10:])
             definition = CompoundDefinition(*row[:-10], doc)
@@ -477,35 +743,98 @@ class ContentDb:
         Returns:
             Tuple of args.
         """
+        return self.get_args_bulk((rowid,)).get(rowid, _empty_args)
+
+    def get_args_bulk(self, rowids):
+        """Get args for multiple member definitions using single query.
+
+        Args:
+            rowids: List of member definition IDs.
+
+        Returns:
+            Dict ``{rowid: args}``, members without args are not included.
+        """
         # NOTE: currently it can't detect specified types.
-        arg_res = self.conn.execute("""SELECT p.type, p.declname, p.defname
+        arg_res = self.conn.execute("""
+            SELECT m.id_memberdef, p.type, p.declname, p.defname
             FROM memberdef_params m LEFT JOIN params p ON m.id_param=p.rowid
-            WHERE m.id_memberdef=%d ORDER BY m.rowid
-            """ % rowid)
+            WHERE m.id_memberdef IN (%s) ORDER BY m.rowid
+            """ % _sql_ids(rowids))
+
         # NOTE: '**kwargs' is stored as (similar for *args):
         # type='**', declname='kwargs`, defname = NULL
         tl = ('**', '*')
-        args = tuple(Arg(x[0] + x[1], None)
-                     if x[0] in tl else Arg(x[2], None)
-                     for x in arg_res)
-        return args
+        args = {}
+        for x in arg_res:
+            arg = Arg(x[1] + x[2], None) if x[1] in tl else Arg(x[3], None)
+            args.setdefault(x[0], []).append(arg)
+        return {k: tuple(v) for k, v in args.items()}
+
+    def get_member_classes(self):
+        """Get member definition classes of the registered domains.
+
+        Returns:
+            Dict ``{language: class}``, :class:`MemberDefinition` is used for
+            other languages.
+        """
+        return {name: domain.member_definition_cls
+                for name, domain in self.context.domains.items()
+                if domain.member_definition_cls is not None}
+
+    def get_constructors(self, files):
+        """Get constructors of compounds from the given files.
+
+        Constructors are loaded with a single query.
+
+        Args:
+            files: List of file IDs.
+
+        Returns:
+            Dict ``{compound_id: MemberDefinition}``, value is ``None`` for
+            compounds without constructor.
+        """
+        ids = _sql_ids(files)
+        res = self.conn.execute(
+            'SELECT rowid FROM compounddef WHERE id_file IN (%s)' % ids)
+        constructors = dict.fromkeys(x[0] for x in res)
+        members = self._get_member_definitions(
+            ' WHERE m.name = ? AND m.id_compound IS NOT NULL'
+            ' AND m.id_file IN (%s)' % ids, ('__init__',))
+        for definition in members:
+            constructors[definition.compound_id] = definition
+        return constructors
+
+    def _load_constructors(self, files):
+        self._release_constructors()
+        self._constructors = self.get_constructors(files)
+        self._constructor_ids = {x.id: x for x in self._constructors.values()
+                                 if x is not None}
+
+    def _release_constructors(self):
+        self._constructors = None
+        self._constructor_ids = None
 
     def get_constructor(self, compound_id):
         """Get constructor definition for the given compound (class, struct).
 
+        Constructors of the files processed by :meth:`get_definitions` are
+        preloaded, other ones are queried from the DB.
+
         Args:
             compound_id: Compound ID.
 
         Returns:
             :class:`MemberDefinition` or ``None``.
-
-        See Also:
-            :meth:`get_member_definitions`.
         """
-        gen = self.get_member_definitions(name='__init__', compound=compound_id)
-        return next(gen, None)
-
-    def get_member_definitions(self, name=None, compound=None):
+        constructors = self._constructors
+        if constructors is not None and compound_id in constructors:
+            return constructors[compound_id]
+        members = list(self._get_member_definitions(
+            ' WHERE m.name = ? AND m.id_compound = ?',
+            ('__init__', compound_id)))
+        return members[0] if members else None
+
+    def get_member_definitions(self, name=None, compound=None, files=None):
         """Get member definitions from the DB.
 
         ``name`` and ``compound`` are used to get specific member definition
@@ -514,74 +843,166 @@ class ContentDb:
         Args:
             name: Optional definition name.
             compound: Optional parent compound ID.
+            files: Optional list of file IDs to get definitions from.
 
         Yields:
             :class:`MemberDefinition`
         """
+        if name and compound:
+            where = ' WHERE m.name = ? AND m.id_compound = ?'
+            params = (name, compound)
+        elif files is not None:
+            where = ' WHERE m.id_file IN (%s)' % _sql_ids(files)
+            params = ()
+        else:
+            where = ''
+            params = ()
+        yield from self._get_member_definitions(where, params)
+
+    def _get_member_definitions(self, where, params):
         sql = """SELECT
         m.rowid, m.refid, m.name, f.language, m.id_file, f.name,
         m.line, m.column, m.type, m.scope, m.initializer, m.read, m.write,
-        m.prot, m.static, m.const,
-        m.explicit, m.inline, m.final, m.sealed, m.new, m.optional, m.required,
-        m.volatile, m.virt, m.mutable, m.initonly, m.attribute, m.property,
-        m.readonly, m.bound, m.constrained, m.transient, m.maybevoid,
-        m.maybedefault, m.maybeambiguous, m.readable, m.writable, m.gettable,
-        m.privategettable, m.protectedgettable, m.settable, m.privatesettable,
-        m.protectedsettable, m.accessor, m.addable, m.removable, m.raisable,
-        m.kind, m.bodystart, m.bodyend, m.id_bodyfile, 
-        m.inherited_from, m.id_compound, c.kind_id,
+        m.prot, m.virt, m.accessor, m.kind, m.bodystart, m.bodyend,
+        m.id_bodyfile, m.inherited_from, m.id_compound, c.kind_id,
+        """ + _flags_sql + """,
         d.rowid, d.refid, d.type, d.id_file, d.start_line, d.start_col,
-        d.end_line, d.end_col, d.docstring, d.doc              
+        d.end_line, d.end_col, d.docstring, d.doc
         FROM memberdef m
         LEFT JOIN files f ON f.rowid=m.id_file
         LEFT JOIN docblocks d ON d.refid=m.refid
         LEFT JOIN compounddef c ON m.id_compound = c.rowid
-        """
-        if name and compound:
-            sql += ' WHERE m.name = "%s" AND m.id_compound = %d' % (name,
-                                                                    compound)
-
-        for row in self.conn.execute(sql):
-            doc = DocBlock(*row[-10:])
-            args = self.get_args(row[0])
-            definition = MemberDefinition(*row[:-10], doc, args)
-            yield definition
-
-    def get_definitions(self):
+        """ + where
+
+        # Make sure buffered doc blocks are visible.
+        self.flush()
+        cursor = self.conn.execute(sql, params)
+        constructors = self._constructor_ids or {}
+        classes = self.get_member_classes()
+        while True:
+            rows = cursor.fetchmany(self.args_chunk_size)
+            if not rows:
+                break
+            ids = [x[0] for x in rows if x[0] not in constructors]
+            args = self.get_args_bulk(ids) if ids else {}
+            for row in rows:
+                doc = DocBlock(*row[-10:])
+                definition = constructors.get(row[0])
+                if definition is not None:
+                    # Doc block may be changed since the constructor is
+                    # loaded, so it's always taken from the DB.
+                    definition.doc_block = doc
+                else:
+                    cls = classes.get(row[3], MemberDefinition)
+                    definition = cls.from_row(row[:-10], doc,
+                                              args.get(row[0], _empty_args))
+                yield definition
+
+    def get_definitions(self, files=None):
         """Get definitions from the DB.
 
         At first, this method yields compound definitions and then member
         definitions.
 
+        Given files are loaded by chunks of :attr:`files_chunk_size` files,
+        compound and then member definitions are yielded for each chunk.
+        Constructors of the chunk are loaded at once and released after the
+        chunk, so memory usage doesn't depend on the number of files.
+
+        Args:
+            files: Optional list of file IDs to get definitions from. If not
+                set then all definitions are yielded.
+
         Yields:
             :class:`Definition` instances.
         """
-        yield from self.get_compound_definitions()
-        yield from self.get_member_definitions()
+        if files is None:
+            yield from self.get_compound_definitions()
+            yield from self.get_member_definitions()
+            return
+
+        size = self.files_chunk_size
+        for i in range(0, len(files), size):
+            chunk = files[i:i + size]
+            self._load_constructors(chunk)
+            try:
+                yield from self.get_compound_definitions(files=chunk)
+                yield from self.get_member_definitions(files=chunk)
+            finally:
+                self._release_constructors()
 
-    # TODO: save by chunks in transaction.
-    def save_doc_block(self, definition):
-        doc = definition.doc_block
+    def _add_doc_block(self, doc):
+        """Add doc block to the write buffer.
+
+        Buffer is flushed if it contains :attr:`write_chunk_size` items.
+
+        Args:
+            doc: :class:`DocBlock` instance.
+        """
         if doc.id is None:
-            self.conn.execute("""INSERT INTO docblocks
+            self._inserts.append((doc.refid, doc.type, doc.id_file,
+                                  doc.start_line, doc.start_col, doc.end_line,
+                                  doc.end_col, doc.docstring, None))
+        else:
+            self._updates.append((doc.docstring, doc.id))
+        if self.saved_refids is not None:
+            self.saved_refids.add(doc.refid)
+
+        if len(self._inserts) + len(self._updates) >= self.write_chunk_size:
+            self.flush()
+
+    def flush(self):
+        """Write buffered doc blocks to the DB.
+
+        All chunks are written in a single transaction which is committed by
+        the :meth:`finalize`.
+        """
+        if not self._inserts and not self._updates:
+            return
+
+        if not self.conn.in_transaction:
+            self.conn.execute('BEGIN')
+
+        if self._inserts:
+            self.conn.executemany("""INSERT INTO docblocks
             (refid,type,id_file,start_line,start_col,end_line,end_col,
             docstring,doc)
             VALUES (?,?,?,?,?,?,?,?,?)
-            """, (
-                doc.refid,
-                doc.type,
-                doc.id_file,
-                doc.start_line,
-                doc.start_col,
-                doc.end_line,
-                doc.end_col,
-                doc.docstring,
-                None  # doc.document
-            ))
-        else:
-            self.conn.execute("""
+            """, self._inserts)
+            self._inserts = []
+
+        if self._updates:
+            self.conn.executemany("""
             UPDATE OR FAIL docblocks SET docstring = ? WHERE rowid=?
-            """, (doc.docstring, definition.doc_block.id))
+            """, self._updates)
+            self._updates = []
+
+    def save_doc_block(self, definition):
+        """Save doc block of the given definition.
+
+        Doc block without ID is inserted, for others only docstring is
+        updated.
+
+        Notes:
+            Doc blocks are buffered and written by chunks, see
+            :meth:`flush`.
+
+        Args:
+            definition: :class:`Definition` instance.
+        """
+        self._add_doc_block(definition.doc_block)
+
+    def save_doc_blocks(self, doc_blocks):
+        """Save multiple doc blocks at once.
+
+        Args:
+            doc_blocks: List of :class:`DocBlock` instances.
+
+        See Also:
+            :meth:`save_doc_block`.
+        """
+        for doc in doc_blocks:
+            self._add_doc_block(doc)
 
     def save_settings(self, settings):
         """Save settings in the DB."""
@@ -605,6 +1026,28 @@ class ContentDb:
         res = self.conn.execute('SELECT count(*) FROM files').fetchone()
         return int(res[0])
 
+    def get_files(self):
+        """Get all files.
+
+        Yields:
+            Tuples ``(file_id, filename)``.
+        """
+        yield from self.conn.execute('SELECT rowid,name FROM files')
+
+    def get_language_files(self, languages):
+        """Get IDs of files with the given languages.
+
+        Args:
+            languages: List of languages.
+
+        Returns:
+            List of file IDs.
+        """
+        res = self.conn.execute(
+            'SELECT rowid FROM files WHERE language IN (%s) ORDER BY rowid'
+            % ','.join('?' * len(languages)), tuple(languages))
+        return [x[0] for x in res]
+
     def get_domain_files(self, domain):
         """Get files supported by the given domain.
 
@@ -618,6 +1061,38 @@ class ContentDb:
                                 (domain.name,))
         yield from res
 
+    def remove_files(self, filenames):
+        """Remove given files and all their rows from the DB.
+
+        It's used to update modified files without rebuilding the whole DB.
+
+        Args:
+            filenames: List of filenames.
+        """
+        self.flush()
+        self._release_constructors()
+        conn = self.conn
+        for filename in filenames:
+            res = conn.execute('SELECT rowid FROM files WHERE name=?',
+                               (filename,))
+            for id_file, in res.fetchall():
+                members = ('SELECT rowid FROM memberdef WHERE id_file=%d'
+                           % id_file)
+                params = [x[0] for x in conn.execute(
+                    'SELECT id_param FROM memberdef_params '
+                    'WHERE id_memberdef IN (%s)' % members)]
+                conn.execute('DELETE FROM memberdef_params '
+                             'WHERE id_memberdef IN (%s)' % members)
+                # Params may be shared by members of other files.
+                if params:
+                    conn.execute('DELETE FROM params WHERE rowid IN (%s) AND '
+                                 'rowid NOT IN (SELECT id_param '
+                                 'FROM memberdef_params)' % _sql_ids(params))
+                for table in ('memberdef', 'compounddef', 'docblocks'):
+                    conn.execute('DELETE FROM %s WHERE id_file=?' % table,
+                                 (id_file,))
+                conn.execute('DELETE FROM files WHERE rowid=?', (id_file,))
+
     def get_doc_blocks(self, file_id):
         """Get doc blocks for the given file.
 
@@ -627,6 +1102,7 @@ class ContentDb:
         Yields:
             :class:`DocBlock` instances.
         """
+        self.flush()
         res = self.conn.execute("""
         SELECT rowid, refid, type, id_file, start_line, start_col,
         end_line, end_col, docstring FROM docblocks WHERE id_file=?
@@ -634,3 +1110,80 @@ class ContentDb:
 
         for row in res:
             yield DocBlock(*row, None)
+
+
+class IsolatedContentDb(ContentDb):
+    """Content DB which keeps doc block changes private.
+
+    Doc blocks are copied to a temporary table which shadows the original one
+    for this connection only. So saved doc blocks are visible to this instance
+    but the DB file itself is never modified and may be read by other
+    processes at the same time.
+
+    Changed doc blocks are collected by the :meth:`pop_changes`.
+    """
+
+    # Doc blocks are written immediately to get IDs of inserted ones.
+    write_chunk_size = 1
+
+    # Changes are written to the temporary table only.
+    temporary = True
+
+    def __init__(self, context, filename):
+        super(IsolatedContentDb, self).__init__(context, filename)
+        self._last_rowid = None
+        self._changes = {}
+
+    @property
+    def conn(self):
+        if self._conn is None:
+            conn = super(IsolatedContentDb, self).conn
+            conn.execute("""CREATE TEMP TABLE docblocks(
+            id INTEGER PRIMARY KEY, refid, type, id_file, start_line,
+            start_col, end_line, end_col, docstring, doc)
+            """)
+            conn.execute("""INSERT INTO temp.docblocks
+            SELECT rowid, refid, type, id_file, start_line, start_col,
+            end_line, end_col, docstring, doc FROM main.docblocks
+            """)
+            res = conn.execute('SELECT max(id) FROM temp.docblocks').fetchone()
+            self._last_rowid = res[0] or 0
+            self.create_indexes('temp', tables=('docblocks',))
+        return self._conn
+
+    def save_doc_block(self, definition):
+        super(IsolatedContentDb, self).save_doc_block(definition)
+        rowid = definition.doc_block.id
+        if rowid is None:
+            res = self.conn.execute('SELECT last_insert_rowid()').fetchone()
+            rowid = res[0]
+        self._changes[rowid] = None
+
+    def pop_changes(self):
+        """Get doc blocks changed since last call.
+
+        Doc blocks which are not present in the original DB have no ID.
+
+        Returns:
+            List of :class:`DocBlock` instances in order of first change.
+        """
+        if not self._changes:
+            return []
+
+        res = self.conn.execute("""
+        SELECT id, refid, type, id_file, start_line, start_col,
+        end_line, end_col, docstring FROM temp.docblocks WHERE id IN (%s)
+        """ % _sql_ids(self._changes))
+
+        rows = {x[0]: x for x in res}
+        changes = []
+        for rowid in self._changes:
+            row = rows[rowid]
+            doc = DocBlock(*row, None)
+            # Keep docstring as it's stored in the DB (text or bytes).
+            doc.docstring = row[-1]
+            if rowid > self._last_rowid:
+                doc.id = None
+            changes.append(doc)
+        self._changes = {}
+        return changes
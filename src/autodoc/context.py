@@ -12,7 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .contentdb import ContentDbBuilder, ContentDb
+import os.path as op
+from .contentdb import ContentDbBuilder, ContentDb, DefinitionType
 from .settings import SettingsSpec
 
 
@@ -26,6 +27,13 @@ class Context(SettingsSpec):
         super(Context, self).__init__()
         self.logger = logger
         self.settings = None
+        self.cache = None
+        self.document_cache = None
+        self.profiler = None
+        #: :class:`ChangedLines` to process only changed definitions.
+        self.changed_lines = None
+        #: :class:`MemoryGuard` to limit memory usage of the analysis.
+        self.memory_guard = None
         self.domains = {}
         self.settings_spec_nested = []
 
@@ -41,7 +49,8 @@ class Context(SettingsSpec):
         domain.context = self
         self.settings_spec_nested.append(domain)
 
-    def build_content_db(self, filename, paths, exclude, exclude_patterns, exe):
+    def build_content_db(self, filename, paths, exclude, exclude_patterns, exe,
+                         jobs=1):
         """Build content DB for the given paths.
 
         Args:
@@ -49,22 +58,34 @@ class Context(SettingsSpec):
             paths: Paths to process.
             exclude: List of paths to exclude.
             exclude_patterns: List of patterns to exclude.
-            exe: External executable to build content DB.
+            exe: External executable to build content DB. If ``'python'``
+                then in-process python builder is used.
+            jobs: Number of processes for the python builder.
 
         Returns:
             :class:`ContentDb` instance.
         """
-        db_builder = ContentDbBuilder(self, exe=exe)
+        if exe == 'python':
+            from .python.builder import PyContentDbBuilder
+            db_builder = PyContentDbBuilder(self, jobs=jobs)
+        else:
+            db_builder = ContentDbBuilder(self, exe=exe)
 
-        # Process files supported by registered domains only.
+        return db_builder.build(filename, paths, exclude=exclude,
+                                exclude_patterns=exclude_patterns,
+                                file_patterns=self.get_file_patterns())
+
+    def get_file_patterns(self):
+        """Get wildcard patterns of files supported by registered domains.
+
+        Returns:
+            List of patterns.
+        """
         file_patterns = []
         for domain in self.domains.values():
             if domain.extensions:
                 file_patterns.extend(['*' + x for x in domain.extensions])
-
-        return db_builder.build(filename, paths, exclude=exclude,
-                                exclude_patterns=exclude_patterns,
-                                file_patterns=file_patterns)
+        return file_patterns
 
     def get_content_db(self, filename):
         """Construct :class:`ContentDb` for the given filename.
@@ -77,34 +98,154 @@ class Context(SettingsSpec):
         """
         return ContentDb(self, filename)
 
-    def analyze(self, content_db):
+    def get_changed_files(self, content_db):
+        """Get files of the content DB which have changed lines.
+
+        Args:
+            content_db: :class:`ContentDb` instance.
+
+        Returns:
+            List of file IDs or ``None`` if :attr:`changed_lines` is not set.
+        """
+        if self.changed_lines is None:
+            return None
+        changed = self.changed_lines.get_files()
+        return [id for id, filename in content_db.get_files()
+                if op.realpath(filename) in changed]
+
+    def get_changed_refids(self, content_db, files):
+        """Get definitions which intersect :attr:`changed_lines`.
+
+        Args:
+            content_db: :class:`ContentDb` instance.
+            files: List of file IDs to get definitions from.
+
+        Returns:
+            Set of definitions reference IDs.
+        """
+        return {x.refid for x in content_db.get_definitions(files=files)
+                if self.changed_lines.match(x)}
+
+    def analyze(self, content_db, jobs=1, files=None):
         """Analyse given content DB.
 
+        If :attr:`changed_lines` is set then only definitions intersecting
+        changed lines are analyzed.
+
+        Args:
+            content_db: :class:`ContentDb` instance.
+            jobs: Number of processes to use. Zero means number of CPUs.
+                In-memory DB is always processed in the current process.
+            files: List of file IDs to analyze. If not set then all files
+                are analyzed.
+        """
+        if files is None:
+            files = self.get_changed_files(content_db)
+        if self.changed_lines is not None and content_db.saved_refids is None:
+            # Doc blocks may be saved for unchanged definitions too (like
+            # class docstring moved to the constructor), sync_sources()
+            # uses this set to write them back.
+            content_db.saved_refids = set()
+        if jobs == 1 or content_db.in_memory:
+            self.process_definitions(content_db,
+                                     content_db.get_definitions(files=files))
+        else:
+            from .parallel import analyze_parallel
+            analyze_parallel(self, content_db, jobs, files=files)
+
+    def process_definitions(self, content_db, definitions):
+        """Process given definitions.
+
         Args:
             content_db: :class:`ContentDb` instance.
+            definitions: Iterable of :class:`Definition` instances.
         """
-        for definition in content_db.get_definitions():
+        changed_lines = self.changed_lines
+        memory_guard = self.memory_guard
+        # IDs of processed classes, compounds go before their members.
+        classes = set()
+        for definition in definitions:
+            if changed_lines is not None and not self._is_changed(
+                    content_db, definition, classes):
+                continue
             domain = self.domains.get(definition.language)
             if domain is not None:
                 with self.settings.with_settings(domain.settings_section):
                     domain.process_definition(content_db, definition)
+            if memory_guard is not None:
+                memory_guard.check(content_db)
+
+    def _is_changed(self, content_db, definition, classes):
+        """Check if given definition intersects :attr:`changed_lines`.
+
+        Class and its constructor are processed together since their
+        docstrings may be merged (see ``py.class_docstring_level``).
 
-    def sync_sources(self, content_db, out_filename=None):
+        Args:
+            content_db: :class:`ContentDb` instance.
+            definition: :class:`Definition` instance.
+            classes: Set of IDs of already matched classes, updated in place.
+
+        Returns:
+            ``True`` if definition must be processed.
+        """
+        match = self.changed_lines.match
+        if definition.type is DefinitionType.CLASS:
+            if not match(definition):
+                constructor = content_db.get_constructor(definition.id)
+                if constructor is None or not match(constructor):
+                    return False
+            classes.add(definition.id)
+            return True
+        if definition.name == '__init__' and definition.compound_id in classes:
+            return True
+        return match(definition)
+
+    def sync_sources(self, content_db, out_filename=None, jobs=1,
+                     fsync=False, writer=None, files=None):
         """Sync sources with content in the given DB.
 
         Args:
             content_db: Content DB instance.
             out_filename: Output filename. Ignored if there are multiple files
                 to sync.
+            jobs: Number of processes to write files with. Zero means number
+                of CPUs.
+            fsync: Flush written files to the disk before replacing sources.
+            writer: Object to pass patched files to instead of
+                :class:`FileWriter`. It must have ``submit(patcher, filename)``
+                and ``close()`` methods, ``jobs`` and ``fsync`` are ignored.
+            files: List of file IDs to sync. If not set then all files are
+                synced (or only changed ones if :attr:`changed_lines` is set).
+
+        Returns:
+            :class:`FileWriter` with statistics or given ``writer``.
         """
+        refids = None
+        if files is None and self.changed_lines is not None:
+            files = self.get_changed_files(content_db)
+            # Other doc blocks are kept as is.
+            refids = content_db.saved_refids
+            if refids is None:
+                refids = self.get_changed_refids(content_db, files)
+
         # If there are multiple files to sync then ignore this filename.
         # NOTE: temporary disabled until better SQL query.
         # if out_filename:
         #     if content_db.get_files_count():
         #         out_filename = None
 
-        for lang in content_db.get_languages():
-            domain = self.domains.get(lang)
-            if domain is not None:
-                with self.settings.with_settings(domain.settings_section):
-                    domain.sync_sources(content_db, out_filename)
+        if writer is None:
+            from .sync import FileWriter
+            writer = FileWriter(self.logger, jobs, fsync=fsync)
+        try:
+            for lang in content_db.get_languages():
+                domain = self.domains.get(lang)
+                if domain is not None:
+                    with self.settings.with_settings(domain.settings_section):
+                        domain.sync_sources(content_db, out_filename,
+                                            writer=writer, files=files,
+                                            refids=refids)
+        finally:
+            writer.close()
+        return writer
@@ -0,0 +1,246 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements diff-scoped processing.
+
+Changed lines are collected from a unified diff (``git diff`` output) or
+from explicit ``file:start-end`` ranges. Only definitions which line ranges
+intersect changed lines are analyzed, so processing cost depends on the diff
+size instead of the whole source tree.
+"""
+import os.path as op
+import re
+from bisect import bisect_left
+from .errors import AutodocError
+from .contentdb import DefinitionType
+
+_hunk_re = re.compile(r'^@@ -\d+(?:,(\d+))? \+(\d+)(?:,(\d+))? @@')
+
+
+class ChangedLines:
+    """Changed line ranges of files.
+
+    Filenames are normalized to absolute real paths, relative filenames are
+    resolved against the given root.
+
+    Args:
+        root: Base directory of relative filenames. Current directory is
+            used by default.
+    """
+    def __init__(self, root=None):
+        self.root = op.abspath(root or '.')
+        #: Dict ``{filename: [(start, end), ...]}``, ranges are sorted,
+        #: merged and inclusive.
+        self.files = {}
+        # Cache of range ends for bisect: {filename: [end, ...]}.
+        self._ends = {}
+        # Cache of normalized filenames of definitions.
+        self._names = {}
+
+    def __len__(self):
+        return len(self.files)
+
+    def _normalize(self, filename):
+        name = self._names.get(filename)
+        if name is None:
+            name = op.realpath(op.join(self.root, filename))
+            self._names[filename] = name
+        return name
+
+    def add(self, filename, start, end):
+        """Add changed lines.
+
+        Args:
+            filename: Filename.
+            start: First line (1-based).
+            end: Last line (inclusive).
+        """
+        if end < start:
+            raise ValueError('Invalid lines range: %d-%d' % (start, end))
+        filename = self._normalize(filename)
+        ranges = self.files.setdefault(filename, [])
+        ranges.append((start, end))
+        ranges.sort()
+
+        # Merge overlapping and adjacent ranges.
+        merged = [ranges[0]]
+        for start, end in ranges[1:]:
+            last_start, last_end = merged[-1]
+            if start <= last_end + 1:
+                merged[-1] = (last_start, max(last_end, end))
+            else:
+                merged.append((start, end))
+        self.files[filename] = merged
+        self._ends[filename] = [x[1] for x in merged]
+
+    def add_range(self, value):
+        """Add changed lines from the ``file:start-end`` or ``file:line``
+        string.
+
+        Args:
+            value: Lines range string.
+        """
+        filename, sep, lines = value.rpartition(':')
+        if not sep or not filename:
+            raise ValueError('Invalid lines range: %s' % value)
+        start, sep, end = lines.partition('-')
+        try:
+            start = int(start)
+            end = int(end) if sep else start
+        except ValueError:
+            raise ValueError('Invalid lines range: %s' % value)
+        self.add(filename, start, end)
+
+    def add_diff(self, lines, root=None):
+        """Add changed lines from the unified diff.
+
+        Only new (``+++``) side of the diff is used. Deleted files are
+        skipped, pure deletions mark lines around the deleted block.
+
+        Args:
+            lines: Iterable of the diff lines.
+            root: Base directory of the diff filenames. If not set then
+                :attr:`root` is used.
+        """
+        filename = None
+        # Number of old and new lines left in the current hunk, hunk lines
+        # may look like headers ('+++ ' is added '++ ' line).
+        old_left = new_left = 0
+        for line in lines:
+            if old_left > 0 or new_left > 0:
+                if line.startswith('+'):
+                    new_left -= 1
+                    continue
+                elif line.startswith('-'):
+                    old_left -= 1
+                    continue
+                elif line.startswith(' '):
+                    old_left -= 1
+                    new_left -= 1
+                    continue
+                elif line.startswith('\\'):
+                    # '\ No newline at end of file'.
+                    continue
+                # Truncated hunk, process the line as a header.
+                old_left = new_left = 0
+
+            if line.startswith('+++ '):
+                filename = line[4:].rstrip('\r\n').split('\t')[0]
+                if filename == '/dev/null':
+                    filename = None
+                elif filename.startswith('b/'):
+                    filename = filename[2:]
+                if filename is not None and root is not None:
+                    filename = op.join(root, filename)
+                continue
+
+            if not line.startswith('@@'):
+                continue
+            match = _hunk_re.match(line)
+            if match is None:
+                continue
+            old_count, start, count = match.groups()
+            old_left = 1 if old_count is None else int(old_count)
+            start = int(start)
+            count = 1 if count is None else int(count)
+            new_left = count
+            if filename is None:
+                continue
+            if count:
+                self.add(filename, start, start + count - 1)
+            else:
+                # Lines are removed after the 'start' line.
+                self.add(filename, max(start, 1), start + 1)
+
+    def get_files(self):
+        """Get changed files.
+
+        Returns:
+            Set of normalized filenames.
+        """
+        return set(self.files)
+
+    def intersects(self, filename, start, end):
+        """Check if the given lines range of the file is changed.
+
+        Args:
+            filename: Normalized filename.
+            start: First line.
+            end: Last line (inclusive).
+
+        Returns:
+            ``True`` if at least one line in the range is changed.
+        """
+        ends = self._ends.get(filename)
+        if not ends:
+            return False
+        index = bisect_left(ends, start)
+        return index < len(ends) and self.files[filename][index][0] <= end
+
+    def match(self, definition):
+        """Check if the given definition is changed.
+
+        Definition range is from its first line (or docstring start) to the
+        end of its body (or docstring end). Compound definitions have no body
+        range, so they are matched by their header and docstring lines.
+
+        Args:
+            definition: :class:`Definition` instance.
+
+        Returns:
+            ``True`` if definition intersects changed lines.
+        """
+        doc = definition.doc_block
+        lines = [definition.start_line, doc.start_line, doc.end_line]
+        if definition.type == DefinitionType.MEMBER:
+            lines.extend((definition.bodystart, definition.bodyend))
+        lines = [x for x in lines if x is not None and x > 0]
+        if not lines:
+            return False
+        return self.intersects(self._normalize(definition.filename),
+                               min(lines), max(lines))
+
+
+def get_git_diff(ref, cwd=None):
+    """Get changes since the given git revision.
+
+    Args:
+        ref: Git revision to compare the working tree with.
+        cwd: Directory inside the git repository.
+
+    Returns:
+        Tuple ``(root, diff)`` where ``root`` is the repository top level
+        directory and ``diff`` is a list of the diff lines.
+    """
+    import subprocess
+
+    def git(*args):
+        try:
+            proc = subprocess.run(('git',) + args, cwd=cwd,
+                                  stdout=subprocess.PIPE,
+                                  stderr=subprocess.PIPE,
+                                  universal_newlines=True)
+        except OSError as e:
+            raise AutodocError('Failed to run git: %s' % e)
+        if proc.returncode:
+            raise AutodocError('git %s failed: %s'
+                               % (args[0], proc.stderr.strip()))
+        return proc.stdout
+
+    root = git('rev-parse', '--show-toplevel').strip()
+    # Explicit prefixes override 'diff.noprefix' and 'diff.mnemonicPrefix'.
+    diff = git('diff', '-U0', '--no-color', '--no-ext-diff',
+               '--src-prefix=a/', '--dst-prefix=b/', ref, '--')
+    return root, diff.splitlines()
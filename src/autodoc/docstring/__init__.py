@@ -12,7 +12,3 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from . import directives, roles
-
-roles.init()
-directives.init()
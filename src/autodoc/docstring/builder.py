@@ -12,14 +12,29 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 from docutils.frontend import OptionParser
 from docutils.parsers.rst import Parser
+from docutils.transforms import Transformer
+from docutils.utils import new_reporter
 from .reader import TextReader
+from . import directives, roles
+
+# Register custom roles and directives in the docutils parser.
+# It's done here and not in the package since loading of the parser is slow
+# and is only required to build documents.
+roles.init()
+directives.init()
 
 
 class DocumentBuilder:
     """This class builds docutils document using source reader and parser.
 
+    Building docutils settings is expensive, so reader, parser and settings
+    are created once per ``(reader class, parser class)`` pair and shared by
+    all builders (if reader and parser are not passed explicitly).
+    Shared settings must not be modified.
+
     Args:
         reader: Reader instance.
         parser: Parser instance.
@@ -27,8 +42,17 @@ class DocumentBuilder:
         parser_cls: Parser class.
         styles: List of :class:`DocstringStyle` instances. They used to
             pre-process input docstring text before converting to document.
+
+    If ``env`` has ``document_cache`` (:class:`DocumentCache`) then parsed
+    documents are taken from the cache if possible.
     """
 
+    #: Shared components: ``{(reader_cls, parser_cls): (reader, parser)}``.
+    _components_cache = {}
+
+    #: Shared settings: ``{(reader_cls, parser_cls): settings}``.
+    _settings_cache = {}
+
     def __init__(self, env, reader=None, parser=None, reader_cls=None,
                  parser_cls=None):
         self.env = env
@@ -36,8 +60,23 @@ class DocumentBuilder:
         self.parser_cls = parser_cls or Parser
         self.reader = reader
         self.parser = parser
-        self.setup_reader_and_parser()
-        self.doc_settings = self._get_document_settings()
+
+        if reader is None and parser is None:
+            key = (self.reader_cls, self.parser_cls)
+            components = self._components_cache.get(key)
+            if components is None:
+                self.setup_reader_and_parser()
+                self._components_cache[key] = (self.reader, self.parser)
+            else:
+                self.reader, self.parser = components
+        else:
+            self.setup_reader_and_parser()
+
+        key = (type(self.reader), type(self.parser))
+        self.doc_settings = self._settings_cache.get(key)
+        if self.doc_settings is None:
+            self.doc_settings = self._get_document_settings()
+            self._settings_cache[key] = self.doc_settings
 
     def setup_reader_and_parser(self):
         """Create reader and parser instances if required."""
@@ -58,11 +97,86 @@ class DocumentBuilder:
         return opt_parser.get_default_values()
 
     def parse(self, text, definition):
+        cache = self.env.get('document_cache')
+        if cache is None:
+            return self._parse(text, definition)
+
+        key = cache.get_key(text, self)
+        if key in cache:
+            return self.load_document(cache[key], definition)
+
+        # Collect parser messages to report them again on cache hits.
+        messages = []
+        self.reader.observers = [messages.append]
+        try:
+            document = self._parse(text, definition)
+        finally:
+            self.reader.observers = []
+        cache[key] = self.dump_document(document, messages)
+        return document
+
+    def _parse(self, text, definition):
         # This 'env' will be attached to result document.
         self.reader.env = self.env
-        document = self.reader.read(text, self.parser, self.doc_settings,
-                                    source_path=definition.filename,
-                                    encoding=self.env.get('input_encoding'))
+        try:
+            document = self.reader.read(
+                text, self.parser, self.doc_settings,
+                source_path=definition.filename,
+                encoding=self.env.get('input_encoding'))
+        finally:
+            # Shared reader must not keep the last document and env alive.
+            self.reader.env = None
+            self.reader.document = None
+        return document
+
+    def dump_document(self, document, messages):
+        """Serialize document tree.
+
+        Reporter, transformer, settings and env are not serialized, they are
+        restored by :meth:`load_document`.
+
+        Args:
+            document: Document tree.
+            messages: List of parser's ``system_message`` nodes.
+
+        Returns:
+            bytes: Serialized document.
+        """
+        names = ('reporter', 'transformer', 'settings', 'env')
+        state = [getattr(document, x, None) for x in names]
+        for name in names:
+            setattr(document, name, None)
+        try:
+            return pickle.dumps((document, messages), pickle.HIGHEST_PROTOCOL)
+        finally:
+            for name, value in zip(names, state):
+                setattr(document, name, value)
+
+    def load_document(self, data, definition):
+        """Load document tree serialized by :meth:`dump_document`.
+
+        Stored parser messages are reported again.
+
+        Args:
+            data: Serialized document.
+            definition: Definition the document is loaded for.
+
+        Returns:
+            Document tree.
+        """
+        document, messages = pickle.loads(data)
+        document['source'] = document.current_source = definition.filename
+        document.settings = self.doc_settings
+        document.reporter = new_reporter(definition.filename,
+                                         self.doc_settings)
+        document.transformer = Transformer(document)
+        document.env = self.env
+
+        reporter = self.env['reporter']
+        if reporter is not None:
+            document.reporter.attach_observer(reporter.document_message)
+            for msg in messages:
+                reporter.document_message(msg)
         return document
 
     def get_document(self):
@@ -21,17 +21,22 @@ class Reader(_Reader):
     def __init__(self, parser=None, parser_name=None):
         super(Reader, self).__init__(parser=parser, parser_name=parser_name)
         self.env = None
+        #: Extra observers to attach to the document's reporter.
+        self.observers = []
 
     def new_document(self):
         document = super(Reader, self).new_document()
         if self.env is not None and self.env['reporter'] is not None:
             document.reporter.attach_observer(
                 self.env['reporter'].document_message)
+        for observer in self.observers:
+            document.reporter.attach_observer(observer)
         document.env = self.env
         return document
 
     def clear(self):
         self.env = None
+        self.observers = []
 
 
 class TextReader(Reader):
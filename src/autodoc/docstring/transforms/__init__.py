@@ -11,3 +11,65 @@
 # WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 # See the License for the specific language governing permissions and
 # limitations under the License.
+
+from docutils.transforms import Transformer
+
+
+class TransformPipeline:
+    """Compiled sequence of document transforms.
+
+    :class:`docutils.transforms.Transformer` computes priorities and sorts
+    transforms for every document. Pipeline orders transforms once, the same
+    way as the transformer does, and then applies them directly on
+    documents.
+
+    Args:
+        transforms: List of transform classes.
+    """
+    def __init__(self, transforms):
+        transformer = Transformer(None)
+        transformer.add_transforms(transforms)
+        #: List of ``(transform class, kwargs)`` in the order of applying.
+        self.steps = [(x[1], x[3]) for x in sorted(transformer.transforms)]
+
+    def __len__(self):
+        return len(self.steps)
+
+    def apply(self, document, profiler=None):
+        """Apply transforms on the given document.
+
+        Args:
+            document: Document tree.
+            profiler: :class:`Profiler` instance to measure every transform.
+        """
+        document.reporter.attach_observer(document.note_transform_message)
+        if profiler is None:
+            for transform_class, kwargs in self.steps:
+                transform_class(document).apply(**kwargs)
+        else:
+            for transform_class, kwargs in self.steps:
+                with profiler.measure(transform_class.__name__,
+                                      transform=True):
+                    transform_class(document).apply(**kwargs)
+
+
+# Compiled pipelines: {tuple of transforms: TransformPipeline}.
+_pipelines = {}
+
+
+def get_transform_pipeline(transforms):
+    """Get compiled pipeline for the given transforms.
+
+    Pipelines are built once per unique sequence of transforms.
+
+    Args:
+        transforms: Sequence of transform classes.
+
+    Returns:
+        :class:`TransformPipeline` instance.
+    """
+    key = tuple(transforms)
+    pipeline = _pipelines.get(key)
+    if pipeline is None:
+        pipeline = _pipelines[key] = TransformPipeline(key)
+    return pipeline
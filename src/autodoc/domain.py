@@ -12,6 +12,7 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+from .errors import AutodocError
 from .report import DomainReporter
 from .settings import SettingsSpec
 from .task import SkipProcessing
@@ -28,7 +29,8 @@ class LanguageDomain(SettingsSpec):
     extensions = None
 
     settings_spec = (
-        ('Input docstring style.', 'instyle', 'all'),
+        ('Input docstring style name or "all" to detect any style.',
+         'instyle', 'all'),
 
         ('Docstring width.', 'line_width', 80, (None, int)),
         ('Default indentation for nested constructions.', 'indent', 4),
@@ -72,11 +74,18 @@ class LanguageDomain(SettingsSpec):
 
     docstring_styles = None
     definition_handler_task = None
+
+    #: Member definition class (subclass of the
+    #: :class:`BaseMemberDefinition`). :class:`MemberDefinition` is used if
+    #: not set.
+    member_definition_cls = None
     file_sync_task = None
 
     def __init__(self):
         self.reporter = DomainReporter(self)
         self.context = None
+        # Reusable tasks: {name: (task, env)}.
+        self._tasks = {}
 
         lst = self.docstring_styles or []
         self._styles = [x(self) for x in lst]
@@ -111,20 +120,45 @@ class LanguageDomain(SettingsSpec):
         """
         return self._styles_map.get(name)
 
-    def create_env(self, **kwargs):
+    def get_docstring_transforms(self, instyle):
+        """Get transforms to apply on input docstrings.
+
+        Args:
+            instyle: Input docstring style name or ``'all'``.
+
+        Returns:
+            List of functions ``(text, env) -> text``.
+
+        Raises:
+            AutodocError: If style is unknown.
+        """
+        if instyle == 'all':
+            return self._styles_transforms
+        style = self.get_style(instyle)
+        if style is None:
+            raise AutodocError('Unknown input style: %s' % instyle)
+        return [style.transform_docstring]
+
+    def create_env(self, env=None, **kwargs):
         """Create task environment dict.
 
         Args:
+            env: Dict to reuse. Its previous content is removed.
             **kwargs: Extra env vars.
 
         Returns:
             Task environment dict.
         """
-        env = {
-            'db': kwargs.pop('content_db'),
-            'reporter': self.reporter,
-            'settings': self.settings,
-        }
+        if env is None:
+            env = {}
+        else:
+            env.clear()
+        env['db'] = kwargs.pop('content_db')
+        env['reporter'] = self.reporter
+        env['settings'] = self.settings
+        env['cache'] = self.context.cache
+        env['document_cache'] = self.context.document_cache
+        env['profiler'] = self.context.profiler
         env.update(kwargs)
         return env
 
@@ -147,18 +181,29 @@ class LanguageDomain(SettingsSpec):
     def run_task(self, name, **kwargs):
         """Run task.
 
+        Task instance and its env dict are reused by the next run with the
+        same name, so there is no allocation per definition.
+
         Args:
             name: Task name.
             **kwargs: Task environment.
         """
-        env = self.create_env(**kwargs)
+        # Nested runs don't find pooled task and create a new one.
+        task, env = self._tasks.pop(name, (None, None))
+        env = self.create_env(env, **kwargs)
+        if task is None:
+            task = self.create_task(name, env)
+        else:
+            task.reset(env)
         self.reporter.env = env
-        task = self.create_task(name, env)
         try:
             task.run()
         except SkipProcessing:
             pass
         self.reporter.reset()
+        # Don't keep definition and DB alive until the next run.
+        env.clear()
+        self._tasks[name] = (task, env)
 
     def process_definition(self, content_db, definition):
         """Process given definition (class, function, method etc).
@@ -172,17 +217,29 @@ class LanguageDomain(SettingsSpec):
                           report_filename=definition.filename,
                           definition=definition)
 
-    def sync_sources(self, content_db, out_filename=None):
+    def sync_sources(self, content_db, out_filename=None, writer=None,
+                     files=None, refids=None):
         """Sync sources with content in the given DB.
 
         Args:
             content_db: :class:`ContentDb` instance.
             out_filename: Output filename (set if there is only one file to
                 sync).
+            writer: :class:`FileWriter` to write files with. If not set then
+                files are written by the sync tasks.
+            files: List of file IDs to sync. If not set then all domain's
+                files are synced.
+            refids: Set of definitions reference IDs which doc blocks to
+                sync. If not set then all doc blocks are synced.
         """
+        if files is not None:
+            files = set(files)
         with self.settings.from_key('style'):
             for id, filename in content_db.get_domain_files(self):
+                if files is not None and id not in files:
+                    continue
                 self.run_task('file_sync_task', content_db=content_db,
                               report_filename=filename,
                               file_id=id, filename=filename,
-                              out_filename=out_filename)
+                              out_filename=out_filename, writer=writer,
+                              refids=refids)
@@ -0,0 +1,89 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements memory usage guard for the analysis.
+"""
+import os
+import gc
+from .errors import AutodocError
+
+
+def get_memory_usage():
+    """Get memory used by the current process.
+
+    Resident set size is used on Linux, on other platforms it's the peak
+    resident set size.
+
+    Returns:
+        Number of bytes or ``None`` if it's not supported by the platform.
+    """
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        pass
+
+    try:
+        import resource
+    except ImportError:
+        return None
+    usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS - bytes.
+    return usage if os.uname().sysname == 'Darwin' else usage * 1024
+
+
+class MemoryGuard:
+    """This class stops processing if memory usage exceeds the limit.
+
+    If the limit is exceeded then buffered content DB changes are written
+    and garbage is collected. If memory usage is still above the limit then
+    :class:`AutodocError` is raised.
+
+    Args:
+        limit: Max memory usage in bytes.
+        interval: Number of definitions between checks.
+    """
+    def __init__(self, limit, interval=100):
+        self.limit = limit
+        self.interval = interval
+        self._count = 0
+
+    def check(self, content_db):
+        """Check memory usage.
+
+        It's called after each processed definition, but the usage is
+        measured only every :attr:`interval` calls.
+
+        Args:
+            content_db: :class:`ContentDb` instance.
+
+        Raises:
+            AutodocError: If memory usage exceeds the limit.
+        """
+        self._count += 1
+        if self._count < self.interval:
+            return
+        self._count = 0
+
+        usage = get_memory_usage()
+        if usage is None or usage <= self.limit:
+            return
+
+        content_db.flush()
+        gc.collect()
+        usage = get_memory_usage()
+        if usage > self.limit:
+            raise AutodocError('Memory limit exceeded: %d MB used, limit is '
+                               '%d MB' % (usage >> 20, self.limit >> 20))
@@ -0,0 +1,206 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements multi-process analysis of the content DB.
+
+Definitions are sharded by files and processed by a pool of workers. Each
+worker has its own context with language domains and works with an isolated
+content DB, so the DB file is not modified by workers. Changed doc blocks and
+log messages are sent back to the parent process which saves them in a
+single batch.
+"""
+import os
+import logging
+import multiprocessing
+from .context import Context
+from .contentdb import IsolatedContentDb
+from .report import BufferHandler
+from .profiler import Profiler
+
+
+class AnalyzeWorker:
+    """This class processes definitions in a worker process.
+
+    Args:
+        domain_classes: List of language domain classes to register.
+        settings: Processing settings.
+        cache: :class:`DocstringCache` instance or ``None``.
+        document_cache: :class:`DocumentCache` instance or ``None``.
+        profiler: :class:`Profiler` instance or ``None``.
+        changed_lines: :class:`ChangedLines` instance or ``None``.
+        memory_guard: :class:`MemoryGuard` instance or ``None``.
+        filename: Content DB filename.
+        log_level: Logging level.
+    """
+    def __init__(self, domain_classes, settings, cache, document_cache,
+                 profiler, changed_lines, memory_guard, filename, log_level):
+        self.handler = BufferHandler()
+        logger = logging.getLogger('autodoc.worker')
+        logger.propagate = False
+        logger.setLevel(log_level)
+        logger.addHandler(self.handler)
+
+        self.context = Context(logger)
+        for domain_cls in domain_classes:
+            self.context.register(domain_cls())
+        self.context.settings = settings
+        self.context.cache = cache
+        self.context.document_cache = document_cache
+        self.context.profiler = profiler
+        self.context.changed_lines = changed_lines
+        self.context.memory_guard = memory_guard
+        self.db = IsolatedContentDb(self.context, filename)
+
+    def run(self, files):
+        """Process definitions from the given files.
+
+        Args:
+            files: List of file IDs.
+
+        Returns:
+            Tuple ``(doc_blocks, messages, cache, document_cache, profiler)``
+            where ``doc_blocks`` is a list of changed :class:`DocBlock`,
+            ``messages`` is a list of ``(level, message)`` log records
+            grouped by files in the given order,
+            ``cache`` and ``document_cache`` are changes of the caches (see
+            :meth:`DocstringCache.pop_changes`) or ``None``, ``profiler`` is
+            a :class:`Profiler` with timings of the given files or ``None``.
+        """
+        file_messages = {}
+        self.context.process_definitions(
+            self.db, self._iter_definitions(files, file_messages))
+        messages = file_messages.pop(None, [])
+        for id_file in files:
+            messages.extend(file_messages.pop(id_file, ()))
+        for records in file_messages.values():
+            messages.extend(records)
+
+        cache = self.context.cache
+        document_cache = self.context.document_cache
+        profiler = self.context.profiler
+        if profiler is not None:
+            self.context.profiler = Profiler(profiler.slowest)
+        return (self.db.pop_changes(), messages,
+                cache.pop_changes() if cache is not None else None,
+                document_cache.pop_changes() if document_cache is not None
+                else None,
+                profiler)
+
+
+    def _iter_definitions(self, files, file_messages):
+        """Get definitions of the given files.
+
+        Log records emitted while a definition is processed are collected
+        per file, since compounds of multiple files go before members.
+
+        Args:
+            files: List of file IDs.
+            file_messages: Dict ``{file ID: records}`` to collect log
+                records to.
+
+        Yields:
+            :class:`Definition` instances.
+        """
+        id_file = None
+        for definition in self.db.get_definitions(files=files):
+            records = self.handler.pop_records()
+            if records:
+                file_messages.setdefault(id_file, []).extend(records)
+            id_file = definition.id_file
+            yield definition
+        records = self.handler.pop_records()
+        if records:
+            file_messages.setdefault(id_file, []).extend(records)
+
+
+# Worker instance of the current process, see _init_worker().
+_worker = None
+
+
+def _init_worker(*args):
+    global _worker
+    _worker = AnalyzeWorker(*args)
+
+
+def _run_worker(files):
+    return _worker.run(files)
+
+
+def split(items, count):
+    """Split items to chunks.
+
+    Args:
+        items: List of items.
+        count: Max number of chunks.
+
+    Returns:
+        List of chunks (lists).
+    """
+    size = max(1, -(-len(items) // count))
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def analyze_parallel(context, content_db, jobs, files=None):
+    """Analyse given content DB using multiple processes.
+
+    Result is the same as for the :meth:`Context.analyze`. Reports of the
+    workers are buffered and logged in files order.
+
+    Args:
+        context: :class:`Context` instance.
+        content_db: :class:`ContentDb` instance.
+        jobs: Number of processes. If zero then number of CPUs is used.
+        files: List of file IDs to analyze. If not set then all files
+            are analyzed.
+    """
+    jobs = jobs or os.cpu_count() or 1
+    language_files = content_db.get_language_files(list(context.domains))
+    if files is not None:
+        files = set(files)
+        language_files = [x for x in language_files if x in files]
+    files = language_files
+
+    if jobs == 1 or len(files) < 2:
+        context.process_definitions(content_db,
+                                    content_db.get_definitions(files=files))
+        return
+
+    # Use more shards than processes to balance the load.
+    shards = split(files, jobs * 4)
+    jobs = min(jobs, len(shards))
+    domain_classes = [type(x) for x in context.domains.values()]
+    initargs = (domain_classes, context.settings, context.cache,
+                context.document_cache, context.profiler,
+                context.changed_lines, context.memory_guard,
+                content_db.filename, context.logger.getEffectiveLevel())
+
+    context.logger.debug('Analyzing %d files using %d processes',
+                         len(files), jobs)
+
+    doc_blocks = []
+    with multiprocessing.Pool(jobs, _init_worker, initargs) as pool:
+        for (changes, messages, cache, documents,
+             profiler) in pool.imap(_run_worker, shards):
+            doc_blocks.extend(changes)
+            if cache:
+                context.cache.merge(cache)
+            if documents:
+                context.document_cache.merge(documents)
+            if profiler is not None:
+                context.profiler.merge(profiler)
+            for level, msg in messages:
+                context.logger.log(level, msg)
+
+    content_db.save_doc_blocks(doc_blocks)
@@ -15,7 +15,13 @@
 """
 This module implements simple patching feature.
 """
-from docutils.io import FileInput, FileOutput
+import os
+import os.path as op
+import shutil
+import tempfile
+import tokenize
+from itertools import chain, islice
+from .errors import AutodocError
 from .utils import as_lines, get_indent
 
 
@@ -44,6 +50,11 @@ class Patch:
         self.end_col = end_col
 
 
+class PatchError(AutodocError):
+    """Patch error."""
+    pass
+
+
 class LinePatcher:
     """This class applies list of patched on original content.
 
@@ -52,6 +63,10 @@ class LinePatcher:
 
     If a patch inserts content in the middle of a line then the line is
     split into two lines and the content inserts between them.
+
+    Patches are applied in a single pass: unchanged line ranges and patch
+    content are copied to the result in order of positions, so patching
+    time is linear to the content size.
     """
     def __init__(self, insert_after=True):
         """Construct patcher.
@@ -62,6 +77,8 @@ class LinePatcher:
         self._patches = []
         self._sorted = False
         self._insert_after = insert_after
+        #: ``True`` if last patching changed the content.
+        self.modified = False
 
     def _sort_patches(self):
         """Sort patches in reverse order based on start positions."""
@@ -77,92 +94,169 @@ class LinePatcher:
         self._patches.append(patch)
         self._sorted = False
 
-    # NOTE: positions in patch are 1-based.
-    def patch(self, content):
-        """Patch given ``content``.
+    @staticmethod
+    def _indent(lines, indent):
+        if indent and lines is not None:
+            offset = ' ' * indent
+            return [(offset + x if x else x) for x in lines]
+        return lines
+
+    def _get_replacement(self, region, patch):
+        """Build lines to replace patch region with.
 
         Args:
-            content: String or list of strings.
+            region: Original lines from ``start_line`` to ``end_line``.
+            patch: :class:`Patch` instance.
 
         Returns:
-            Patched list of strings.
+            List of strings.
         """
-        lines = as_lines(content)
+        col = patch.start_col - 1
+        to_insert = None
 
-        if not self._patches:
-            return lines
+        first = region[0]
+        first_part = first[:col]
+        first_indent = get_indent(first_part)
+
+        if first_part and len(first_part) != first_indent:
+            to_insert = [first_part]
+            indent = first_indent
+        else:
+            indent = col
+
+        patch_lines = self._indent(patch.lines, indent)
+
+        if to_insert:
+            if patch_lines is not None:
+                to_insert.extend(patch_lines)
+        else:
+            to_insert = list(patch_lines) if patch_lines is not None else []
+
+        last = region[-1]
+        last_part = last[patch.end_col - 1:]
+        if last_part and not last_part.isspace():
+            if first_indent:
+                last_part = ' ' * first_indent + last_part
+            to_insert.append(last_part)
+
+        return to_insert
+
+    # NOTE: positions in patch are 1-based.
+    def iter_patch(self, lines):
+        """Patch given lines lazily.
+
+        Only lines of the currently applied patch are kept in memory, so
+        ``lines`` may be a file stream. After the result is consumed
+        :attr:`modified` shows if content is changed.
+
+        Args:
+            lines: Iterable of strings.
+
+        Yields:
+            Iterables of result lines.
+
+        Raises:
+            PatchError: If patches overlap or out of the content.
+        """
         if not self._sorted:
             self._sort_patches()
 
-        for patch in self._patches:
+        self.modified = False
+        lines = iter(lines)
+        # Number of consumed original lines.
+        pos = 0
+
+        # Patches are sorted in reverse order, for the same start line
+        # last added patch goes first.
+        for patch in reversed(self._patches):
             # Insert lines.
             if patch.end_line is None:
                 assert patch.lines is not None
-                indent = patch.start_col - 1
-                if indent:
-                    offset = ' ' * indent
-                    patch_lines = [(offset + x if x else x) for x in patch.lines]
-                else:
-                    patch_lines = patch.lines
-                pos = patch.start_line
+                start = patch.start_line
                 if not self._insert_after:
-                    pos -= 1
-                lines[pos:pos] = patch_lines
-                continue
-
-            col = patch.start_col - 1
-            start = patch.start_line - 1
-            end = patch.end_line
-            to_insert = None
-
-            first = lines[start]
-            first_part = first[:col]
-            first_indent = get_indent(first_part)
-
-            if first_part and len(first_part) != first_indent:
-                to_insert = [first_part]
-                indent = first_indent
+                    start -= 1
             else:
-                indent = col
+                start = patch.start_line - 1
 
-            if indent and patch.lines is not None:
-                offset = ' ' * indent
-                patch_lines = [(offset + x if x else x) for x in patch.lines]
-            else:
-                patch_lines = patch.lines
+            if start < pos:
+                raise PatchError('Patch at line %d overlaps with previous one'
+                                 % patch.start_line)
 
-            if to_insert:
-                if patch_lines is not None:
-                    to_insert.extend(patch_lines)
-            else:
-                to_insert = patch_lines
-
-            last = lines[end - 1]
-            last_part = last[patch.end_col - 1:]
-            if last_part and not last_part.isspace():
-                if first_indent:
-                    last_part = ' ' * first_indent + last_part
-                if to_insert is not None:
-                    to_insert.append(last_part)
-                else:
-                    to_insert = [last_part]
-
-            if to_insert is not None:
-                lines[start:end] = to_insert
+            # NOTE: if content is shorter then insertions go to the end.
+            yield islice(lines, start - pos)
+            pos = start
+
+            if patch.end_line is None:
+                to_insert = self._indent(patch.lines, patch.start_col - 1)
+                if to_insert:
+                    self.modified = True
             else:
-                del lines[start:end]
+                region = list(islice(lines, patch.end_line - start))
+                pos += len(region)
+                if pos != patch.end_line:
+                    raise PatchError('Patch at line %d is out of the content'
+                                     % patch.start_line)
+                to_insert = self._get_replacement(region, patch)
+                if to_insert != region:
+                    self.modified = True
+            yield to_insert
+
+        yield lines
 
-        return lines
+    def patch(self, content):
+        """Patch given ``content``.
+
+        Args:
+            content: String or list of strings.
+
+        Returns:
+            Patched list of strings.
+
+        Raises:
+            PatchError: If patches overlap or out of the content.
+        """
+        lines = as_lines(content)
+
+        if not self._patches:
+            self.modified = False
+            return lines
+
+        return list(chain.from_iterable(self.iter_patch(lines)))
+
+
+def read_lines(stream):
+    """Read lines from the text stream without line endings.
+
+    Result is the same as for ``stream.read().split('\\n')``.
+
+    Args:
+        stream: Text stream.
+
+    Yields:
+        Lines.
+    """
+    for line in stream:
+        if not line.endswith('\n'):
+            yield line
+            return
+        yield line[:-1]
+    yield ''
 
 
 class FilePatcher:
-    """This class applies patches to a file."""
+    """This class applies patches to a file.
+
+    File is processed as a stream, patched content is written to a temporary
+    file which replaces the output file. So only lines of the currently
+    applied patch are kept in memory.
+    """
     def __init__(self, filename, encoding=None, insert_after=True):
         """Construct file patcher.
 
         Args:
             filename: Filename to patch.
-            encoding: File encoding.
+            encoding: File encoding. If not set then it's detected from BOM
+                or coding comment, UTF-8 is used by default.
             insert_after: Insert patch after the source line.
         """
         self._filename = filename
@@ -177,17 +271,86 @@ class FilePatcher:
         """
         self._patcher.add(patch)
 
+    def get_encoding(self):
+        """Get input file encoding."""
+        if self._encoding:
+            return self._encoding
+        with open(self._filename, 'rb') as f:
+            return tokenize.detect_encoding(f.readline)[0]
+
+    def get_content(self):
+        """Apply patches and return result.
+
+        Returns:
+            Patched file content.
+        """
+        with open(self._filename, encoding=self.get_encoding()) as f:
+            return '\n'.join(chain.from_iterable(
+                self._patcher.iter_patch(read_lines(f))))
+
+    def write(self, out_filename=None, fsync=False):
+        """Apply patches and write result to a temporary file.
+
+        Temporary file is created in the output file's directory, so it may be
+        atomically renamed to the output file.
+
+        Args:
+            out_filename: Output filename. If not set then input one is used.
+            fsync: Flush the temporary file to the disk before closing.
+
+        Returns:
+            Temporary filename or ``None`` if patches don't change the input
+            file and it's the output file.
+        """
+        out_filename = out_filename or self._filename
+        encoding = self.get_encoding()
+
+        fd, temp_filename = tempfile.mkstemp(
+            dir=op.dirname(op.abspath(out_filename)), prefix='.autodoc-',
+            suffix='.tmp')
+        try:
+            with open(self._filename, encoding=encoding) as in_, \
+                    open(fd, 'w', encoding=encoding) as out:
+                separator = ''
+                for chunk in self._patcher.iter_patch(read_lines(in_)):
+                    for line in chunk:
+                        out.write(separator)
+                        out.write(line)
+                        separator = '\n'
+                changed = (self._patcher.modified
+                           or out_filename != self._filename)
+                if fsync and changed:
+                    out.flush()
+                    os.fsync(out.fileno())
+
+            if not changed:
+                os.remove(temp_filename)
+                return None
+
+            mode_filename = (out_filename if op.exists(out_filename)
+                             else self._filename)
+            shutil.copymode(mode_filename, temp_filename)
+        except BaseException:
+            if op.exists(temp_filename):
+                os.remove(temp_filename)
+            raise
+        return temp_filename
+
     def patch(self, out_filename=None):
         """Apply patches and write changes to specified file.
 
+        Input file is not rewritten if patches don't change its content.
+        Output file is replaced atomically, so it's never left partially
+        written.
+
         Args:
             out_filename: Output filename. If not set then input one is used.
+
+        Returns:
+            ``True`` if the file is written.
         """
-        in_ = FileInput(source_path=self._filename, encoding=self._encoding)
-        content = in_.read()
-        content = self._patcher.patch(content)
-        content = '\n'.join(content)
-
-        out = FileOutput(destination_path=out_filename or self._filename,
-                         encoding=self._encoding)
-        out.write(content)
+        temp_filename = self.write(out_filename)
+        if temp_filename is None:
+            return False
+        os.replace(temp_filename, out_filename or self._filename)
+        return True
@@ -0,0 +1,305 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements timing of the definitions processing.
+
+:class:`Profiler` is passed to the definition handler tasks in the
+environment (``env['profiler']``). Tasks measure their stages and document
+transforms, and profiler aggregates timings per domain and style and keeps
+the slowest definitions.
+
+Stage timings are exclusive: time of a stage called from another one (like
+``apply_styles`` from ``build_document``) is not added to the outer stage.
+Transforms timings are a breakdown of the stages which apply them.
+"""
+import heapq
+import json
+from time import perf_counter
+
+
+class Histogram:
+    """Timings histogram with fixed buckets.
+
+    Attributes:
+        count: Number of measurements.
+        total: Sum of measurements in seconds.
+        max: Max measurement in seconds.
+        buckets: Number of measurements per bucket, see :attr:`bounds`.
+    """
+
+    #: Upper bounds of the buckets in seconds, last bucket is unbounded.
+    bounds = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025,
+              0.05, 0.1)
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.buckets = [0] * (len(self.bounds) + 1)
+
+    def add(self, value):
+        """Add measurement.
+
+        Args:
+            value: Time in seconds.
+        """
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+        for i, bound in enumerate(self.bounds):
+            if value < bound:
+                self.buckets[i] += 1
+                break
+        else:
+            self.buckets[-1] += 1
+
+    def merge(self, other):
+        """Add measurements of other histogram.
+
+        Args:
+            other: :class:`Histogram` instance.
+        """
+        self.count += other.count
+        self.total += other.total
+        self.max = max(self.max, other.max)
+        self.buckets = [a + b for a, b in zip(self.buckets, other.buckets)]
+
+    def to_dict(self):
+        labels = ['<%gms' % (x * 1000) for x in self.bounds]
+        labels.append('>=%gms' % (self.bounds[-1] * 1000))
+        return {
+            'count': self.count,
+            'total': self.total,
+            'mean': self.total / self.count if self.count else 0.0,
+            'max': self.max,
+            'histogram': dict(zip(labels, self.buckets)),
+        }
+
+
+class _Timer:
+    """Context manager to measure a stage, see :meth:`Profiler.measure`."""
+    __slots__ = ('profiler', 'name', 'transform', 'start')
+
+    def __init__(self, profiler, name, transform):
+        self.profiler = profiler
+        self.name = name
+        self.transform = transform
+
+    def __enter__(self):
+        if not self.transform:
+            self.profiler._nested.append(0.0)
+        self.start = self.profiler.timer()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        elapsed = self.profiler.timer() - self.start
+        if self.transform:
+            self.profiler.add(self.name, elapsed, True)
+            return
+        # Exclude time of the nested stages and add this one to the outer.
+        nested = self.profiler._nested
+        self.profiler.add(self.name, elapsed - nested.pop())
+        if nested:
+            nested[-1] += elapsed
+
+
+class Profiler:
+    """Definitions processing profiler.
+
+    Timings are aggregated per ``(domain, style)`` group: a histogram
+    for each handler stage, for each transform class and for the whole
+    definition processing.
+
+    Usage::
+
+        profiler.begin(domain.name, style, definition)
+        with profiler.measure('build_document'):
+            ...
+        profiler.end()
+
+    Args:
+        slowest: Number of the slowest definitions to keep.
+    """
+
+    #: Timer function.
+    timer = staticmethod(perf_counter)
+
+    #: Histogram name of the whole definition processing.
+    TOTAL = 'total'
+
+    def __init__(self, slowest=10):
+        self.slowest = slowest
+        #: Dict ``{(domain, style): {'stages': {}, 'transforms': {}}}``,
+        #: values are dicts of :class:`Histogram`.
+        self.groups = {}
+        # Min-heap of (time, filename, line, name) of the slowest definitions.
+        self._slowest = []
+        self._group = None
+        self._current = None
+        self._start = None
+        # Time of the nested stages per currently measured stage.
+        self._nested = []
+
+    def _get_group(self, key):
+        group = self.groups.get(key)
+        if group is None:
+            group = self.groups[key] = {'stages': {}, 'transforms': {}}
+        return group
+
+    def begin(self, domain, style, definition):
+        """Start measuring of the definition processing.
+
+        Args:
+            domain: Domain name.
+            style: Output style name.
+            definition: :class:`Definition` instance.
+        """
+        self._group = self._get_group((domain, style))
+        self._current = definition
+        self._start = self.timer()
+
+    def end(self):
+        """Finish measuring of the current definition."""
+        elapsed = self.timer() - self._start
+        self._add(self._group['stages'], self.TOTAL, elapsed)
+
+        definition = self._current
+        self._push_slowest((elapsed, definition.filename or '',
+                            definition.start_line or 0, definition.name))
+        self._group = None
+        self._current = None
+
+    def _push_slowest(self, item):
+        if len(self._slowest) < self.slowest:
+            heapq.heappush(self._slowest, item)
+        elif self._slowest and item > self._slowest[0]:
+            heapq.heapreplace(self._slowest, item)
+
+    @staticmethod
+    def _add(hists, name, value):
+        hist = hists.get(name)
+        if hist is None:
+            hist = hists[name] = Histogram()
+        hist.add(value)
+
+    def add(self, name, value, transform=False):
+        """Add stage timing of the current definition.
+
+        Args:
+            name: Stage name or transform class name.
+            value: Time in seconds.
+            transform: ``True`` if this is a transform timing.
+        """
+        if self._group is not None:
+            self._add(self._group['transforms' if transform else 'stages'],
+                      name, value)
+
+    def measure(self, name, transform=False):
+        """Create context manager which measures given stage.
+
+        Args:
+            name: Stage name or transform class name.
+            transform: ``True`` if this is a transform.
+
+        Returns:
+            Context manager.
+        """
+        return _Timer(self, name, transform)
+
+    def __getstate__(self):
+        # Don't pickle processing state.
+        state = self.__dict__.copy()
+        state['_group'] = state['_current'] = state['_start'] = None
+        state['_nested'] = []
+        return state
+
+    def merge(self, other):
+        """Add timings collected by other profiler.
+
+        It's used to collect results from the worker processes.
+
+        Args:
+            other: :class:`Profiler` instance.
+        """
+        for key, other_group in other.groups.items():
+            group = self._get_group(key)
+            for kind, hists in other_group.items():
+                for name, hist in hists.items():
+                    if name in group[kind]:
+                        group[kind][name].merge(hist)
+                    else:
+                        group[kind][name] = hist
+        for item in other._slowest:
+            self._push_slowest(item)
+
+    def get_slowest(self):
+        """Get the slowest definitions.
+
+        Returns:
+            List of tuples ``(time, filename, line, name)`` sorted from the
+            slowest one.
+        """
+        return sorted(self._slowest, reverse=True)
+
+    def to_dict(self):
+        """Get summary as a dict (suitable for JSON)."""
+        groups = []
+        for (domain, style), group in sorted(self.groups.items()):
+            data = {'domain': domain, 'style': style}
+            for kind, hists in sorted(group.items()):
+                data[kind] = {k: v.to_dict() for k, v in hists.items()}
+            groups.append(data)
+        slowest = [{'time': t, 'filename': f, 'line': l, 'name': n}
+                   for t, f, l, n in self.get_slowest()]
+        return {'groups': groups, 'slowest': slowest}
+
+    def report(self, stream):
+        """Write human readable summary.
+
+        Args:
+            stream: Output text stream.
+        """
+        row = '  %-32s %8d %10.2f %10.3f %10.3f\n'
+        for (domain, style), group in sorted(self.groups.items()):
+            stream.write('Domain: %s, style: %s\n' % (domain, style))
+            for kind in ('stages', 'transforms'):
+                hists = group[kind]
+                if not hists:
+                    continue
+                stream.write('  %-32s %8s %10s %10s %10s\n'
+                             % (kind.capitalize(), 'count', 'total ms',
+                                'mean ms', 'max ms'))
+                for name, hist in sorted(hists.items(),
+                                         key=lambda x: -x[1].total):
+                    stream.write(row % (name, hist.count, hist.total * 1000,
+                                        hist.total / hist.count * 1000,
+                                        hist.max * 1000))
+            stream.write('\n')
+
+        slowest = self.get_slowest()
+        if slowest:
+            stream.write('Slowest definitions:\n')
+            for elapsed, filename, line, name in slowest:
+                stream.write('  %10.3f ms  %s:%d %s\n'
+                             % (elapsed * 1000, filename, line, name))
+
+    def save(self, filename):
+        """Write summary to the JSON file.
+
+        Args:
+            filename: Output filename.
+        """
+        with open(filename, 'w') as f:
+            json.dump(self.to_dict(), f, indent=2, sort_keys=True)
@@ -0,0 +1,463 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements in-process content DB builder for python sources.
+
+It uses :mod:`ast` to find classes and functions and :mod:`tokenize` to get
+exact positions of docstrings, and fills the same tables as the external
+content DB builder does.
+"""
+import os
+import os.path as op
+import io
+import ast
+import fnmatch
+import bisect
+import sqlite3
+import tokenize
+import multiprocessing
+from ..contentdb import (
+    SCHEMA,
+    ContentDb,
+    ContentDbError,
+    DefinitionType,
+    CompoundType,
+    MemberType
+)
+
+
+class PyDefinition:
+    """Class or function found in the source file.
+
+    Positions are 1-based, docstring end column points to the character
+    after the closing quote.
+    """
+    __slots__ = ('name', 'is_class', 'line', 'column', 'bodystart', 'bodyend',
+                 'parent', 'args', 'is_static', 'doc')
+
+    def __init__(self, name, is_class, line, column, bodystart, bodyend,
+                 parent, args, is_static, doc):
+        self.name = name
+        self.is_class = is_class
+        self.line = line
+        self.column = column
+        self.bodystart = bodystart
+        self.bodyend = bodyend
+        #: Index of the parent class in the file definitions list or ``None``.
+        self.parent = parent
+        #: List of tuples ``(type, declname, defname)``.
+        self.args = args
+        self.is_static = is_static
+        #: Tuple ``(text, start_line, start_col, end_line, end_col)`` or
+        #: ``None``.
+        self.doc = doc
+
+
+def _get_args(node):
+    """Get function arguments in the content DB format.
+
+    Args:
+        node: Function node.
+
+    Returns:
+        List of tuples ``(type, declname, defname)``.
+    """
+    args = node.args
+    result = []
+    for arg in getattr(args, 'posonlyargs', []) + args.args:
+        result.append((None, arg.arg, arg.arg))
+    if args.vararg:
+        result.append(('*', args.vararg.arg, None))
+    for arg in args.kwonlyargs:
+        result.append((None, arg.arg, arg.arg))
+    if args.kwarg:
+        result.append(('**', args.kwarg.arg, None))
+    return result
+
+
+class SourceParser:
+    """This class extracts classes and functions from the python source.
+
+    Args:
+        source: Source text.
+    """
+    def __init__(self, source):
+        # NOTE: str.splitlines() also splits on form feed and other unicode
+        # line breaks, which are not line ends for the tokenizer and ast.
+        self.lines = source.split('\n')
+        self.tree = ast.parse(source)
+        self.tokens = list(tokenize.generate_tokens(
+            io.StringIO(source).readline))
+        self._token_rows = [x.start[0] for x in self.tokens]
+        self.definitions = []
+
+        # Start lines of all statements, used to find body end.
+        starts = set()
+        for node in ast.walk(self.tree):
+            if isinstance(node, ast.stmt):
+                line = node.lineno
+                for dec in getattr(node, 'decorator_list', ()):
+                    line = min(line, dec.lineno)
+                starts.add(line)
+        self._starts = sorted(starts)
+
+    def parse(self):
+        """Parse the source.
+
+        Returns:
+            List of :class:`PyDefinition`.
+        """
+        self._visit_body(self.tree, None)
+        return self.definitions
+
+    def _visit_body(self, node, parent):
+        for child in ast.iter_child_nodes(node):
+            if isinstance(child, ast.ClassDef):
+                self.definitions.append(self._create(child, parent, True))
+                self._visit_body(child, len(self.definitions) - 1)
+            elif isinstance(child, (ast.FunctionDef, ast.AsyncFunctionDef)):
+                # NOTE: nested functions are not collected.
+                self.definitions.append(self._create(child, parent, False))
+            elif isinstance(child, ast.stmt):
+                # Search in compound statements like 'if' or 'try'.
+                self._visit_body(child, parent)
+
+    def _find_token(self, line, names):
+        """Find index of the first NAME token from ``names`` starting from
+        the ``line``."""
+        start = bisect.bisect_left(self._token_rows, line)
+        for i in range(start, len(self.tokens)):
+            tok = self.tokens[i]
+            if tok.type == tokenize.NAME and tok.string in names:
+                return i
+
+    def _find_colon(self, index):
+        """Find header's colon token index starting from ``index``."""
+        depth = 0
+        for i in range(index, len(self.tokens)):
+            tok = self.tokens[i]
+            if tok.type == tokenize.OP:
+                if tok.string in '([{':
+                    depth += 1
+                elif tok.string in ')]}':
+                    depth -= 1
+                elif tok.string == ':' and not depth:
+                    return i
+
+    def _get_doc(self, node, index):
+        """Get docstring info.
+
+        Args:
+            node: Class or function node.
+            index: Index of the header's colon token.
+
+        Returns:
+            Tuple ``(text, start_line, start_col, end_line, end_col)`` or
+            ``None``.
+        """
+        text = ast.get_docstring(node, clean=False)
+        if text is None:
+            return None
+
+        skip = (tokenize.NEWLINE, tokenize.NL, tokenize.COMMENT,
+                tokenize.INDENT)
+        strings = []
+        for tok in self.tokens[index + 1:]:
+            if tok.type == tokenize.STRING:
+                strings.append(tok)
+            elif strings or tok.type not in skip:
+                break
+        if not strings:
+            return None
+
+        first, last = strings[0], strings[-1]
+
+        # Keep docstring source text as is if possible, since the ast
+        # evaluates escape sequences.
+        if len(strings) == 1:
+            text = first.string.lstrip('rRuU')
+            quote = text[:3] if text[:3] in ('"""', "'''") else text[0]
+            text = text[len(quote):-len(quote)]
+
+        # NOTE: doc block starts with the string prefix since the patcher
+        # expects only indentation before the block.
+        return (text, first.start[0], first.start[1] + 1,
+                last.end[0], last.end[1] + 1)
+
+    def _get_end_line(self, node):
+        end = getattr(node, 'end_lineno', None)
+        if end is None:
+            end = max(getattr(x, 'lineno', 0) for x in ast.walk(node))
+        return end
+
+    def _create(self, node, parent, is_class):
+        names = ('class',) if is_class else ('def',)
+        index = self._find_token(node.lineno, names)
+        colon = None if index is None else self._find_colon(index)
+        if colon is None:
+            raise ValueError("Can't find '%s' header at line %d"
+                             % (names[0], node.lineno))
+        line = self.tokens[index].start[0]
+        text = self.lines[line - 1]
+        column = len(text) - len(text.lstrip()) + 1
+
+        bodystart = self.tokens[colon].start[0]
+
+        # NOTE: 'bodyend' is set to line before next statement to be
+        # compatible with external builder (see PyDefinitionHandlerTask).
+        end = self._get_end_line(node)
+        i = bisect.bisect_right(self._starts, end)
+        bodyend = self._starts[i] - 1 if i < len(self._starts) else end
+
+        if is_class:
+            name = node.name
+            if parent is not None:
+                name = self.definitions[parent].name + '.' + name
+            args = None
+            is_static = False
+        else:
+            name = node.name
+            args = _get_args(node)
+            is_static = any(isinstance(x, ast.Name) and x.id == 'staticmethod'
+                            for x in node.decorator_list)
+
+        return PyDefinition(name, is_class, line, column, bodystart, bodyend,
+                            parent, args, is_static,
+                            self._get_doc(node, colon))
+
+
+def extract_file(filename):
+    """Extract definitions from the given python file.
+
+    Args:
+        filename: Source filename.
+
+    Returns:
+        Tuple ``(filename, definitions, error)``.
+    """
+    try:
+        with tokenize.open(filename) as f:
+            source = f.read()
+        return filename, SourceParser(source).parse(), None
+    # ValueError is raised by ast.parse() for null bytes (and it's a base of
+    # the UnicodeDecodeError) and by the parser for unexpected tokens,
+    # OSError - for unreadable files.
+    except (SyntaxError, ValueError, OSError, tokenize.TokenError) as e:
+        return filename, None, str(e)
+
+
+class PyContentDbBuilder:
+    """Content DB builder for python sources.
+
+    Unlike :class:`ContentDbBuilder` it doesn't require external executable
+    and builds the DB in-process.
+
+    Args:
+        context: Application context :class:`Context`.
+        jobs: Number of processes to parse files with.
+    """
+    def __init__(self, context, jobs=1):
+        self.context = context
+        self.jobs = jobs or os.cpu_count() or 1
+        self._refid = 0
+
+    @property
+    def logger(self):
+        """Logger."""
+        return self.context.logger
+
+    def collect_files(self, paths, exclude=None, exclude_patterns=None,
+                      file_patterns=None):
+        """Collect files to process.
+
+        Args:
+            paths: List of paths to process.
+            exclude: List of paths or filenames to exclude.
+            exclude_patterns: Wildcard patterns to exclude.
+            file_patterns: Files wildcard patterns.
+
+        Returns:
+            List of absolute filenames.
+        """
+        exclude = set(exclude or ())
+        exclude.update([op.abspath(x) for x in exclude])
+        exclude_patterns = exclude_patterns or ()
+        file_patterns = file_patterns or ('*.py',)
+
+        def is_excluded(path):
+            name = op.basename(path)
+            if path in exclude or name in exclude:
+                return True
+            return any(fnmatch.fnmatch(name, x) or fnmatch.fnmatch(path, x)
+                       for x in exclude_patterns)
+
+        def is_supported(path):
+            name = op.basename(path)
+            return any(fnmatch.fnmatch(name, x) for x in file_patterns)
+
+        files = []
+        for path in paths:
+            path = op.abspath(path)
+            if is_excluded(path):
+                continue
+            if op.isfile(path):
+                files.append(path)
+                continue
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(x for x in dirs
+                                 if not is_excluded(op.join(root, x)))
+                for name in sorted(names):
+                    filename = op.join(root, name)
+                    if is_supported(filename) and not is_excluded(filename):
+                        files.append(filename)
+        return files
+
+    def _next_refid(self):
+        self._refid += 1
+        return 'py%d' % self._refid
+
+    def _insert_doc(self, conn, refid, type, id_file, doc):
+        if doc is not None:
+            text, start_line, start_col, end_line, end_col = doc
+            conn.execute(
+                'INSERT INTO docblocks VALUES (?,?,?,?,?,?,?,?,NULL)',
+                (refid, type, id_file, start_line, start_col, end_line,
+                 end_col, text))
+
+    def _insert_file(self, conn, filename, definitions):
+        cur = conn.execute('INSERT INTO files VALUES (?,?)',
+                           (filename, 'python'))
+        id_file = cur.lastrowid
+
+        # Definition index -> compound rowid.
+        compounds = {}
+        for i, d in enumerate(definitions):
+            refid = self._next_refid()
+            if d.is_class:
+                cur = conn.execute(
+                    'INSERT INTO compounddef VALUES (?,?,?,?,?,?)',
+                    (refid, d.name, id_file, d.line, d.column,
+                     int(CompoundType.CLASS)))
+                compounds[i] = cur.lastrowid
+                self._insert_doc(conn, refid, int(DefinitionType.CLASS),
+                                 id_file, d.doc)
+                continue
+
+            values = [refid, d.name, id_file, d.line, d.column, 'def', '',
+                      None, None, None, 0, int(d.is_static)]
+            values += [0] * 33
+            values += [int(MemberType.FUNCTION), d.bodystart, d.bodyend,
+                       id_file, None, compounds.get(d.parent)]
+            cur = conn.execute('INSERT INTO memberdef VALUES (%s)'
+                               % ','.join('?' * len(values)), values)
+            rowid = cur.lastrowid
+            for arg in d.args:
+                cur = conn.execute('INSERT INTO params VALUES (?,?,?)', arg)
+                conn.execute('INSERT INTO memberdef_params VALUES (?,?)',
+                             (rowid, cur.lastrowid))
+            self._insert_doc(conn, refid, int(DefinitionType.MEMBER),
+                             id_file, d.doc)
+        return id_file
+
+    def update(self, content_db, filenames):
+        """Update given files in the content DB.
+
+        Rows of the files are removed and the files are parsed again.
+        Removed files are only dropped from the DB.
+
+        Args:
+            content_db: :class:`ContentDb` instance built by this class.
+            filenames: List of absolute filenames.
+
+        Returns:
+            List of IDs of the updated files.
+        """
+        conn = content_db.conn
+        content_db.remove_files(filenames)
+
+        # Continue refids of the DB since builder may be a new one.
+        res = conn.execute("""
+        SELECT MAX(CAST(SUBSTR(refid, 3) AS INTEGER)) FROM
+        (SELECT refid FROM compounddef UNION ALL SELECT refid FROM memberdef)
+        WHERE refid LIKE 'py%'
+        """).fetchone()
+        self._refid = max(self._refid, res[0] or 0)
+
+        ids = []
+        for filename, definitions, error in map(
+                extract_file, [x for x in filenames if op.isfile(x)]):
+            if error is not None:
+                self.logger.error('%s: %s', filename, error)
+                continue
+            ids.append(self._insert_file(conn, filename, definitions))
+        conn.commit()
+        return ids
+
+    def build(self, output, paths, exclude=None, exclude_patterns=None,
+              file_patterns=None):
+        """Build content database.
+
+        Args:
+            output: Output content DB filename. If not set then in-memory
+                DB is created.
+            paths: List of paths to process.
+            exclude: List of paths or filenames to exclude.
+            exclude_patterns: Wildcard patterns to exclude.
+            file_patterns: Files wildcard patterns.
+
+        Returns:
+            :class:`ContentDb` instance.
+        """
+        files = self.collect_files(paths, exclude, exclude_patterns,
+                                   file_patterns)
+
+        # Without output filename the DB is kept in memory, so small runs
+        # (like a single file from an editor) don't touch the disk.
+        output = output or ContentDb.MEMORY
+        if output != ContentDb.MEMORY and op.exists(output):
+            os.remove(output)
+
+        conn = sqlite3.connect(output)
+        conn.executescript(SCHEMA)
+
+        if self.jobs > 1 and len(files) > 1:
+            pool = multiprocessing.Pool(min(self.jobs, len(files)))
+            results = pool.imap(extract_file, files, chunksize=8)
+        else:
+            pool = None
+            results = map(extract_file, files)
+
+        try:
+            for filename, definitions, error in results:
+                if error is not None:
+                    self.logger.error('%s: %s', filename, error)
+                    continue
+                self._insert_file(conn, filename, definitions)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
+
+        conn.commit()
+
+        if not files:
+            conn.close()
+            raise ContentDbError('No files to process.')
+
+        if output == ContentDb.MEMORY:
+            return ContentDb(self.context, output, conn=conn)
+
+        conn.close()
+        return ContentDb(self.context, output)
@@ -21,7 +21,7 @@ from ..docstring.transforms.missing_docstring import MarkMissingDocstring
 from .rst.transforms.collect_fields import CollectInfoFields
 from .rst.transforms.sync_params import SyncParametersWithSpec
 from ..settings import C
-from ..contentdb import DefinitionType
+from ..contentdb import DefinitionType, CompactMemberDefinition
 
 
 class PyDefinitionHandlerTask(DefinitionHandlerTask):
@@ -108,7 +108,7 @@ class PyDefinitionHandlerTask(DefinitionHandlerTask):
 
         # If current definition is __init__ method then set flag to skip
         # processing and remove its docstring.
-        # The flag is used in DefinitionHandlerTask.do_run().
+        # The flag is used in DefinitionHandlerTask.process().
         elif (self.definition.type is DefinitionType.MEMBER
               and self.definition.name == '__init__'):
             self.remove_docstring = True
@@ -138,7 +138,7 @@ class PyDefinitionHandlerTask(DefinitionHandlerTask):
             doc.refid = definition.refid
             doc.type = definition.type
             doc.id_file = definition.id_file
-            if definition is DefinitionType.MEMBER:
+            if definition.type is DefinitionType.MEMBER:
                 doc.start_line = definition.bodystart
             else:
                 doc.start_line = definition.start_line
@@ -206,6 +206,8 @@ class PythonDomain(LanguageDomain):
 
     definition_handler_task = PyDefinitionHandlerTask
     file_sync_task = PyFileSyncTask
+    # Only a few member flags are used.
+    member_definition_cls = CompactMemberDefinition
 
     def __init__(self):
         super(PythonDomain, self).__init__()
@@ -16,8 +16,6 @@ from ...report import Codes
 from ...settings import C
 from ..style_napoleon import NapoleonStyleTransform, NapoleonStyle
 from ...utils import get_indent
-from ..napoleon import GoogleDocstring
-from .translator import DocumentToGoogleTranslator
 from .transforms.add_fields import AddDocstringSections
 from .transforms.collect_fields import CollectGoogleSections
 
@@ -26,10 +24,11 @@ class FromGoogleStyleTransform(NapoleonStyleTransform):
     """Convert Google style docstrings to reStructuredText."""
 
     name = 'google'
-    converter = GoogleDocstring
 
     def __init__(self, reporter):
+        from ..napoleon import GoogleDocstring
         super(FromGoogleStyleTransform, self).__init__(reporter)
+        self.converter = GoogleDocstring
         self.cfg.napoleon_google_docstring = True
         self.sections = {
             'args': self._sanitize_remove_section,
@@ -115,6 +114,10 @@ class GoogleStyle(NapoleonStyle):
         ('Raises section', 'raises_label', 'Raises', C('Raise', 'Raises')),
     )
 
-    document_translator_cls = DocumentToGoogleTranslator
     docstring_transform_cls = FromGoogleStyleTransform
     transforms = (CollectGoogleSections, AddDocstringSections)
+
+    @property
+    def document_translator_cls(self):
+        from .translator import DocumentToGoogleTranslator
+        return DocumentToGoogleTranslator
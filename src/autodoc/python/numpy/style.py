@@ -13,8 +13,6 @@
 # limitations under the License.
 
 from ..style_napoleon import NapoleonStyleTransform, NapoleonStyle
-from ..napoleon import NumpyDocstring
-from .translator import DocumentToNumpyTranslator
 
 
 # TODO: implement me.
@@ -22,10 +20,11 @@ class FromNumpyStyleTransform(NapoleonStyleTransform):
     """Convert NumPy style docstrings to reStructuredText."""
 
     name = 'numpy'
-    converter = NumpyDocstring
 
     def __init__(self, reporter):
+        from ..napoleon import NumpyDocstring
         super(FromNumpyStyleTransform, self).__init__(reporter)
+        self.converter = NumpyDocstring
         self.cfg.napoleon_numpy_docstring = True
 
     # TODO: implement me
@@ -41,5 +40,9 @@ class NumpyStyle(NapoleonStyle):
     settings_section = name
     settings_spec_help = 'NumPy docstring style.'
 
-    document_translator_cls = DocumentToNumpyTranslator
     docstring_transform_cls = FromNumpyStyleTransform
+
+    @property
+    def document_translator_cls(self):
+        from .translator import DocumentToNumpyTranslator
+        return DocumentToNumpyTranslator
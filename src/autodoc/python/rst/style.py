@@ -14,7 +14,6 @@
 
 from ...style import DocstringStyle
 from ...settings import C
-from .translator import DocumentToRstTranslator
 from .transforms.add_fields import AddDocstringSections
 
 
@@ -77,5 +76,9 @@ class RstStyle(RstBaseStyle):
         ('Raises tag', 'raises_tag', 'raises', C('raise', 'raises')),
     )
 
-    document_translator_cls = DocumentToRstTranslator
+    @property
+    def document_translator_cls(self):
+        from .translator import DocumentToRstTranslator
+        return DocumentToRstTranslator
+
     transforms = (AddDocstringSections,)
@@ -12,7 +12,6 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from .napoleon import Config
 from .rst.style import RstBaseStyle
 from ..contentdb import DefinitionType, MemberType
 
@@ -35,6 +34,9 @@ class NapoleonStyleTransform:
     converter = None
 
     def __init__(self, reporter):
+        # Napoleon is slow to import, so it's loaded only if docstrings
+        # are converted.
+        from .napoleon import Config
         self.reporter = reporter
         self.cfg = Config()
         self.cfg.napoleon_google_docstring = False
@@ -81,7 +83,15 @@ class NapoleonStyle(RstBaseStyle):
 
     def __init__(self, domain):
         super(NapoleonStyle, self).__init__(domain)
-        self._transform = self.docstring_transform_cls(domain.reporter)
+        self._transform = None
+
+    @property
+    def docstring_transform(self):
+        """Input docstring converter, it's created on first use."""
+        if self._transform is None:
+            self._transform = self.docstring_transform_cls(
+                self.domain.reporter)
+        return self._transform
 
     def get_definition_type(self, definition):
         """Helper method to get definition type name."""
@@ -101,4 +111,5 @@ class NapoleonStyle(RstBaseStyle):
     def transform_docstring(self, text, env):
         definition = env['definition']
         definition_type = self.get_definition_type(definition)
-        return self._transform.convert(text, definition.name, definition_type)
+        return self.docstring_transform.convert(text, definition.name,
+                                                definition_type)
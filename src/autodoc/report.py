@@ -35,6 +35,27 @@ def create_logger(verbose=False):
     return logger
 
 
+class BufferHandler(logging.Handler):
+    """Logging handler which collects formatted messages."""
+    def __init__(self):
+        super(BufferHandler, self).__init__()
+        self.setFormatter(logging.Formatter('%(message)s'))
+        self.records = []
+
+    def emit(self, record):
+        self.records.append((record.levelno, self.format(record)))
+
+    def pop_records(self):
+        """Get collected messages and clear the buffer.
+
+        Returns:
+            List of tuples ``(level, message)``.
+        """
+        records = self.records
+        self.records = []
+        return records
+
+
 # Levels mapping to convert from docutils levels to logging levels.
 _levels = {
     _Reporter.DEBUG_LEVEL: logging.DEBUG,
@@ -139,6 +160,7 @@ class DomainReporter(BaseReporter):
         self.domain = domain
         self._env = None
         self._filename = None
+        self._records = None
 
     @property
     def env(self):
@@ -155,8 +177,38 @@ class DomainReporter(BaseReporter):
         self._filename = None
         self._env = None
 
+    def start_recording(self):
+        """Start collecting reports to repeat them later.
+
+        See Also:
+            :meth:`stop_recording`.
+        """
+        self._records = []
+
+    def stop_recording(self):
+        """Stop collecting reports.
+
+        Positions equal to the definition's position are stored as zeros, so
+        they point to the definition's position on :meth:`add_report`.
+
+        Returns:
+            List of ``(code, message, line, col, level)`` collected since
+            :meth:`start_recording`, ``add_report(*record)`` repeats the
+            report.
+        """
+        records = self._records
+        self._records = None
+        return records or []
+
     def add_report(self, code, message, line=0, col=0, level=None):
         level = level or logging.INFO
+        if self._records is not None:
+            pos = (line, col)
+            if (self.definition is not None
+                    and pos == self.definition.get_start_pos()):
+                pos = (0, 0)
+            self._records.append((code, message) + pos + (level,))
+
         if self.definition is not None:
             line_, col_ = self.definition.get_start_pos()
             if line == 0:
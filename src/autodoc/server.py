@@ -0,0 +1,297 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements autodoc daemon.
+
+The daemon keeps warm :class:`Context` with registered domains, imported
+docutils parser and parsed documents cache. It listens on a local Unix
+socket, so processing of a single file (like on save in an editor) doesn't
+pay interpreter startup and imports.
+
+Protocol is a single JSON line request and a single JSON line response per
+connection. Request::
+
+    {"command": "process", "paths": [...], "settings": ["name=value"],
+     "write": false}
+    {"command": "ping"}
+    {"command": "stop"}
+
+Response::
+
+    {"messages": [[level, text], ...], "files": [[filename, content], ...],
+     "error": null}
+
+If ``write`` is set then files are patched on the disk and ``files`` is
+empty, otherwise files are not modified and patched content is returned.
+
+See :mod:`autodoc.client` for the client.
+"""
+import os
+import os.path as op
+import sys
+import json
+import socketserver
+from collections import OrderedDict
+import logging
+import click
+
+if __name__ == '__main__':
+    # If sys.frozen is defined then we packed with cx_Freeze and
+    # module path modification is not required.
+    if not getattr(sys, 'frozen', False):
+        sys.path.append(op.join(op.dirname(__file__), '..'))
+
+from autodoc.client import get_default_address, send_request
+from autodoc.errors import AutodocError
+from autodoc.context import Context
+from autodoc.contentdb import ContentDbError
+from autodoc.report import BufferHandler, create_logger
+from autodoc.settings import SettingsBuilder
+
+
+class ContentCollector:
+    """Sync writer which collects patched content instead of writing files.
+
+    See :meth:`Context.sync_sources`.
+    """
+    def __init__(self):
+        #: List of ``(filename, content)``.
+        self.files = []
+
+    def submit(self, patcher, filename):
+        self.files.append((filename, patcher.get_content()))
+
+    def close(self):
+        pass
+
+
+class Server:
+    """Autodoc daemon.
+
+    Args:
+        logger: Daemon logger.
+        settings: Base settings dict. Requests may override them.
+        cache: Docstrings cache filename. If not set then only parsed
+            documents are cached in memory.
+    """
+
+    #: Max number of documents (and docstrings) kept in memory per settings
+    #: profile, least recently used ones are dropped. With the cache file
+    #: they are loaded again on demand.
+    max_documents = 10000
+
+    #: Max number of settings profiles kept warm, least recently used one is
+    #: dropped when it's exceeded.
+    max_profiles = 8
+
+    #: Timeout in seconds of the client socket operations, so a stalled
+    #: client doesn't block the daemon.
+    request_timeout = 10
+
+    def __init__(self, logger, settings=None, cache=None):
+        from autodoc.python.domain import PythonDomain
+        # Load docutils parser and register directives before requests.
+        from autodoc.docstring import builder  # noqa
+
+        self.logger = logger
+        self.settings = settings or {}
+        self.cache = cache
+        self.stopped = False
+
+        # Reports are collected per request and sent to the client.
+        self.handler = BufferHandler()
+        context_logger = logging.getLogger('autodoc.server.context')
+        context_logger.propagate = False
+        context_logger.setLevel(logging.INFO)
+        context_logger.addHandler(self.handler)
+
+        self.context = Context(context_logger)
+        self.context.register(PythonDomain())
+        # {settings overrides: (settings, cache, document_cache)}
+        self._profiles = OrderedDict()
+
+    def _get_profile(self, overrides):
+        key = tuple(overrides)
+        profile = self._profiles.get(key)
+        if profile is not None:
+            self._profiles.move_to_end(key)
+        else:
+            builder = SettingsBuilder(self.logger)
+            builder.collect(self.context)
+            builder.add_from_dict(self.settings)
+            builder.add_from_keyvalues(overrides)
+
+            from autodoc.cache import DocstringCache, DocumentCache
+            if self.cache:
+                cache = DocstringCache(self.cache, builder.settings,
+                                       self.max_documents)
+                document_cache = DocumentCache(self.cache, builder.settings,
+                                               self.max_documents)
+            else:
+                cache = None
+                document_cache = DocumentCache(':memory:', builder.settings,
+                                               self.max_documents)
+            profile = (builder.get_settings(), cache, document_cache)
+            self._profiles[key] = profile
+            if len(self._profiles) > self.max_profiles:
+                self._profiles.popitem(last=False)
+        return profile
+
+    def process(self, paths, settings=(), write=False):
+        """Process given files.
+
+        Args:
+            paths: List of files and directories.
+            settings: List of settings overrides in the ``name=value``
+                format.
+            write: Patch files on the disk.
+
+        Returns:
+            List of ``(filename, content)`` if ``write`` is not set.
+        """
+        context = self.context
+        (context.settings, context.cache,
+         context.document_cache) = self._get_profile(settings)
+
+        content_db = context.build_content_db(None, paths, None, None,
+                                              exe='python')
+        context.analyze(content_db)
+        content_db.finalize()
+        if context.cache is not None:
+            context.cache.save()
+            context.document_cache.save()
+        else:
+            # Documents are kept in memory only.
+            context.document_cache.pop_new()
+
+        collector = None if write else ContentCollector()
+        context.sync_sources(content_db, writer=collector)
+        content_db.conn.close()
+        return collector.files if collector else []
+
+    def handle(self, request):
+        """Handle request.
+
+        Args:
+            request: Request dict.
+
+        Returns:
+            Response dict.
+        """
+        response = {'messages': [], 'files': [], 'error': None}
+        command = request.get('command')
+        try:
+            if command == 'process':
+                paths = request.get('paths') or []
+                if not paths:
+                    raise AutodocError('At least one path must be specified.')
+                response['files'] = self.process(
+                    paths, request.get('settings') or (),
+                    request.get('write', False))
+            elif command == 'ping':
+                pass
+            elif command == 'stop':
+                self.stopped = True
+            else:
+                raise AutodocError('Unknown command: %s' % command)
+        except (AutodocError, ContentDbError, ValueError, OSError) as e:
+            response['error'] = str(e)
+        except Exception as e:
+            self.logger.exception('Request failed')
+            response['error'] = 'Internal error: %s' % e
+        # Reports are sent even if processing is failed.
+        response['messages'] = self.handler.pop_records()
+        return response
+
+    def serve(self, address):
+        """Listen for requests until ``stop`` command.
+
+        Args:
+            address: Socket filename.
+        """
+        if op.exists(address):
+            try:
+                send_request(address, {'command': 'ping'})
+            except OSError:
+                # Stale socket left by killed daemon.
+                os.remove(address)
+            else:
+                raise AutodocError('Daemon is already running: %s' % address)
+
+        server = self
+
+        class RequestHandler(socketserver.StreamRequestHandler):
+            timeout = self.request_timeout
+
+            def handle(self):
+                try:
+                    request = json.loads(
+                        self.rfile.readline().decode('utf-8'))
+                except (OSError, ValueError) as e:
+                    server.logger.warning('Bad request: %s', e)
+                    return
+                response = server.handle(request)
+                self.wfile.write(json.dumps(response).encode('utf-8'))
+                self.wfile.write(b'\n')
+
+        # Only the current user may connect.
+        umask = os.umask(0o177)
+        try:
+            srv = socketserver.UnixStreamServer(address, RequestHandler)
+        finally:
+            os.umask(umask)
+
+        self.logger.info('Listening on %s', address)
+        try:
+            with srv:
+                while not self.stopped:
+                    srv.handle_request()
+        finally:
+            os.remove(address)
+        self.logger.info('Stopped')
+
+
+@click.command(context_settings=dict(help_option_names=['-h', '--help']))
+@click.option('--socket', 'address', type=click.Path(dir_okay=False),
+              default=get_default_address, show_default=True,
+              help='Socket filename.')
+@click.option('--verbose', '-v', is_flag=True, default=False,
+              help='Verbose output.')
+@click.option('--cache', type=click.Path(dir_okay=False),
+              help='Docstrings cache file to skip unchanged definitions.')
+@click.option('--config', '-c', help='Configuration file.',
+              type=click.Path(dir_okay=False, exists=True))
+@click.option('-s', help='Overwrite a setting.', metavar='VAR=VALUE',
+              multiple=True)
+def serve(address, verbose, cache, config, s):
+    """Autodoc daemon."""
+    logger = create_logger(verbose)
+
+    # Validate settings before start.
+    server = Server(logger, cache=cache)
+    builder = SettingsBuilder(logger)
+    builder.collect(server.context)
+    try:
+        if config:
+            builder.load_config(config)
+        builder.add_from_keyvalues(s)
+        server.settings = builder.settings
+        server.serve(address)
+    except (AutodocError, ValueError) as e:
+        raise click.ClickException(str(e))
+
+
+if __name__ == '__main__':
+    serve()
@@ -12,8 +12,8 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
-from docutils.transforms import Transformer
 from docutils.io import StringOutput
+from .docstring.transforms import get_transform_pipeline
 from .settings import SettingsSpec
 from .docstring.writer import TextWriter
 
@@ -47,19 +47,18 @@ class DocstringStyle(SettingsSpec):
         """
         self.domain = domain
 
-    def transform_document(self, document):
+    def transform_document(self, document, profiler=None):
         """Apply transforms to the given ``document``.
 
         Args:
             document: Document tree.
+            profiler: :class:`Profiler` to measure transforms with.
 
         See Also:
             :attr:`transforms`.
         """
         if self.transforms:
-            transformer = Transformer(document)
-            transformer.add_transforms(self.transforms)
-            transformer.apply_transforms()
+            get_transform_pipeline(self.transforms).apply(document, profiler)
 
     def to_string(self, env):
         """Convert document tree in the ``env`` to text representation.
@@ -71,7 +70,7 @@ class DocstringStyle(SettingsSpec):
             str: Text representation of the document.
         """
         document = env['definition'].doc_block.document
-        self.transform_document(document)
+        self.transform_document(document, env.get('profiler'))
 
         out = StringOutput(encoding=env.get('input_encoding', 'utf-8'))
         writer = TextWriter(self.document_translator_cls)
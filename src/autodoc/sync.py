@@ -0,0 +1,269 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements writing of the patched source files.
+
+Patches are created by the file sync tasks in the main process since they
+read the content DB. Files are independent, so applying patches and writing
+results may be done by a pool of processes.
+
+Files are always written to temporary files which atomically replace
+the original ones, so a killed process never leaves partially written
+sources. With ``fsync`` enabled temporary files are kept until all files
+are written, then flushed to the disk by a single ``sync()`` call (or
+one by one if the platform doesn't have it), renamed and their
+directories are flushed, so a power loss doesn't corrupt sources either.
+
+Temporary files left by killed processes are removed by the
+:class:`FileWriter` when it writes to their directories.
+"""
+import os
+import os.path as op
+import glob
+import time
+import concurrent.futures as futures
+
+
+#: Wildcard of temporary files, see :meth:`FilePatcher.write`.
+TEMP_PATTERN = '.autodoc-*.tmp'
+
+
+def patch_file(patcher, filename, defer=False):
+    """Apply patches and write result to the file.
+
+    Args:
+        patcher: :class:`FilePatcher` instance.
+        filename: Output filename.
+        defer: Only write temporary file, don't replace the output file.
+
+    Returns:
+        ``True`` if the file is written or temporary filename if ``defer``
+        is set. ``False`` or ``None`` if content is not changed.
+    """
+    if defer:
+        return patcher.write(filename)
+    return patcher.patch(filename)
+
+
+def sync_file(filename):
+    """Flush file content to the disk.
+
+    Args:
+        filename: Filename.
+    """
+    # Write access is required to flush a file on Windows.
+    fd = os.open(filename, os.O_RDWR)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def sync_dir(path):
+    """Flush directory entries to the disk.
+
+    Args:
+        path: Directory path.
+    """
+    # Directories can't be opened on Windows, rename is durable there.
+    if os.name == 'nt':
+        return
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def remove_stale_files(path, max_age):
+    """Remove temporary files left in the directory by killed processes.
+
+    Args:
+        path: Directory path.
+        max_age: Min age in seconds of files to remove, so temporary files
+            of running processes are kept.
+    """
+    deadline = time.time() - max_age
+    for filename in glob.glob(op.join(glob.escape(path), TEMP_PATTERN)):
+        try:
+            if os.stat(filename).st_mtime < deadline:
+                os.remove(filename)
+        except OSError:
+            pass
+
+
+class FileWriter:
+    """This class applies file patches and collects statistics.
+
+    Errors are reported per file and don't stop processing of other files.
+
+    Args:
+        logger: Logger instance.
+        jobs: Number of processes to write files with. If zero then number
+            of CPUs is used. If ``1`` then files are written in the current
+            process.
+        fsync: Flush written files to the disk. Files are flushed and
+            replaced in :meth:`close`.
+    """
+
+    #: Max number of pending files per process.
+    queue_size = 4
+
+    #: Age in seconds after which temporary files are considered stale.
+    stale_age = 3600
+
+    def __init__(self, logger, jobs=1, fsync=False):
+        self.logger = logger
+        self.jobs = jobs or os.cpu_count() or 1
+        self.fsync = fsync
+        #: Number of processed files.
+        self.processed = 0
+        #: Number of written files, unchanged files are not written.
+        self.written = 0
+        #: Number of files failed to write.
+        self.failed = 0
+        self._executor = None
+        self._pending = {}
+        # List of (temporary filename, filename) to replace on close.
+        self._deferred = []
+        # Directories checked for stale temporary files.
+        self._dirs = set()
+
+    def submit(self, patcher, filename):
+        """Apply patches and write file.
+
+        Args:
+            patcher: :class:`FilePatcher` instance.
+            filename: Output filename.
+        """
+        path = op.dirname(op.abspath(filename))
+        if path not in self._dirs:
+            self._dirs.add(path)
+            remove_stale_files(path, self.stale_age)
+
+        if self.jobs == 1:
+            try:
+                result = patch_file(patcher, filename, self.fsync)
+            except Exception as e:
+                self._on_error(filename, e)
+            else:
+                self._on_done(filename, result)
+            return
+
+        if self._executor is None:
+            self._executor = futures.ProcessPoolExecutor(self.jobs)
+
+        # Limit number of pending files to keep memory usage bounded.
+        if len(self._pending) >= self.jobs * self.queue_size:
+            self._wait(futures.FIRST_COMPLETED)
+
+        future = self._executor.submit(patch_file, patcher, filename,
+                                       self.fsync)
+        self._pending[future] = filename
+
+    def _on_done(self, filename, result):
+        self.processed += 1
+        if result:
+            self.written += 1
+            if self.fsync:
+                self._deferred.append((result, filename))
+
+    def _on_error(self, filename, error):
+        self.failed += 1
+        self.logger.error('%s: %s', filename, error)
+
+    def _wait(self, return_when):
+        done, _ = futures.wait(self._pending, return_when=return_when)
+        for future in done:
+            filename = self._pending.pop(future)
+            error = future.exception()
+            if error is not None:
+                self._on_error(filename, error)
+            else:
+                self._on_done(filename, future.result())
+
+    def _discard(self, temp_filename, filename, error):
+        self.written -= 1
+        self._on_error(filename, error)
+        try:
+            os.remove(temp_filename)
+        except OSError:
+            pass
+
+    def _flush_deferred(self):
+        """Flush temporary files to the disk.
+
+        Returns:
+            List of flushed ``(temporary filename, filename)``.
+        """
+        deferred = self._deferred
+        self._deferred = []
+        if not deferred:
+            return deferred
+
+        # Single sync() is much cheaper than fsync() per file.
+        if hasattr(os, 'sync'):
+            os.sync()
+            return deferred
+
+        flushed = []
+        for temp_filename, filename in deferred:
+            try:
+                sync_file(temp_filename)
+            except OSError as e:
+                self._discard(temp_filename, filename, e)
+            else:
+                flushed.append((temp_filename, filename))
+        return flushed
+
+    def _replace_deferred(self):
+        """Flush temporary files and replace output files with them.
+
+        Errors are reported per file, temporary files are either renamed or
+        removed.
+        """
+        dirs = set()
+        for temp_filename, filename in self._flush_deferred():
+            try:
+                os.replace(temp_filename, filename)
+            except OSError as e:
+                self._discard(temp_filename, filename, e)
+            else:
+                dirs.add(op.dirname(op.abspath(filename)))
+
+        if dirs and hasattr(os, 'sync'):
+            os.sync()
+            return
+
+        for path in sorted(dirs):
+            try:
+                sync_dir(path)
+            except OSError as e:
+                self._on_error(path, e)
+
+    def close(self):
+        """Wait for pending files and report summary."""
+        if self._executor is not None:
+            self._wait(futures.ALL_COMPLETED)
+            self._executor.shutdown()
+            self._executor = None
+
+        self._replace_deferred()
+
+        msg = 'Files processed: %d, modified: %d' % (self.processed,
+                                                     self.written)
+        if self.failed:
+            msg += ', failed: %d' % self.failed
+        self.logger.info(msg)
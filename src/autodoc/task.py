@@ -12,10 +12,10 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 
+import pickle
 from functools import reduce
-from docutils.transforms import Transformer
+from .docstring.transforms import get_transform_pipeline
 from .settings import SettingsSpec
-from .docstring.builder import DocumentBuilder
 from .patch import Patch, FilePatcher
 from .utils import trim_docstring
 
@@ -34,6 +34,18 @@ class BaseTask(SettingsSpec):
             env: Processing environment dict.
         """
         self.domain = domain
+        self.env = None
+        self.settings = None
+        self.reset(env)
+
+    def reset(self, env):
+        """Reset task state to run it again with the given ``env``.
+
+        Domain reuses task instances, so all per-run state must be set here.
+
+        Args:
+            env: Processing environment dict.
+        """
         self.env = env
         self.settings = env['settings']
 
@@ -44,7 +56,6 @@ class BaseTask(SettingsSpec):
     def teardown(self):
         """Tear down task."""
         self.env = None
-        self.domain = None
 
     def do_run(self):
         """Entry point for subclasses."""
@@ -72,28 +83,47 @@ class DefinitionHandlerTask(BaseTask):
     """
 
     #: Document builder class.
-    document_builder = DocumentBuilder
+    #:
+    #: If not set then :class:`DocumentBuilder` is used. It's imported on
+    #: first use since it loads docutils parser which is slow to import.
+    document_builder = None
 
     #: Document transforms.
     transforms = None
 
-    def __init__(self, domain, env):
-        """Create handler.
-
-        Args:
-            domain: :class:`LanguageDomain` instance.
-            env: Processing environment dict.
-        """
-        super(DefinitionHandlerTask, self).__init__(domain, env)
+    def reset(self, env):
+        super(DefinitionHandlerTask, self).reset(env)
         self.definition = self.env['definition']
         self.db = self.env['db']
+        self.cache = self.env.get('cache')
+        self.reporter = self.env.get('reporter')
+        self.profiler = self.env.get('profiler')
         self.remove_docstring = False
 
     def teardown(self):
         self.db = None
+        self.cache = None
+        self.reporter = None
+        self.profiler = None
         self.definition = None
         super(DefinitionHandlerTask, self).teardown()
 
+    def call_stage(self, name, *args):
+        """Call handler's method and measure it if profiling is enabled.
+
+        Args:
+            name: Method (stage) name.
+            *args: Method arguments.
+
+        Returns:
+            Method result.
+        """
+        method = getattr(self, name)
+        if self.profiler is None:
+            return method(*args)
+        with self.profiler.measure(name):
+            return method(*args)
+
     def apply_styles(self, text):
         """Apply styles transforms to docstring before document building.
 
@@ -107,8 +137,9 @@ class DefinitionHandlerTask(BaseTask):
             This method gets called only if docstring exists and document
             tree is not prebuilt.
         """
-        text = reduce(lambda t, f: f(t, self.env),
-                      self.domain._styles_transforms, text)
+        transforms = self.domain.get_docstring_transforms(
+            self.settings['instyle'])
+        text = reduce(lambda t, f: f(t, self.env), transforms, text)
         return text
 
     def build_document(self):
@@ -122,16 +153,18 @@ class DefinitionHandlerTask(BaseTask):
         if doc_block.document is None:
             if doc_block.docstring is not None:
                 text = trim_docstring(doc_block.docstring, as_string=True)
-                doc_block.docstring = self.apply_styles(text)
-            builder = self.document_builder(self.env)
+                doc_block.docstring = self.call_stage('apply_styles', text)
+            builder_cls = self.document_builder
+            if builder_cls is None:
+                from .docstring.builder import DocumentBuilder as builder_cls
+            builder = builder_cls(self.env)
             self.definition.doc_block.document = builder.get_document()
 
     def apply_transforms(self):
         """Apply transforms on current document tree."""
         if self.transforms:
-            transformer = Transformer(self.definition.doc_block.document)
-            transformer.add_transforms(self.transforms)
-            transformer.apply_transforms()
+            get_transform_pipeline(self.transforms).apply(
+                self.definition.doc_block.document, self.profiler)
 
     def translate_document_to_docstring(self):
         """Translate document tree to text representation using style specified
@@ -149,13 +182,61 @@ class DefinitionHandlerTask(BaseTask):
         self.env['db'].save_doc_block(self.definition)
 
     def do_run(self):
+        if self.profiler is None:
+            self.process()
+        else:
+            self.profiler.begin(self.domain.name, self.settings['style'],
+                                self.definition)
+            self.process()
+            self.profiler.end()
+
+    def process(self):
+        """Process the definition and save result to the content DB."""
         if self.remove_docstring:
             self.definition.doc_block.docstring = None
         else:
-            self.build_document()
-            self.apply_transforms()
-            self.translate_document_to_docstring()
-        self.save_changes()
+            key = None
+            if self.cache is not None:
+                key = self.cache.get_key(self.definition)
+
+            if key is None:
+                self.build_docstring()
+            elif key in self.cache:
+                # Repeat reports, so cached definitions are still checked.
+                docstring, reports = pickle.loads(self.cache[key])
+                self.definition.doc_block.docstring = docstring
+                for record in reports:
+                    self.reporter.add_report(*record)
+            else:
+                self.reporter.start_recording()
+                try:
+                    self.build_docstring()
+                finally:
+                    reports = self.reporter.stop_recording()
+                self.cache[key] = pickle.dumps(
+                    (self.definition.doc_block.docstring, reports),
+                    pickle.HIGHEST_PROTOCOL)
+        self.call_stage('save_changes')
+        self.release_document()
+
+    def build_docstring(self):
+        """Build docstring of the definition from its document tree."""
+        self.call_stage('build_document')
+        self.call_stage('apply_transforms')
+        self.call_stage('translate_document_to_docstring')
+
+    def release_document(self):
+        """Drop document tree of the processed definition.
+
+        Definitions may outlive processing (like cached constructors), so
+        the tree is released as soon as the docstring is saved.
+        """
+        doc_block = self.definition.doc_block
+        document = doc_block.document
+        if document is not None:
+            doc_block.document = None
+            # Break 'env -> definition -> document -> env' reference cycle.
+            document.env = None
 
 
 class FileSyncTask(BaseTask):
@@ -164,8 +245,8 @@ class FileSyncTask(BaseTask):
     This task takes content from DB, creates patches and applies them to
     destination file.
     """
-    def __init__(self, domain, env):
-        super(FileSyncTask, self).__init__(domain, env)
+    def reset(self, env):
+        super(FileSyncTask, self).reset(env)
         self.file_id = self.env['file_id']
         self.filename = self.env['filename']
         self.patcher = None
@@ -178,7 +259,11 @@ class FileSyncTask(BaseTask):
     def teardown(self):
         """Save modifications to file."""
         filename = self.env.get('out_filename') or self.filename
-        self.patcher.patch(filename)
+        writer = self.env.get('writer')
+        if writer is not None:
+            writer.submit(self.patcher, filename)
+        else:
+            self.patcher.patch(filename)
         self.patcher = None
         super(FileSyncTask, self).teardown()
 
@@ -192,7 +277,10 @@ class FileSyncTask(BaseTask):
 
     def do_run(self):
         """Go over all doc blocks for a specified file and create patches."""
+        refids = self.env.get('refids')
         for docblock in self.env['db'].get_doc_blocks(self.file_id):
+            if refids is not None and docblock.refid not in refids:
+                continue
             self.prepare(docblock)
             # If docstring is present or we need to remove it then add patch.
             if (docblock.docstring is not None
@@ -0,0 +1,188 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements watch mode.
+
+Source tree is polled and files are compared with the index of their
+modification times and sizes. Only content DB rows of changed files are
+rebuilt, then their definitions are analyzed and synced.
+"""
+import os
+import time
+from .errors import AutodocError
+from .contentdb import ContentDbError
+from .python.builder import PyContentDbBuilder
+from .sync import FileWriter
+
+
+class FileIndex:
+    """Index of files states to detect changes.
+
+    Args:
+        collect: Function which returns list of files to watch.
+    """
+    def __init__(self, collect):
+        self.collect = collect
+        #: Dict ``{filename: (mtime, size)}``.
+        self.files = {}
+
+    @staticmethod
+    def get_state(filename):
+        """Get file state.
+
+        Returns:
+            Tuple ``(mtime, size)`` or ``None`` if file doesn't exist.
+        """
+        try:
+            st = os.stat(filename)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def scan(self):
+        """Build index of the current files."""
+        self.files = {}
+        for filename in self.collect():
+            state = self.get_state(filename)
+            if state is not None:
+                self.files[filename] = state
+
+    def update(self, states):
+        """Set states of the given files.
+
+        It's used to skip changes made by the autodoc itself.
+
+        Args:
+            states: Dict ``{filename: state}``, see :meth:`get_state`.
+        """
+        for filename, state in states.items():
+            if state is None:
+                self.files.pop(filename, None)
+            else:
+                self.files[filename] = state
+
+    def poll(self):
+        """Find changes since last call and update the index.
+
+        Returns:
+            Tuple of sorted lists ``(modified, removed)``, new files are
+            reported as modified.
+        """
+        old = self.files
+        self.scan()
+        modified = [name for name, state in self.files.items()
+                    if old.get(name) != state]
+        removed = [name for name in old if name not in self.files]
+        return sorted(modified), sorted(removed)
+
+
+class StateWriter(FileWriter):
+    """File writer which remembers states of the written files.
+
+    States are taken right after writing, so later changes of the files are
+    not confused with the autodoc ones.
+    """
+    def __init__(self, logger, jobs=1):
+        super(StateWriter, self).__init__(logger, jobs)
+        #: Dict ``{filename: state}`` of the written files.
+        self.states = {}
+
+    def _on_done(self, filename, result):
+        super(StateWriter, self)._on_done(filename, result)
+        if result:
+            self.states[filename] = FileIndex.get_state(filename)
+
+
+class Watcher:
+    """This class re-analyzes changed files of the content DB.
+
+    Content DB must be built by the :class:`PyContentDbBuilder` from the
+    same paths.
+
+    Args:
+        context: :class:`Context` instance.
+        content_db: :class:`ContentDb` instance.
+        paths: List of paths to watch.
+        exclude: List of paths or filenames to exclude.
+        exclude_patterns: Wildcard patterns to exclude.
+        fix: Sync changed sources.
+        jobs: Number of processes to analyze and write files with.
+        interval: Polling interval in seconds.
+    """
+    def __init__(self, context, content_db, paths, exclude=None,
+                 exclude_patterns=None, fix=True, jobs=1, interval=1.0):
+        self.context = context
+        self.content_db = content_db
+        self.fix = fix
+        self.jobs = jobs
+        self.interval = interval
+        self.builder = PyContentDbBuilder(context, jobs=jobs)
+        file_patterns = context.get_file_patterns()
+        self.index = FileIndex(
+            lambda: self.builder.collect_files(paths, exclude,
+                                               exclude_patterns,
+                                               file_patterns))
+        self.index.scan()
+
+    def process(self, modified, removed):
+        """Update content DB for the given files and process them.
+
+        Args:
+            modified: List of modified or new files.
+            removed: List of removed files.
+        """
+        context = self.context
+        db = self.content_db
+        ids = self.builder.update(db, modified + removed)
+        if ids:
+            context.analyze(db, jobs=self.jobs, files=ids)
+        db.finalize()
+        if context.cache is not None:
+            context.cache.save()
+            context.document_cache.save()
+        if ids and self.fix:
+            writer = StateWriter(context.logger, self.jobs)
+            context.sync_sources(db, files=ids, writer=writer)
+            # Don't treat our own changes as modifications. Files changed
+            # after polling by someone else are processed by the next check.
+            self.index.update(writer.states)
+
+    def check(self):
+        """Process changes since last check.
+
+        Returns:
+            ``True`` if there are changes.
+        """
+        modified, removed = self.index.poll()
+        if not modified and not removed:
+            return False
+        self.context.logger.info('Changed files: %d, removed: %d',
+                                 len(modified), len(removed))
+        self.process(modified, removed)
+        return True
+
+    def run(self):
+        """Watch for changes until interrupted."""
+        self.context.logger.info('Watching for changes, press Ctrl+C to stop')
+        try:
+            while True:
+                time.sleep(self.interval)
+                # Keep watching, file may be fixed by the next change.
+                try:
+                    self.check()
+                except (AutodocError, ContentDbError, OSError) as e:
+                    self.context.logger.error(str(e))
+        except KeyboardInterrupt:
+            pass
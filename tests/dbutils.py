@@ -0,0 +1,192 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+"""
+This module implements helpers to create synthetic content DBs for testing.
+"""
+import sqlite3
+import logging
+from unittest.mock import Mock
+from autodoc.context import Context
+from autodoc.contentdb import SCHEMA
+from autodoc.settings import SettingsBuilder
+from autodoc.python.domain import PythonDomain
+
+
+class ContentDbWriter:
+    """Helper to fill synthetic content DB.
+
+    Args:
+        filename: DB filename.
+    """
+    def __init__(self, filename):
+        self.filename = filename
+        self.conn = sqlite3.connect(filename)
+        self.conn.executescript(SCHEMA)
+        self._refid = 0
+
+    def _next_refid(self):
+        self._refid += 1
+        return 'ref%d' % self._refid
+
+    def _add_docblock(self, refid, type, id_file, docstring):
+        if docstring is None:
+            return
+        text, start_line, start_col, end_line, end_col = docstring
+        self.conn.execute(
+            'INSERT INTO docblocks VALUES (?,?,?,?,?,?,?,?,NULL)',
+            (refid, type, id_file, start_line, start_col, end_line, end_col,
+             text))
+
+    def add_file(self, name, language='python'):
+        cur = self.conn.execute('INSERT INTO files VALUES (?,?)',
+                                (name, language))
+        return cur.lastrowid
+
+    def add_class(self, id_file, name, line, col=1, docstring=None):
+        """Add class.
+
+        Args:
+            id_file: File ID.
+            name: Class name.
+            line: Definition line.
+            col: Definition column.
+            docstring: Tuple ``(text, start_line, start_col, end_line,
+                end_col)`` or ``None``.
+
+        Returns:
+            Class ID.
+        """
+        refid = self._next_refid()
+        cur = self.conn.execute(
+            'INSERT INTO compounddef VALUES (?,?,?,?,?,0)',
+            (refid, name, id_file, line, col))
+        self._add_docblock(refid, 0, id_file, docstring)
+        return cur.lastrowid
+
+    def add_function(self, id_file, name, line, bodyend, col=1, args=(),
+                     compound=None, docstring=None):
+        """Add function or method.
+
+        Args:
+            id_file: File ID.
+            name: Function name.
+            line: Definition line.
+            bodyend: Last line of the function body.
+            col: Definition column.
+            args: List of argument names.
+            compound: Parent class ID.
+            docstring: Tuple ``(text, start_line, start_col, end_line,
+                end_col)`` or ``None``.
+
+        Returns:
+            Member ID.
+        """
+        refid = self._next_refid()
+        values = [refid, name, id_file, line, col, 'def', '', None, None, None]
+        values += [0] * 35
+        values += [1, line, bodyend, id_file, None, compound]
+        cur = self.conn.execute(
+            'INSERT INTO memberdef VALUES (%s)' % ','.join('?' * len(values)),
+            values)
+        rowid = cur.lastrowid
+        for arg in args:
+            if arg.startswith('**'):
+                param = ('**', arg[2:], None)
+            elif arg.startswith('*'):
+                param = ('*', arg[1:], None)
+            else:
+                param = (None, arg, arg)
+            cur = self.conn.execute('INSERT INTO params VALUES (?,?,?)', param)
+            self.conn.execute('INSERT INTO memberdef_params VALUES (?,?)',
+                              (rowid, cur.lastrowid))
+        self._add_docblock(refid, 3, id_file, docstring)
+        return rowid
+
+    def close(self):
+        self.conn.commit()
+        self.conn.close()
+
+
+def create_sample_db(filename, num_files=4, num_classes=2, num_methods=3):
+    """Create sample content DB with python classes and methods.
+
+    Args:
+        filename: DB filename.
+        num_files: Number of files.
+        num_classes: Number of classes per file.
+        num_methods: Number of methods per class (except ``__init__``).
+    """
+    w = ContentDbWriter(filename)
+    for i in range(num_files):
+        id_file = w.add_file('file%d.py' % i)
+        line = 1
+        for j in range(num_classes):
+            doc = ('Class %d.\n\n    Args:\n        x: Value.\n    ' % j,
+                   line + 1, 5, line + 5, 8)
+            cls = w.add_class(id_file, 'Class%d' % j, line, docstring=doc)
+            line += 6
+            doc = ('Constructor.\n\n        :param x: Value.\n        ',
+                   line + 1, 9, line + 3, 12)
+            w.add_function(id_file, '__init__', line, line + 5, col=5,
+                           args=('x',), compound=cls, docstring=doc)
+            line += 6
+            for k in range(num_methods):
+                # Every second method has no docstring.
+                if k % 2:
+                    doc = None
+                else:
+                    doc = ('Method %d.\n\n        Args:\n            a: A.'
+                           '\n        Returns:\n            Result.'
+                           '\n        ' % k,
+                           line + 1, 9, line + 7, 12)
+                w.add_function(id_file, 'method%d' % k, line, line + 9, col=5,
+                               args=('a',),
+                               compound=cls, docstring=doc)
+                line += 10
+        w.add_function(id_file, 'func', line, line + 4, args=('a', 'b'),
+                       docstring=('Function.', line + 1, 5, line + 1, 18))
+    w.close()
+
+
+def create_context(settings=None):
+    """Create context with registered python domain.
+
+    Args:
+        settings: Dict with settings to override.
+
+    Returns:
+        :class:`Context` instance.
+    """
+    context = Context(logging.getLogger('autodoc.test'))
+    context.register(PythonDomain())
+    builder = SettingsBuilder(Mock())
+    builder.collect(context)
+    builder.add_from_dict(settings)
+    context.settings = builder.get_settings()
+    return context
+
+
+def get_doc_blocks(conn):
+    """Get all doc blocks ordered by files.
+
+    Args:
+        conn: DB connection.
+
+    Returns:
+        List of rows.
+    """
+    return conn.execute("""SELECT refid, type, id_file, start_line, start_col,
+    end_line, end_col, docstring FROM docblocks ORDER BY id_file, rowid
+    """).fetchall()
@@ -0,0 +1,215 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import shutil
+import sqlite3
+import pytest
+from unittest.mock import Mock
+from autodoc.cache import DocstringCache, DocumentCache
+from autodoc.contentdb import ContentDb
+from autodoc.docstring.builder import DocumentBuilder
+from autodoc.task import DefinitionHandlerTask
+from .dbutils import create_sample_db, create_context, get_doc_blocks
+
+
+def analyze(filename, cache_filename, settings=None, jobs=1, prune=False):
+    context = create_context(settings)
+    context.cache = DocstringCache(cache_filename, settings, prune=prune)
+    db = ContentDb(context, filename)
+    context.analyze(db, jobs=jobs)
+    db.finalize()
+    context.cache.save()
+    return get_doc_blocks(db.conn)
+
+
+@pytest.fixture
+def sample_db(tmpdir):
+    filename = str(tmpdir.join('content.db'))
+    create_sample_db(filename, num_files=2)
+    return filename
+
+
+# Test: cache key depends on definition state and settings.
+def test_key(tmpdir, sample_db):
+    filename = str(tmpdir.join('cache.db'))
+    definition = next(ContentDb(create_context(), sample_db).get_definitions())
+
+    key = DocstringCache(filename, {}).get_key(definition)
+    assert DocstringCache(filename, {}).get_key(definition) == key
+    assert DocstringCache(filename, {'a': 1}).get_key(definition) != key
+
+    definition.doc_block.docstring += 'x'
+    assert DocstringCache(filename, {}).get_key(definition) != key
+
+
+# Test: second run takes docstrings from the cache.
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_analyze(tmpdir, sample_db, monkeypatch, jobs):
+    cache_filename = str(tmpdir.join('cache.db'))
+    second_db = str(tmpdir.join('content2.db'))
+    shutil.copy(sample_db, second_db)
+
+    expected = analyze(sample_db, cache_filename, jobs=jobs)
+
+    def build_document(self):
+        raise AssertionError('Must be cached: %s' % self.definition)
+
+    monkeypatch.setattr(DefinitionHandlerTask, 'build_document',
+                        build_document)
+    assert analyze(second_db, cache_filename, jobs=jobs) == expected
+
+
+# Test: reports are repeated for cached definitions.
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_reports(tmpdir, sample_db, caplog, jobs):
+    cache_filename = str(tmpdir.join('cache.db'))
+    second_db = str(tmpdir.join('content2.db'))
+    shutil.copy(sample_db, second_db)
+
+    def get_messages():
+        messages = sorted((x.levelno, x.getMessage()) for x in caplog.records
+                          if x.name == 'autodoc.test')
+        caplog.clear()
+        return messages
+
+    caplog.set_level(logging.DEBUG)
+    analyze(sample_db, cache_filename, jobs=jobs)
+    expected = get_messages()
+    assert any('[D' in x[1] for x in expected)
+
+    analyze(second_db, cache_filename, jobs=jobs)
+    assert get_messages() == expected
+
+
+# Test: entries are looked up on demand, recently used are kept in memory.
+def test_lookup(tmpdir):
+    filename = str(tmpdir.join('cache.db'))
+    cache = DocstringCache(filename, {})
+    cache.update({'a': b'1', 'b': b'2'})
+    cache.save()
+
+    cache = DocstringCache(filename, {}, max_size=2)
+    assert len(cache) == 0
+    assert cache['a'] == b'1'
+    assert 'x' not in cache
+    assert cache.get('x', 1) == 1
+    with pytest.raises(KeyError):
+        cache['x']
+    cache['c'] = b'3'
+    assert list(cache._data) == ['a', 'c']
+    assert cache['b'] == b'2'
+    assert list(cache._data) == ['c', 'b']
+
+
+# Test: entries not used by the run are removed.
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_prune(tmpdir, sample_db, jobs):
+    cache_filename = str(tmpdir.join('cache.db'))
+    second_db = str(tmpdir.join('content2.db'))
+    shutil.copy(sample_db, second_db)
+
+    def get_keys():
+        with sqlite3.connect(cache_filename) as conn:
+            return sorted(x[0] for x in conn.execute(
+                'SELECT hash FROM docstring_cache'))
+
+    expected = analyze(sample_db, cache_filename, jobs=jobs, prune=True)
+    keys = get_keys()
+    assert keys
+
+    analyze(sample_db, cache_filename, {'py': {'style': 'rst'}})
+    assert len(get_keys()) == len(keys) * 2
+
+    assert analyze(second_db, cache_filename, jobs=jobs,
+                   prune=True) == expected
+    assert get_keys() == keys
+
+
+# Test: cache is not used if settings are changed.
+def test_settings_changed(tmpdir, sample_db):
+    cache_filename = str(tmpdir.join('cache.db'))
+    second_db = str(tmpdir.join('content2.db'))
+    shutil.copy(sample_db, second_db)
+
+    analyze(sample_db, cache_filename)
+    settings = {'py': {'style': 'rst'}}
+    expected = analyze(sample_db, str(tmpdir.join('cache2.db')), settings)
+    assert analyze(second_db, cache_filename, settings) == expected
+
+
+def analyze_documents(filename, cache_filename, jobs=1):
+    context = create_context()
+    context.document_cache = DocumentCache(cache_filename, None)
+    db = ContentDb(context, filename)
+    context.analyze(db, jobs=jobs)
+    db.finalize()
+    context.document_cache.save()
+    return get_doc_blocks(db.conn)
+
+
+# Test: serialized document is the same and parser messages are reported.
+def test_document_dump():
+    env = {'reporter': Mock(), 'settings': {}}
+    definition = Mock(filename='test.py')
+    builder = DocumentBuilder(env)
+    document = builder.parse('Text `bad\n\n* item', definition)
+    messages = env['reporter'].document_message.call_args_list
+    assert len(messages) == 1
+    data = builder.dump_document(document, [messages[0][0][0]])
+    assert document.reporter is not None
+
+    env['reporter'].reset_mock()
+    definition.filename = 'other.py'
+    loaded = builder.load_document(data, definition)
+    assert loaded['source'] == 'other.py'
+    assert ([x.pformat() for x in loaded.children]
+            == [x.pformat() for x in document.children])
+    assert loaded.env is env
+    assert loaded.transformer.document is loaded
+    assert env['reporter'].document_message.call_count == 1
+
+
+# Test: documents are parsed once for identical docstrings and runs.
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_document_cache(tmpdir, sample_db, monkeypatch, jobs):
+    cache_filename = str(tmpdir.join('cache.db'))
+    second_db = str(tmpdir.join('content2.db'))
+    shutil.copy(sample_db, second_db)
+    plain_db = str(tmpdir.join('content3.db'))
+    shutil.copy(sample_db, plain_db)
+
+    parsed = []
+    parse = DocumentBuilder._parse
+
+    def counted_parse(self, text, definition):
+        parsed.append(text)
+        return parse(self, text, definition)
+
+    monkeypatch.setattr(DocumentBuilder, '_parse', counted_parse)
+    expected = analyze_documents(sample_db, cache_filename, jobs=jobs)
+    if jobs == 1:
+        assert len(parsed) == len(set(parsed))
+
+    context = create_context()
+    db = ContentDb(context, plain_db)
+    context.analyze(db)
+    db.finalize()
+    assert get_doc_blocks(db.conn) == expected
+
+    def no_parse(self, text, definition):
+        raise AssertionError('Must be cached: %s' % text)
+
+    monkeypatch.setattr(DocumentBuilder, '_parse', no_parse)
+    assert analyze_documents(second_db, cache_filename, jobs=jobs) == expected
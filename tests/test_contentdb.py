@@ -0,0 +1,345 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import stat
+import sqlite3
+import pytest
+from unittest.mock import ANY
+from autodoc.contentdb import (
+    ContentDb, ContentDbBuilder, IsolatedContentDb, Arg, INDEXES, MEMBER_FLAGS,
+    MemberDefinition, CompactMemberDefinition)
+from .dbutils import ContentDbWriter, create_context, create_sample_db
+
+
+@pytest.fixture
+def db_writer(tmpdir):
+    return ContentDbWriter(str(tmpdir.join('content.db')))
+
+
+def open_db(writer):
+    writer.conn.commit()
+    return ContentDb(create_context(), writer.filename)
+
+
+# Test: load member definitions args.
+class TestArgs:
+    # Test: get args for single member.
+    def test_get_args(self, db_writer):
+        id_file = db_writer.add_file('file.py')
+        func1 = db_writer.add_function(id_file, 'func1', 1, 3,
+                                       args=('a', '*args', '**kwargs'))
+        func2 = db_writer.add_function(id_file, 'func2', 4, 6)
+        db = open_db(db_writer)
+
+        assert db.get_args(func1) == (Arg('a', None), Arg('*args', None),
+                                      Arg('**kwargs', None))
+        assert db.get_args(func2) == ()
+
+    # Test: get args for multiple members.
+    def test_get_args_bulk(self, db_writer):
+        id_file = db_writer.add_file('file.py')
+        func1 = db_writer.add_function(id_file, 'func1', 1, 3, args=('a', 'b'))
+        func2 = db_writer.add_function(id_file, 'func2', 4, 6)
+        func3 = db_writer.add_function(id_file, 'func3', 7, 9, args=('c',))
+        db = open_db(db_writer)
+
+        args = db.get_args_bulk([func1, func2, func3])
+        assert args == {
+            func1: (Arg('a', None), Arg('b', None)),
+            func3: (Arg('c', None),)
+        }
+
+    # Test: member definitions get correct args if they are loaded by chunks.
+    @pytest.mark.parametrize('chunk_size', [1, 2, 500])
+    def test_member_definitions(self, db_writer, chunk_size):
+        id_file = db_writer.add_file('file.py')
+        expected = {}
+        for i in range(5):
+            args = tuple('arg%d_%d' % (i, x) for x in range(i))
+            db_writer.add_function(id_file, 'func%d' % i, i * 3, i * 3 + 2,
+                                   args=args)
+            expected['func%d' % i] = tuple(Arg(x, None) for x in args)
+        db = open_db(db_writer)
+        db.args_chunk_size = chunk_size
+
+        actual = {x.name: x.args for x in db.get_member_definitions()}
+        assert actual == expected
+
+
+# Test: member definitions classes and flags.
+@pytest.mark.parametrize('language,cls', [
+    ('python', CompactMemberDefinition),
+    ('cpp', MemberDefinition),
+])
+def test_member_flags(db_writer, language, cls):
+    id_file = db_writer.add_file('file', language)
+    func1 = db_writer.add_function(id_file, 'func1', 1, 3, args=('a',))
+    func2 = db_writer.add_function(id_file, 'func2', 4, 6)
+    db_writer.conn.execute('UPDATE memberdef SET static=1, new=1, raisable=2 '
+                           'WHERE rowid=?', (func1,))
+    db = open_db(db_writer)
+
+    definitions = list(db.get_member_definitions())
+    assert [type(x) for x in definitions] == [cls, cls]
+    flags = [(x.is_static, x.is_new, x.is_raisable, x.is_const)
+             for x in definitions]
+    assert flags == [(True, True, True, False), (False, False, False, False)]
+    for name, _ in MEMBER_FLAGS:
+        assert getattr(definitions[1], name) is False
+
+    definition = definitions[0]
+    assert (definition.id, definition.name, definition.bodystart,
+            definition.bodyend, definition.args) == (func1, 'func1', 1, 3,
+                                                     (Arg('a', None),))
+    assert definition.is_function
+    assert not definition.is_method
+
+
+# Test: constructors are loaded by chunks of files.
+class TestConstructors:
+    def test_get(self, db_writer):
+        id_file = db_writer.add_file('file.py')
+        cls1 = db_writer.add_class(id_file, 'Foo', 1)
+        cls2 = db_writer.add_class(id_file, 'Bar', 10)
+        ctor = db_writer.add_function(id_file, '__init__', 2, 4,
+                                      args=('self', 'x'), compound=cls1,
+                                      docstring=('Doc.', 3, 9, 3, 15))
+        db_writer.add_function(id_file, 'method', 5, 6, compound=cls1)
+        db_writer.add_function(id_file, '__init__', 7, 8)
+        other_file = db_writer.add_file('other.py')
+        cls3 = db_writer.add_class(other_file, 'Baz', 1)
+        db_writer.add_function(other_file, '__init__', 2, 3, compound=cls3)
+        db = open_db(db_writer)
+
+        constructors = db.get_constructors([id_file])
+        assert constructors == {cls1: ANY, cls2: None}
+        assert constructors[cls1].id == ctor
+        definition = db.get_constructor(cls1)
+        assert definition.id == ctor
+        assert definition.args == (Arg('self', None), Arg('x', None))
+        assert definition.doc_block.docstring == 'Doc.'
+        assert db.get_constructor(cls2) is None
+        assert db.get_constructor(cls3).name == '__init__'
+
+    # Test: constructors of the current chunk are reused.
+    @pytest.mark.parametrize('chunk_size', [1, 100])
+    def test_definitions(self, db_writer, chunk_size):
+        id_file = db_writer.add_file('file.py')
+        cls = db_writer.add_class(id_file, 'Foo', 1)
+        ctor = db_writer.add_function(id_file, '__init__', 2, 4,
+                                      compound=cls,
+                                      docstring=('Doc.', 3, 9, 3, 15))
+        other_file = db_writer.add_file('other.py')
+        db_writer.add_function(other_file, 'func', 1, 2)
+        db = open_db(db_writer)
+        db.files_chunk_size = chunk_size
+
+        definition = None
+        definitions = []
+        for x in db.get_definitions(files=[id_file, other_file]):
+            if x.id == cls and x.name == 'Foo':
+                definition = db.get_constructor(cls)
+                # The same instance is yielded with actual doc block.
+                definition.doc_block.docstring = 'New doc.'
+                db.save_doc_block(definition)
+            definitions.append(x)
+
+        assert [x.name for x in definitions] == ['Foo', '__init__', 'func']
+        assert definitions[1] is definition
+        assert definition.doc_block.docstring == 'New doc.'
+        assert definition.doc_block.id is not None
+        # Constructors are released after processing.
+        assert db.get_constructor(cls) is not definition
+        assert db.get_constructor(cls).id == ctor
+
+    # Test: all definitions are loaded at once if files are not set.
+    def test_all_definitions(self, db_writer):
+        id_file = db_writer.add_file('file.py')
+        db_writer.add_function(id_file, 'func', 1, 2)
+        other_file = db_writer.add_file('other.py')
+        cls = db_writer.add_class(other_file, 'Foo', 1)
+        db_writer.add_function(other_file, '__init__', 2, 3, compound=cls)
+        # Definition of unknown file.
+        db_writer.add_function(100, 'orphan', 1, 2)
+        db = open_db(db_writer)
+        db.files_chunk_size = 1
+
+        assert [x.name for x in db.get_definitions()] == [
+            'Foo', 'func', '__init__', 'orphan']
+
+
+# Test: buffered doc blocks saving.
+class TestSaveDocBlock:
+    def create_db(self, db_writer, chunk_size):
+        id_file = db_writer.add_file('file.py')
+        db_writer.add_function(id_file, 'func1', 1, 3,
+                               docstring=('Doc1.', 2, 5, 2, 14))
+        db_writer.add_function(id_file, 'func2', 4, 6)
+        db = open_db(db_writer)
+        db.write_chunk_size = chunk_size
+        return db
+
+    def get_definitions(self, db):
+        definitions = list(db.get_member_definitions())
+        for definition in definitions:
+            definition.doc_block.refid = definition.refid
+            definition.doc_block.id_file = definition.id_file
+            definition.doc_block.docstring = 'New ' + definition.name
+        return definitions
+
+    def get_docstrings(self, db, conn=None):
+        # Separate connection sees only committed doc blocks.
+        conn = conn or sqlite3.connect(db.filename)
+        res = conn.execute('SELECT refid, docstring FROM docblocks '
+                           'ORDER BY rowid')
+        return res.fetchall()
+
+    # Test: doc blocks are written on finalize.
+    def test_finalize(self, db_writer):
+        db = self.create_db(db_writer, 10)
+        for definition in self.get_definitions(db):
+            db.save_doc_block(definition)
+
+        assert self.get_docstrings(db) == [('ref1', 'Doc1.')]
+        db.finalize()
+        assert self.get_docstrings(db) == [('ref1', 'New func1'),
+                                           ('ref2', 'New func2')]
+
+    # Test: doc blocks are written by chunks.
+    def test_chunks(self, db_writer):
+        db = self.create_db(db_writer, 2)
+        definitions = self.get_definitions(db)
+        db.save_doc_block(definitions[0])
+        assert self.get_docstrings(db, db.conn) == [('ref1', 'Doc1.')]
+        db.save_doc_block(definitions[1])
+        # Full chunk is written, but not committed.
+        assert self.get_docstrings(db, db.conn) == [('ref1', 'New func1'),
+                                                    ('ref2', 'New func2')]
+        assert self.get_docstrings(db) == [('ref1', 'Doc1.')]
+
+        definitions[0].doc_block.docstring = 'Changed'
+        db.save_doc_block(definitions[0])
+        db.flush()
+        assert self.get_docstrings(db, db.conn) == [('ref1', 'Changed'),
+                                                    ('ref2', 'New func2')]
+
+    # Test: durability is relaxed only for temporary DBs.
+    def test_pragmas(self, db_writer):
+        def get_pragmas(db):
+            return [db.conn.execute('PRAGMA %s' % x).fetchone()[0]
+                    for x in ('journal_mode', 'synchronous')]
+
+        db = self.create_db(db_writer, 10)
+        assert not db.temporary
+        assert get_pragmas(db) == ['delete', 2]
+
+        context = create_context()
+        assert get_pragmas(ContentDb(context, ContentDb.MEMORY)) == [
+            'memory', 0]
+        assert get_pragmas(IsolatedContentDb(context, db.filename)) == [
+            'memory', 0]
+
+    # Test: DB built by the external builder without output filename is
+    # temporary.
+    def test_pragmas_builder(self, tmpdir, monkeypatch):
+        exe = tmpdir.join('contentdb')
+        exe.write('#!%s\n'
+                  'import sys, sqlite3\n'
+                  'sqlite3.connect(sys.argv[sys.argv.index("-o") + 1])'
+                  '.executescript("CREATE TABLE files(name);")\n'
+                  % sys.executable)
+        exe.chmod(0o755)
+        monkeypatch.setenv('CONTENT_BUILDER_NOENV', '1')
+
+        builder = ContentDbBuilder(create_context(), str(exe))
+        db = builder.build(None, [str(tmpdir)])
+        assert db.temporary
+        assert db.conn.execute('PRAGMA synchronous').fetchone() == (0,)
+
+        db = builder.build(str(tmpdir.join('out.db')), [str(tmpdir)])
+        assert not db.temporary
+        assert db.conn.execute('PRAGMA synchronous').fetchone() == (2,)
+
+    # Test: buffered doc blocks are visible for queries.
+    def test_read_buffered(self, db_writer):
+        db = self.create_db(db_writer, 10)
+        definitions = self.get_definitions(db)
+        db.save_doc_blocks(x.doc_block for x in definitions)
+
+        docs = [x.doc_block.docstring for x in db.get_member_definitions()]
+        assert docs == ['New func1', 'New func2']
+        docs = [x.docstring for x in db.get_doc_blocks(1)]
+        assert docs == ['New func1', 'New func2']
+
+
+# Test: indexes for definitions and doc blocks lookups.
+class TestIndexes:
+    def get_indexes(self, conn, schema='main'):
+        res = conn.execute("SELECT name FROM %s.sqlite_master "
+                           "WHERE type='index'" % schema)
+        return {x[0] for x in res}
+
+    # Test: missing indexes are created on open.
+    def test_create(self, db_writer):
+        db_writer.add_file('file.py')
+        db_writer.close()
+        conn = sqlite3.connect(db_writer.filename)
+        assert self.get_indexes(conn) == set()
+
+        db = ContentDb(create_context(), db_writer.filename)
+        db.get_files_count()
+        assert self.get_indexes(conn) == {x[0] for x in INDEXES}
+
+        db = IsolatedContentDb(create_context(), db_writer.filename)
+        assert self.get_indexes(db.conn, 'temp') == {
+            x[0] for x in INDEXES if x[1] == 'docblocks'}
+
+    # Test: read-only DB without indexes can be opened.
+    @pytest.mark.skipif(os.name != 'posix' or os.geteuid() == 0,
+                        reason='File permissions are not applied.')
+    def test_readonly(self, db_writer):
+        db_writer.add_file('file.py')
+        db_writer.close()
+        os.chmod(db_writer.filename, stat.S_IRUSR)
+        try:
+            db = ContentDb(create_context(), db_writer.filename)
+            assert db.get_files_count() == 1
+            assert self.get_indexes(db.conn) == set()
+        finally:
+            os.chmod(db_writer.filename, stat.S_IRUSR | stat.S_IWUSR)
+
+    # Test: lookups don't scan tables.
+    @pytest.mark.parametrize('db_cls', [ContentDb, IsolatedContentDb])
+    def test_query_plan(self, tmpdir, db_cls):
+        filename = str(tmpdir.join('content.db'))
+        create_sample_db(filename)
+        db = db_cls(create_context(), filename)
+        compound = next(db.get_compound_definitions())
+
+        statements = []
+        db.conn.set_trace_callback(statements.append)
+        assert db.get_constructor(compound.id).name == '__init__'
+        list(db.get_compound_definitions(files=[1]))
+        list(db.get_member_definitions(files=[1]))
+        list(db.get_doc_blocks(1))
+        db.conn.set_trace_callback(None)
+
+        assert len(statements) == 6
+        for sql in statements:
+            plan = [x[-1]
+                    for x in db.conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+            scans = [x for x in plan if x.startswith('SCAN')]
+            assert scans == [], (sql, plan)
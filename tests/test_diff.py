@@ -0,0 +1,172 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import subprocess
+import pytest
+from autodoc.diff import ChangedLines, get_git_diff
+from .dbutils import create_context
+from .test_python_builder import SOURCE
+
+DIFF = """\
+diff --git a/pkg/mod.py b/pkg/mod.py
+index 1111111..2222222 100644
+--- a/pkg/mod.py
++++ b/pkg/mod.py
+@@ -10 +10 @@ class Foo(object):
+-    def __init__(self):
++    def __init__(self, x):
+@@ -20,0 +21,3 @@ class Foo(object):
++        x = 1
++++ counter
++        z = 3
+@@ -30,2 +32,0 @@ def func(a,
+-    pass
+-    pass
+diff --git a/old.py b/old.py
+deleted file mode 100644
+--- a/old.py
++++ /dev/null
+@@ -1,2 +0,0 @@
+-x = 1
+--- y
+"""
+
+
+# Test: parse diff and line ranges.
+def test_changed_lines(tmpdir):
+    lines = ChangedLines(str(tmpdir))
+    lines.add_diff(DIFF.splitlines())
+    filename = str(tmpdir.join('pkg', 'mod.py'))
+    assert lines.files == {filename: [(10, 10), (21, 23), (32, 33)]}
+
+    lines.add_range('pkg/mod.py:5-9')
+    lines.add_range('pkg/mod.py:15')
+    lines.add_range(str(tmpdir.join('other.py')) + ':1-2')
+    assert lines.files[filename] == [(5, 10), (15, 15), (21, 23), (32, 33)]
+    assert len(lines) == 2
+
+    assert lines.intersects(filename, 1, 5)
+    assert lines.intersects(filename, 11, 15)
+    assert lines.intersects(filename, 23, 40)
+    assert lines.intersects(filename, 33, 33)
+    assert not lines.intersects(filename, 1, 4)
+    assert not lines.intersects(filename, 11, 14)
+    assert not lines.intersects(filename, 24, 31)
+    assert not lines.intersects(filename, 34, 100)
+    assert not lines.intersects(str(tmpdir.join('old.py')), 1, 2)
+
+    for value in ('mod.py', 'mod.py:', ':1-2', 'mod.py:a-b', 'mod.py:5-1'):
+        with pytest.raises(ValueError):
+            lines.add_range(value)
+
+
+# Test: git diff paths don't depend on the user's prefix config.
+@pytest.mark.skipif(shutil.which('git') is None, reason='git is required')
+@pytest.mark.parametrize('config', ['diff.noprefix', 'diff.mnemonicPrefix'])
+def test_git_diff(tmpdir, config):
+    def git(*args):
+        subprocess.check_call(('git', '-c', 'user.name=test',
+                               '-c', 'user.email=test@example.com') + args,
+                              cwd=str(tmpdir), stdout=subprocess.DEVNULL)
+
+    src = tmpdir.join('mod.py')
+    src.write('x = 1\ny = 2\n')
+    git('init', '-q')
+    git('config', config, 'true')
+    git('add', 'mod.py')
+    git('commit', '-q', '-m', 'init')
+    src.write('x = 1\ny = 3\n')
+
+    root, diff = get_git_diff('HEAD', str(tmpdir))
+    lines = ChangedLines()
+    lines.add_diff(diff, root=root)
+    assert lines.files == {str(src.realpath()): [(2, 2)]}
+
+
+# Test: process only definitions intersecting changed lines.
+def test_analyze(tmpdir):
+    src = tmpdir.join('mod.py')
+    src.write(SOURCE)
+
+    context = create_context()
+    context.changed_lines = ChangedLines()
+    # Body of the func() and signature of the Foo.__init__().
+    context.changed_lines.add_range(str(src) + ':30')
+    context.changed_lines.add_diff(['+++ b/mod.py', '@@ -10 +10 @@'],
+                                   root=str(tmpdir))
+
+    # Files without changes are not processed.
+    other = tmpdir.join('other.py')
+    other.write(SOURCE)
+
+    db = context.build_content_db(None, [str(tmpdir)], None, None,
+                                  exe='python')
+    assert context.get_changed_files(db) == [
+        id for id, name in db.get_files() if name == str(src)]
+    context.analyze(db)
+    db.finalize()
+    context.sync_sources(db)
+
+    assert other.read() == SOURCE
+    content = src.read()
+    assert '''\
+    def __init__(self, x):
+        """Constructor.
+
+        Args:
+            x:
+        """''' in content
+    assert '''\
+         b):
+    """Function.
+
+    Args:
+        a:
+        b:
+    """''' in content
+    assert "'''Bar.'''" in content
+    assert 'r"""Inner."""' in content
+
+
+# Test: class docstring moved to the changed constructor is synced.
+def test_analyze_init_level(tmpdir):
+    settings = {'py': {'class_docstring_level': 'init'}}
+    expected = tmpdir.join('expected.py')
+    expected.write(SOURCE)
+    context = create_context(settings)
+    db = context.build_content_db(None, [str(expected)], None, None,
+                                  exe='python')
+    context.analyze(db)
+    db.finalize()
+    context.sync_sources(db)
+
+    src = tmpdir.join('mod.py')
+    src.write(SOURCE)
+    context = create_context(settings)
+    context.changed_lines = ChangedLines()
+    # Class docstring.
+    context.changed_lines.add_range(str(src) + ':5')
+    db = context.build_content_db(None, [str(src)], None, None, exe='python')
+    context.analyze(db)
+    db.finalize()
+    context.sync_sources(db)
+
+    # Class and its constructor are the same as in the full run.
+    end = 'self.x = x\n'
+    content = src.read()
+    assert content[:content.index(end)] == \
+        expected.read()[:expected.read().index(end)]
+    assert '"""Foo class.' not in content
+    assert "'''Bar.'''" in content
@@ -0,0 +1,58 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from docutils.parsers.rst import Parser
+from autodoc.docstring.builder import DocumentBuilder
+from autodoc.docstring.reader import TextReader
+
+
+# Test: reader, parser and settings are shared between builders.
+def test_shared_components():
+    env = {}
+    b1 = DocumentBuilder(env)
+    b2 = DocumentBuilder(env)
+    assert b1.reader is b2.reader
+    assert b1.parser is b2.parser
+    assert b1.doc_settings is b2.doc_settings
+
+
+# Test: explicit components are not shared, but settings are.
+def test_explicit_components():
+    env = {}
+    parser = Parser()
+    b1 = DocumentBuilder(env)
+    b2 = DocumentBuilder(env, parser=parser)
+    assert b2.parser is parser
+    assert b2.reader is not b1.reader
+    assert b2.doc_settings is b1.doc_settings
+
+    b3 = DocumentBuilder(env, reader=TextReader(parser))
+    assert b3.reader is not b1.reader
+    assert b3.reader.parser is parser
+
+
+# Test: components and settings are not created again for new builders.
+def test_construct_cached(monkeypatch):
+    env = {}
+    builder = DocumentBuilder(env)
+
+    def fail(*args):
+        raise AssertionError('Must be shared')
+
+    monkeypatch.setattr(DocumentBuilder, '_get_document_settings', fail)
+    monkeypatch.setattr(DocumentBuilder, 'setup_reader_and_parser', fail)
+    for _ in range(3):
+        other = DocumentBuilder(env)
+        assert other.reader is builder.reader
+        assert other.doc_settings is builder.doc_settings
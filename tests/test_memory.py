@@ -0,0 +1,83 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import gc
+import tracemalloc
+import pytest
+from unittest.mock import Mock
+from autodoc import memory
+from autodoc.contentdb import ContentDb
+from autodoc.errors import AutodocError
+from autodoc.memory import MemoryGuard
+from .dbutils import create_context, create_sample_db
+
+
+# Test: memory guard checks usage periodically.
+def test_guard(monkeypatch):
+    usage = Mock(return_value=2000)
+    monkeypatch.setattr(memory, 'get_memory_usage', usage)
+    db = Mock()
+
+    guard = MemoryGuard(1000, interval=3)
+    guard.check(db)
+    guard.check(db)
+    assert usage.call_count == 0
+    with pytest.raises(AutodocError):
+        guard.check(db)
+    assert usage.call_count == 2
+    assert db.flush.call_count == 1
+
+    # Usage is below the limit after garbage collection.
+    usage.side_effect = [2000, 500]
+    for _ in range(3):
+        guard.check(db)
+
+    usage.side_effect = None
+    guard.limit = 4000
+    for _ in range(3):
+        guard.check(db)
+
+
+def test_usage():
+    assert memory.get_memory_usage() > 0
+
+
+def analyze(filename, num_files):
+    create_sample_db(filename, num_files=num_files)
+    context = create_context({'py': {'class_docstring_level': 'init'}})
+    db = ContentDb(context, filename)
+    context.analyze(db)
+    db.finalize()
+    return db
+
+
+# Test: document trees are not kept after processing.
+def test_release(tmpdir):
+    # Warm up caches and imports.
+    analyze(str(tmpdir.join('warmup.db')), 2)
+
+    tracemalloc.start()
+    try:
+        gc.collect()
+        start = tracemalloc.get_traced_memory()[0]
+        # Content DB is alive, but it doesn't keep processed definitions.
+        db = analyze(str(tmpdir.join('content.db')), 20)
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - start
+    finally:
+        tracemalloc.stop()
+
+    assert db.get_files_count() == 20
+    # Each document tree takes tens of KB.
+    assert used < 1024 * 1024
@@ -0,0 +1,106 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import shutil
+import sqlite3
+import logging
+import pytest
+from autodoc.contentdb import ContentDb, IsolatedContentDb
+from autodoc.parallel import split
+from .dbutils import create_sample_db, create_context, get_doc_blocks
+from .test_python_builder import SOURCE
+
+
+def analyze(filename, jobs, settings=None):
+    context = create_context(settings)
+    db = ContentDb(context, filename)
+    context.analyze(db, jobs=jobs)
+    db.finalize()
+    return get_doc_blocks(db.conn)
+
+
+# Test: split items to chunks.
+def test_split():
+    assert split([], 2) == []
+    assert split([1, 2, 3], 2) == [[1, 2], [3]]
+    assert split([1, 2, 3], 5) == [[1], [2], [3]]
+    assert split([1, 2, 3, 4], 2) == [[1, 2], [3, 4]]
+
+
+# Test: isolated DB doesn't modify DB file and collects changes.
+def test_isolated_db(tmpdir):
+    filename = str(tmpdir.join('content.db'))
+    create_sample_db(filename, num_files=1)
+    expected = get_doc_blocks(sqlite3.connect(filename))
+
+    db = IsolatedContentDb(create_context(), filename)
+    definitions = list(db.get_definitions())
+
+    definitions[0].doc_block.docstring = 'new'
+    db.save_doc_block(definitions[0])
+    # Definition without doc block.
+    no_doc = [x for x in definitions if x.doc_block.id is None][0]
+    no_doc.doc_block.docstring = 'inserted'
+    db.save_doc_block(no_doc)
+    db.conn.commit()
+
+    changes = db.pop_changes()
+    assert [x.docstring for x in changes] == ['new', 'inserted']
+    assert changes[0].id == definitions[0].doc_block.id
+    assert changes[1].id is None
+    assert db.pop_changes() == []
+
+    # Changes are visible for the isolated DB.
+    definitions = list(db.get_definitions())
+    assert definitions[0].doc_block.docstring == 'new'
+
+    assert get_doc_blocks(sqlite3.connect(filename)) == expected
+
+
+# Test: multi-process analysis gives the same result as the serial one.
+@pytest.mark.parametrize('level', ['separate', 'self', 'init'])
+def test_analyze_parallel(tmpdir, level):
+    filename = str(tmpdir.join('content.db'))
+    create_sample_db(filename)
+    parallel_filename = str(tmpdir.join('content_parallel.db'))
+    shutil.copy(filename, parallel_filename)
+
+    settings = {'py': {'class_docstring_level': level}}
+    expected = analyze(filename, 1, settings)
+    actual = analyze(parallel_filename, 3, settings)
+    assert actual == expected
+
+
+# Test: reports are logged in files order.
+def test_reports_order(tmpdir, caplog):
+    src = tmpdir.mkdir('src')
+    # Shards contain multiple files.
+    for i in range(20):
+        src.join('mod%02d.py' % i).write(SOURCE)
+
+    result = []
+    for jobs in (1, 2):
+        context = create_context({'py': {'class_docstring_level': 'self'}})
+        db = context.build_content_db(str(tmpdir.join('content%d.db' % jobs)),
+                                      [str(src)], None, None, exe='python')
+        caplog.clear()
+        with caplog.at_level(logging.INFO):
+            context.analyze(db, jobs=jobs)
+        result.append([x.getMessage() for x in caplog.records
+                       if x.name == 'autodoc.test'])
+
+    serial, parallel = result
+    # Serial run reports compounds of all files first.
+    assert serial != parallel
+    assert parallel == sorted(serial, key=lambda x: x.split(':')[0])
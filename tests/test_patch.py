@@ -14,7 +14,7 @@
 
 import pytest
 from functools import partial
-from autodoc.patch import Patch, LinePatcher
+from autodoc.patch import Patch, LinePatcher, FilePatcher, PatchError
 from autodoc.utils import trim_docstring
 
 trim = partial(trim_docstring, strip_leading=True, strip_trailing=True,
@@ -612,3 +612,117 @@ class TestPatching:
         for p in patches:
             patcher.add(p)
         assert '\n'.join(patcher.patch(self.content_indented)) == trim(expected)
+
+    # Test: apply multiple patches.
+    def test_patch_multiple(self):
+        patcher = LinePatcher()
+        patcher.add(Patch(None, 5, 1, 5, 7))
+        patcher.add(Patch("xxx\nyyy", 1, 1, 1, 7))
+        patcher.add(Patch("zzz", 3, 3, None, None))
+        patcher.add(Patch("www", 3, 1, None, None))
+        patcher.add(Patch("vvv", 4, 1, 4, 5))
+
+        expected = """
+        xxx
+        yyy
+        line 2
+          line 3
+        www
+          zzz
+        vvv
+         4
+        """
+        result = patcher.patch(self.content_indented)
+        assert '\n'.join(result) == trim(expected)
+        # Patches are not changed.
+        assert patcher._patches[-1].lines == ["xxx", "yyy"]
+
+    # Test: overlapped patches.
+    @pytest.mark.parametrize("patches", [
+        [Patch("xxx", 2, 1, 3, 7), Patch("yyy", 3, 1, 4, 7)],
+        [Patch("xxx", 2, 1, 4, 7), Patch("yyy", 3, 1, None, None)],
+        [Patch("xxx", 2, 1, 3, 7), Patch("yyy", 2, 1, None, None)],
+    ])
+    def test_patch_overlap(self, patches):
+        patcher = LinePatcher()
+        for p in patches:
+            patcher.add(p)
+        with pytest.raises(PatchError):
+            patcher.patch(self.content)
+
+
+# Test: FilePatcher class.
+class TestFilePatcher:
+    @pytest.mark.parametrize('content', [
+        'line 1\nline 2\n  line 3\nline 4\nline 5\n',
+        'line 1\nline 2\n  line 3\nline 4\nline 5',
+        'line 1\nline 2\n  line 3\nline 4\nline 5\n\n',
+    ])
+    def test_patch(self, tmpdir, content):
+        filename = tmpdir.join('test.py')
+        filename.write(content)
+        patches = [Patch('xxx\nyyy', 2, 1, 3, 5),
+                   Patch('zzz', 5, 1, None, None)]
+
+        expected = LinePatcher()
+        patcher = FilePatcher(str(filename))
+        for p in patches:
+            expected.add(p)
+            patcher.add(p)
+
+        assert patcher.patch() is True
+        assert filename.read() == '\n'.join(expected.patch(content))
+        assert tmpdir.listdir() == [filename]
+
+    # Test: output to other file.
+    def test_out_filename(self, tmpdir):
+        filename = tmpdir.join('test.py')
+        filename.write('line 1\n')
+        out = tmpdir.join('out.py')
+
+        patcher = FilePatcher(str(filename))
+        assert patcher.patch(str(out)) is True
+        assert filename.read() == out.read() == 'line 1\n'
+
+    # Test: file is not written if content is not changed.
+    def test_not_modified(self, tmpdir):
+        filename = tmpdir.join('test.py')
+        filename.write('line 1\nline 2\n')
+        filename.setmtime(1000)
+
+        patcher = FilePatcher(str(filename))
+        patcher.add(Patch('line 2', 2, 1, 2, 7))
+        patcher.add(Patch([], 1, 1, None, None))
+        assert patcher.patch() is False
+        assert filename.mtime() == 1000
+        assert tmpdir.listdir() == [filename]
+
+    # Test: original file is not changed on errors.
+    def test_error(self, tmpdir):
+        filename = tmpdir.join('test.py')
+        filename.write('line 1\nline 2\n')
+
+        patcher = FilePatcher(str(filename))
+        patcher.add(Patch('xxx', 1, 1, 2, 7))
+        patcher.add(Patch('yyy', 2, 1, 2, 7))
+        with pytest.raises(PatchError):
+            patcher.patch()
+        assert filename.read() == 'line 1\nline 2\n'
+        assert tmpdir.listdir() == [filename]
+
+    # Test: file encoding is detected and kept.
+    @pytest.mark.parametrize('encoding,header', [
+        ('utf-8-sig', ''),
+        ('latin-1', '# -*- coding: latin-1 -*-\n'),
+    ])
+    def test_encoding(self, tmpdir, encoding, header):
+        filename = tmpdir.join('test.py')
+        filename.write_binary((header + 'x = "\xe9"\n').encode(encoding))
+
+        patcher = FilePatcher(str(filename))
+        patcher.add(Patch('y = "\xe8"', 1, 1, None, None))
+        assert patcher.patch() is True
+        expected = header + 'x = "\xe9"\ny = "\xe8"\n'
+        if header:
+            expected = header + 'y = "\xe8"\nx = "\xe9"\n'
+        assert filename.read_binary() == expected.encode(encoding)
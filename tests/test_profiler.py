@@ -0,0 +1,142 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import io
+import json
+import shutil
+from unittest.mock import Mock
+from autodoc.contentdb import ContentDb
+from autodoc.profiler import Histogram, Profiler
+from .dbutils import create_sample_db, create_context, get_doc_blocks
+
+
+def analyze(filename, jobs, profiler=None):
+    context = create_context()
+    context.profiler = profiler
+    db = ContentDb(context, filename)
+    context.analyze(db, jobs=jobs)
+    db.finalize()
+    return get_doc_blocks(db.conn)
+
+
+# Test: histogram buckets and merging.
+def test_histogram():
+    hist = Histogram()
+    hist.add(0.00005)
+    hist.add(0.003)
+    hist.add(1.0)
+    assert hist.count == 3
+    assert hist.max == 1.0
+    assert hist.buckets[0] == 1
+    assert hist.buckets[5] == 1
+    assert hist.buckets[-1] == 1
+
+    other = Histogram()
+    other.add(0.00001)
+    hist.merge(other)
+    assert hist.count == 4
+    assert hist.buckets[0] == 2
+    assert hist.to_dict()['histogram']['<0.1ms'] == 2
+
+
+# Test: profiling doesn't change result and collects stages, transforms and
+# the slowest definitions.
+def test_profile(tmpdir):
+    filename = str(tmpdir.join('content.db'))
+    create_sample_db(filename, num_files=2)
+    profiled_filename = str(tmpdir.join('content_profiled.db'))
+    shutil.copy(filename, profiled_filename)
+
+    expected = analyze(filename, 1)
+    profiler = Profiler(slowest=3)
+    assert analyze(profiled_filename, 1, profiler) == expected
+
+    assert list(profiler.groups) == [('python', 'google')]
+    group = profiler.groups['python', 'google']
+    assert set(group['stages']) == {
+        'total', 'apply_styles', 'build_document', 'apply_transforms',
+        'translate_document_to_docstring', 'save_changes'}
+    # Domain and style transforms.
+    assert set(group['transforms']) == {
+        'MarkMissingDocstring', 'CollectInfoFields', 'SyncParametersWithSpec',
+        'CollectGoogleSections', 'AddDocstringSections'}
+    total = group['stages']['total'].count
+    assert group['stages']['save_changes'].count == total
+    assert group['transforms']['CollectInfoFields'].count == total
+
+    slowest = profiler.get_slowest()
+    assert len(slowest) == 3
+    assert [x[0] for x in slowest] == sorted([x[0] for x in slowest],
+                                             reverse=True)
+    assert slowest[0][1].startswith('file')
+    assert slowest[0][2] > 0
+
+    out = io.StringIO()
+    profiler.report(out)
+    text = out.getvalue()
+    assert 'Domain: python, style: google' in text
+    assert 'Slowest definitions:' in text
+    assert '%s:%d' % slowest[0][1:3] in text
+
+    json_filename = str(tmpdir.join('profile.json'))
+    profiler.save(json_filename)
+    with open(json_filename) as f:
+        data = json.load(f)
+    assert data['groups'][0]['stages']['total']['count'] == total
+    assert len(data['slowest']) == 3
+
+
+# Test: nested stages are not counted twice.
+def test_nested():
+    profiler = Profiler()
+    now = [0.0]
+    profiler.timer = lambda: now[0]
+    definition = Mock(filename='file.py', start_line=1)
+    definition.name = 'func'
+
+    profiler.begin('python', 'google', definition)
+    with profiler.measure('outer'):
+        now[0] += 1
+        with profiler.measure('inner'):
+            now[0] += 2
+            with profiler.measure('Transform', transform=True):
+                now[0] += 1
+        now[0] += 1
+    profiler.end()
+
+    group = profiler.groups['python', 'google']
+    assert group['stages']['outer'].total == 2
+    assert group['stages']['inner'].total == 3
+    assert group['stages']['total'].total == 5
+    assert group['transforms']['Transform'].total == 1
+
+
+# Test: timings from worker processes are merged.
+def test_profile_parallel(tmpdir):
+    filename = str(tmpdir.join('content.db'))
+    create_sample_db(filename)
+    parallel_filename = str(tmpdir.join('content_parallel.db'))
+    shutil.copy(filename, parallel_filename)
+
+    serial = Profiler(slowest=5)
+    parallel = Profiler(slowest=5)
+    expected = analyze(filename, 1, serial)
+    assert analyze(parallel_filename, 3, parallel) == expected
+
+    for kind in ('stages', 'transforms'):
+        hists = serial.groups['python', 'google'][kind]
+        parallel_hists = parallel.groups['python', 'google'][kind]
+        assert ({k: v.count for k, v in parallel_hists.items()}
+                == {k: v.count for k, v in hists.items()})
+    assert len(parallel.get_slowest()) == 5
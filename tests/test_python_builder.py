@@ -0,0 +1,202 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from textwrap import dedent
+from unittest.mock import Mock
+from autodoc.python.builder import (
+    PyContentDbBuilder, SourceParser, extract_file)
+from .dbutils import create_context, get_doc_blocks
+
+
+SOURCE = dedent('''\
+    """Module."""
+
+
+    class Foo(object):
+        """Foo class.
+
+        Args:
+            x: Value.
+        """
+        def __init__(self, x):
+            """Constructor."""
+            self.x = x
+
+        @staticmethod
+        def bar(a, *args, **kwargs):
+            \'\'\'Bar.\'\'\'
+            return a
+
+        class Inner:
+            r"""Inner."""
+            def baz(self, b=1, *, c):
+                def nested():
+                    pass
+
+
+    def func(a,
+             b):
+        """Function."""
+        if a:
+            return b
+
+
+
+    def nodoc():
+        pass
+    ''')
+
+
+# Test: parse classes and functions.
+def test_parse():
+    items = SourceParser(SOURCE).parse()
+    res = [(x.name, x.is_class, x.line, x.column, x.bodystart, x.bodyend,
+            x.parent) for x in items]
+    assert res == [
+        ('Foo', True, 4, 1, 4, 25, None),
+        ('__init__', False, 10, 5, 10, 13, 0),
+        ('bar', False, 15, 5, 15, 18, 0),
+        ('Foo.Inner', True, 19, 5, 19, 25, 0),
+        ('baz', False, 21, 9, 21, 25, 3),
+        ('func', False, 26, 1, 27, 33, None),
+        ('nodoc', False, 34, 1, 34, 35, None),
+    ]
+
+    assert items[1].args == [(None, 'self', 'self'), (None, 'x', 'x')]
+    assert items[2].is_static
+    assert items[2].args == [(None, 'a', 'a'), ('*', 'args', None),
+                             ('**', 'kwargs', None)]
+    assert items[4].args == [(None, 'self', 'self'), (None, 'b', 'b'),
+                             (None, 'c', 'c')]
+
+    assert items[0].doc == ('Foo class.\n\n    Args:\n        x: Value.\n    ',
+                            5, 5, 9, 8)
+    assert items[2].doc == ('Bar.', 16, 9, 16, 19)
+    # Doc block starts from the string prefix.
+    assert items[3].doc == ('Inner.', 20, 9, 20, 22)
+    assert items[4].doc is None
+    assert items[6].doc is None
+
+
+# Test: only '\n' is a line break, like for the tokenizer.
+def test_parse_line_breaks():
+    source = ('# \x1c\n'
+              'x = "\u2028"\n'
+              '\x0c\n'
+              'class Foo(object):\n'
+              '    """Foo\u2028class."""\n'
+              '\n'
+              '    def bar(self):\n'
+              '        """Bar."""\n')
+    items = SourceParser(source).parse()
+    res = [(x.name, x.line, x.column, x.bodystart, x.doc) for x in items]
+    assert res == [
+        ('Foo', 4, 1, 4, ('Foo\u2028class.', 5, 5, 5, 21)),
+        ('bar', 7, 5, 7, ('Bar.', 8, 9, 8, 19)),
+    ]
+
+
+# Test: build content DB from python sources.
+def test_build(tmpdir):
+    src = tmpdir.mkdir('src')
+    src.join('mod.py').write(SOURCE)
+    src.join('skip.py').write('def foo():\n    pass\n')
+    src.join('bad.py').write('def foo(:\n')
+    src.join('data.txt').write('')
+
+    context = create_context()
+    builder = PyContentDbBuilder(context)
+    db = builder.build(str(tmpdir.join('content.db')), [str(src)],
+                       exclude=['skip.py'], file_patterns=['*.py'])
+
+    files = db.conn.execute('SELECT name, language FROM files').fetchall()
+    assert files == [(str(src.join('mod.py')), 'python')]
+
+    definitions = list(db.get_definitions())
+    assert [x.name for x in definitions] == [
+        'Foo', 'Foo.Inner', '__init__', 'bar', 'baz', 'func', 'nodoc']
+    ctor = db.get_constructor(definitions[0].id)
+    assert ctor.name == '__init__'
+    assert [x.name for x in ctor.args] == ['self', 'x']
+    assert [x.name for x in definitions[3].args] == ['a', '*args', '**kwargs']
+    assert definitions[3].is_static
+
+    blocks = get_doc_blocks(db.conn)
+    assert [x[1:] for x in blocks] == [
+        (0, 1, 5, 5, 9, 8, 'Foo class.\n\n    Args:\n        x: Value.\n    '),
+        (3, 1, 11, 9, 11, 27, 'Constructor.'),
+        (3, 1, 16, 9, 16, 19, 'Bar.'),
+        (0, 1, 20, 9, 20, 22, 'Inner.'),
+        (3, 1, 28, 5, 28, 20, 'Function.'),
+    ]
+
+
+# Test: broken files are reported and skipped.
+def test_extract_errors(tmpdir):
+    src = tmpdir.mkdir('src')
+    src.join('mod.py').write(SOURCE)
+    src.join('null.py').write_binary(b'x = 1\0\n')
+    src.join('latin.py').write_binary(b'x = "\xff"\n')
+    for name in ('null.py', 'latin.py', 'missing.py'):
+        filename, definitions, error = extract_file(str(src.join(name)))
+        assert definitions is None
+        assert error
+
+    context = create_context()
+    context.logger = Mock()
+    builder = PyContentDbBuilder(context)
+    db = builder.build(None, [str(src)], file_patterns=['*.py'])
+    files = db.conn.execute('SELECT name FROM files').fetchall()
+    assert files == [(str(src.join('mod.py')),)]
+    assert context.logger.error.call_count == 2
+
+
+# Test: processing sources with the built DB.
+def test_sync(tmpdir):
+    filename = tmpdir.join('mod.py')
+    filename.write(SOURCE)
+
+    context = create_context()
+    db = context.build_content_db(str(tmpdir.join('content.db')),
+                                  [str(filename)], None, None, exe='python',
+                                  jobs=2)
+    context.analyze(db)
+    db.finalize()
+    context.sync_sources(db)
+
+    result = filename.read()
+    assert 'def func(a,\n         b):\n    """Function.\n' in result
+    assert '            """\n            Args:\n                b:\n' in result
+    compile(result, 'mod.py', 'exec')
+
+
+# Test: DB is kept in memory if output filename is not set.
+def test_in_memory(tmpdir, monkeypatch):
+    import tempfile
+    monkeypatch.setattr(tempfile, 'mkdtemp', None)
+
+    filename = tmpdir.join('mod.py')
+    filename.write(SOURCE)
+
+    context = create_context()
+    db = context.build_content_db(None, [str(filename)], None, None,
+                                  exe='python')
+    assert db.in_memory
+    # Parallel analysis is not possible for in-memory DB.
+    context.analyze(db, jobs=2)
+    db.finalize()
+    context.sync_sources(db)
+
+    assert tmpdir.listdir() == [filename]
+    assert 'def func(a,\n         b):\n    """Function.\n' in filename.read()
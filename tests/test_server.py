@@ -0,0 +1,186 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import logging
+import socket
+import threading
+import pytest
+from click.testing import CliRunner
+from autodoc.client import client, send_request
+from autodoc.docstring.builder import DocumentBuilder
+from autodoc.server import Server
+from .dbutils import create_context
+from .test_python_builder import SOURCE
+
+
+@pytest.fixture
+def daemon(tmpdir):
+    address = str(tmpdir.join('autodoc.sock'))
+    srv = Server(logging.getLogger('autodoc.test'))
+    thread = threading.Thread(target=srv.serve, args=(address,))
+
+    def start():
+        thread.start()
+        # Wait until socket is created.
+        for _ in range(100):
+            if tmpdir.join('autodoc.sock').exists():
+                break
+            thread.join(0.05)
+        return address
+
+    srv.start = start
+    yield srv
+    if thread.is_alive():
+        send_request(address, {'command': 'stop'})
+        thread.join()
+
+
+@pytest.fixture
+def server(daemon):
+    return daemon.start()
+
+
+def expected_content(tmpdir, settings=None):
+    src = tmpdir.mkdir('expected').join('mod.py')
+    src.write(SOURCE)
+    context = create_context(settings)
+    db = context.build_content_db(None, [str(src)], None, None, exe='python')
+    context.analyze(db)
+    db.finalize()
+    context.sync_sources(db)
+    return src.read()
+
+
+# Test: daemon returns patched content and doesn't modify files.
+def test_process(tmpdir, server):
+    src = tmpdir.join('mod.py')
+    src.write(SOURCE)
+
+    request = {'command': 'process', 'paths': [str(src)]}
+    response = send_request(server, request)
+    assert response['error'] is None
+    assert response['files'] == [[str(src), expected_content(tmpdir)]]
+    assert src.read() == SOURCE
+    messages = [x[1] for x in response['messages']]
+    assert any(str(src) in x for x in messages)
+
+    # Second request uses warm context and cached documents.
+    assert send_request(server, request) == response
+
+    # Settings overrides.
+    request['settings'] = ['line_width=40']
+    response = send_request(server, request)
+    assert response['files'][0][1] == expected_content(
+        tmpdir.mkdir('narrow'), {'py': {'line_width': 40}})
+
+    # Write files.
+    request = {'command': 'process', 'paths': [str(src)], 'write': True}
+    response = send_request(server, request)
+    assert response['error'] is None
+    assert response['files'] == []
+    assert src.read() == expected_content(tmpdir.mkdir('write'))
+
+
+# Test: errors are sent to the client.
+def test_errors(tmpdir, server):
+    response = send_request(server, {'command': 'process', 'paths': []})
+    assert response['error'] == 'At least one path must be specified.'
+
+    response = send_request(server, {'command': 'process',
+                                     'paths': [str(tmpdir)],
+                                     'settings': ['bla=1']})
+    assert response['error'] == 'Unknown option: bla'
+
+    response = send_request(server, {'command': 'bla'})
+    assert response['error'] == 'Unknown command: bla'
+    assert send_request(server, {'command': 'ping'})['error'] is None
+
+
+# Test: in-memory documents cache is limited.
+@pytest.mark.parametrize('limit,reparsed', [(10000, False), (3, True)])
+def test_documents_limit(tmpdir, daemon, monkeypatch, limit, reparsed):
+    parsed = []
+    parse = DocumentBuilder._parse
+    monkeypatch.setattr(DocumentBuilder, '_parse',
+                        lambda *args: parsed.append(1) or parse(*args))
+
+    daemon.max_documents = limit
+    address = daemon.start()
+    src = tmpdir.join('mod.py')
+    src.write(SOURCE)
+
+    request = {'command': 'process', 'paths': [str(src)]}
+    response = send_request(address, request)
+    count = len(parsed)
+    assert count > 3
+    assert send_request(address, request) == response
+    assert len(parsed) == (count * 2 if reparsed else count)
+
+
+# Test: loaded entries of the cache file are limited too.
+@pytest.mark.parametrize('limit', [10000, 3])
+def test_cache_limit(tmpdir, daemon, limit):
+    daemon.cache = str(tmpdir.join('cache.db'))
+    daemon.max_documents = limit
+    address = daemon.start()
+    src = tmpdir.join('mod.py')
+    src.write(SOURCE)
+
+    request = {'command': 'process', 'paths': [str(src)]}
+    response = send_request(address, request)
+    assert send_request(address, request) == response
+    _, cache, document_cache = daemon._profiles[()]
+    assert 3 <= len(cache._data) <= limit
+    assert 3 <= len(document_cache._data) <= limit
+
+
+# Test: least recently used settings profile is dropped.
+def test_profiles_limit(tmpdir, daemon):
+    daemon.max_profiles = 2
+    address = daemon.start()
+    src = tmpdir.join('mod.py')
+    src.write(SOURCE)
+    request = {'command': 'process', 'paths': [str(src)]}
+    for width in (40, 50, 40, 60):
+        request['settings'] = ['line_width=%d' % width]
+        assert send_request(address, request)['error'] is None
+    assert list(daemon._profiles) == [('line_width=40',), ('line_width=60',)]
+
+
+# Test: client prints content of multiple files with headers.
+def test_client(tmpdir, server):
+    for name in ('a.py', 'b.py'):
+        tmpdir.join(name).write('def foo():\n    pass')
+    runner = CliRunner()
+
+    res = runner.invoke(client, ['--socket', server, str(tmpdir.join('a.py'))])
+    assert res.exit_code == 0
+    assert res.output == 'def foo():\n    pass'
+
+    res = runner.invoke(client, ['--socket', server, str(tmpdir)])
+    assert res.exit_code == 0
+    assert res.output == (
+        '==> %s <==\ndef foo():\n    pass\n\n'
+        '==> %s <==\ndef foo():\n    pass\n'
+        % (tmpdir.join('a.py'), tmpdir.join('b.py')))
+
+
+# Test: stalled client doesn't block the daemon.
+def test_timeout(daemon):
+    daemon.request_timeout = 0.1
+    address = daemon.start()
+    with socket.socket(socket.AF_UNIX) as sock:
+        sock.connect(address)
+        sock.sendall(b'{"command"')
+        assert send_request(address, {'command': 'ping'})['error'] is None
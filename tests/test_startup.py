@@ -0,0 +1,65 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import sys
+import json
+import subprocess
+import pytest
+
+# Modules which are slow to import and not required to handle settings.
+HEAVY_MODULES = (
+    'docutils.parsers.rst',
+    'autodoc.docstring.builder',
+    'autodoc.python.napoleon',
+    'autodoc.python.rst.translator',
+    'autodoc.profiler',
+    'autodoc.sync',
+)
+
+SCRIPT = """
+import sys, json
+from autodoc.cli import cli
+try:
+    cli(sys.argv[1:])
+except SystemExit:
+    pass
+sys.stderr.write(json.dumps([x for x in %r if x in sys.modules]))
+""" % (HEAVY_MODULES,)
+
+
+def run_cli(*args):
+    # Run in a separate process to get clean modules state.
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(sys.path))
+    proc = subprocess.run([sys.executable, '-c', SCRIPT] + list(args),
+                          env=env, stdout=subprocess.PIPE,
+                          stderr=subprocess.PIPE, universal_newlines=True)
+    return proc.stdout, json.loads(proc.stderr.splitlines()[-1])
+
+
+# Test: settings commands don't load docstrings processing modules.
+@pytest.mark.parametrize('args', [
+    ('--version',),
+    ('--dump-config',),
+    ('--create-config', '{tmpdir}/config.yml'),
+])
+def test_lazy_imports(tmpdir, args):
+    args = [x.format(tmpdir=tmpdir) for x in args]
+    out, modules = run_cli(*args)
+    assert modules == []
+    if args[0] == '--dump-config':
+        assert 'line_width' in out
+        assert 'params_label' in out
+    elif args[0] == '--create-config':
+        assert 'line_width' in tmpdir.join('config.yml').read()
@@ -0,0 +1,165 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+import time
+import logging
+import pytest
+from autodoc.patch import Patch, FilePatcher
+from autodoc.sync import FileWriter
+from .dbutils import create_context
+from .test_python_builder import SOURCE
+
+
+def create_patcher(filename, text):
+    patcher = FilePatcher(filename)
+    patcher.add(Patch(text, 1, 1, 1, 8))
+    return patcher
+
+
+# Test: write files, errors don't stop processing of other files.
+@pytest.mark.parametrize('jobs', [1, 2])
+def test_writer(tmpdir, jobs):
+    logger = logging.getLogger('autodoc.test')
+    writer = FileWriter(logger, jobs=jobs)
+    writer.queue_size = 1
+
+    files = []
+    for i in range(5):
+        filename = tmpdir.join('file%d.py' % i)
+        filename.write('foo = 1\n')
+        files.append(filename)
+        writer.submit(create_patcher(str(filename), 'bar = %d' % i),
+                      str(filename))
+
+    # Content is not changed.
+    same = tmpdir.join('same.py')
+    same.write('foo = 1\n')
+    same.setmtime(1000)
+    writer.submit(create_patcher(str(same), 'foo = 1'), str(same))
+
+    # Missing file.
+    missing = str(tmpdir.join('missing.py'))
+    writer.submit(create_patcher(missing, 'bar = 1'), missing)
+    writer.close()
+
+    assert writer.processed == 6
+    assert writer.written == 5
+    assert writer.failed == 1
+    assert [x.read() for x in files] == ['bar = %d\n' % i for i in range(5)]
+    assert same.mtime() == 1000
+
+
+# Test: parallel sync gives the same result.
+def test_sync_parallel(tmpdir):
+    result = []
+    for jobs in (1, 2):
+        src = tmpdir.mkdir('src%d' % jobs)
+        for i in range(3):
+            src.join('mod%d.py' % i).write(SOURCE)
+
+        context = create_context()
+        db = context.build_content_db(None, [str(src)], None, None,
+                                      exe='python')
+        context.analyze(db)
+        db.finalize()
+        writer = context.sync_sources(db, jobs=jobs)
+        assert writer.written == 3
+        result.append([x.read() for x in sorted(src.listdir())])
+
+    assert result[0] == result[1]
+    assert result[0][0] != SOURCE
+
+
+# Test: with fsync files are flushed and replaced on close.
+@pytest.mark.parametrize('jobs,has_sync', [(1, True), (2, True), (1, False)])
+def test_writer_fsync(tmpdir, monkeypatch, jobs, has_sync):
+    calls = []
+    fsync = os.fsync
+    monkeypatch.setattr(os, 'fsync',
+                        lambda fd: calls.append('fsync') or fsync(fd))
+    if has_sync:
+        monkeypatch.setattr(os, 'sync', lambda: calls.append('sync'))
+    else:
+        monkeypatch.delattr(os, 'sync', raising=False)
+
+    writer = FileWriter(logging.getLogger('autodoc.test'), jobs=jobs,
+                        fsync=True)
+    files = []
+    for i in range(3):
+        filename = tmpdir.join('file%d.py' % i)
+        filename.write('foo = 1\n')
+        files.append(filename)
+        writer.submit(create_patcher(str(filename), 'bar = %d' % i),
+                      str(filename))
+
+    if jobs == 1:
+        assert [x.read() for x in files] == ['foo = 1\n'] * 3
+    writer.close()
+
+    assert writer.written == 3
+    assert [x.read() for x in files] == ['bar = %d\n' % i for i in range(3)]
+    assert sorted(tmpdir.listdir()) == files
+    # Files are flushed at once before rename, then directories are flushed.
+    # Without sync() each file and directory is flushed.
+    assert calls == (['sync'] * 2 if has_sync else ['fsync'] * 4)
+
+
+# Test: failed replace is reported and temporary file is removed.
+def test_writer_replace_error(tmpdir, monkeypatch):
+    replace = os.replace
+
+    def replace_mock(src, dst):
+        if dst.endswith('file1.py'):
+            raise OSError('replace failed')
+        replace(src, dst)
+    monkeypatch.setattr(os, 'replace', replace_mock)
+
+    writer = FileWriter(logging.getLogger('autodoc.test'), fsync=True)
+    files = []
+    for i in range(3):
+        filename = tmpdir.join('file%d.py' % i)
+        filename.write('foo = 1\n')
+        files.append(filename)
+        writer.submit(create_patcher(str(filename), 'bar = %d' % i),
+                      str(filename))
+    writer.close()
+
+    assert writer.written == 2
+    assert writer.failed == 1
+    assert [x.read() for x in files] == ['bar = 0\n', 'foo = 1\n',
+                                         'bar = 2\n']
+    assert sorted(tmpdir.listdir()) == files
+
+
+# Test: stale temporary files are removed.
+def test_writer_stale(tmpdir):
+    stale = tmpdir.join('.autodoc-stale.tmp')
+    stale.write('')
+    stale.setmtime(time.time() - FileWriter.stale_age - 10)
+    fresh = tmpdir.join('.autodoc-fresh.tmp')
+    fresh.write('')
+    other = tmpdir.mkdir('other').join('.autodoc-stale.tmp')
+    other.write('')
+    other.setmtime(1000)
+
+    writer = FileWriter(logging.getLogger('autodoc.test'))
+    filename = tmpdir.join('file.py')
+    filename.write('foo = 1\n')
+    writer.submit(create_patcher(str(filename), 'bar = 1'), str(filename))
+    writer.close()
+
+    assert not stale.exists()
+    assert fresh.exists()
+    assert other.exists()
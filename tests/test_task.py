@@ -0,0 +1,88 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+from docutils.transforms import Transform, Transformer
+from docutils.utils import new_document
+from docutils.frontend import OptionParser
+from autodoc.docstring.transforms import get_transform_pipeline
+from autodoc.profiler import Profiler
+from autodoc.task import BaseTask
+from .dbutils import create_context
+
+
+def make_transform(name, priority, applied):
+    def apply(self):
+        applied.append(name)
+    return type(name, (Transform,), {'default_priority': priority,
+                                     'apply': apply})
+
+
+# Test: transform pipeline applies transforms in docutils order.
+def test_transform_pipeline():
+    applied = []
+    transforms = [make_transform('a', 500, applied),
+                  make_transform('b', 100, applied),
+                  make_transform('c', 500, applied),
+                  make_transform('d', 300, applied)]
+    document = new_document('test', OptionParser().get_default_values())
+
+    transformer = Transformer(document)
+    transformer.add_transforms(transforms)
+    transformer.apply_transforms()
+    expected = list(applied)
+    assert sorted(expected) == ['a', 'b', 'c', 'd']
+
+    pipeline = get_transform_pipeline(transforms)
+    assert get_transform_pipeline(list(transforms)) is pipeline
+    assert len(pipeline) == 4
+    for _ in range(2):
+        del applied[:]
+        pipeline.apply(document)
+        assert applied == expected
+
+    # Transforms are measured by profiler.
+    profiler = Profiler()
+    profiler.begin('python', 'google', None)
+    pipeline.apply(document, profiler)
+    transforms = profiler.groups[('python', 'google')]['transforms']
+    assert sorted(transforms) == ['a', 'b', 'c', 'd']
+
+
+# Test: domain reuses task instances and resets their state.
+def test_reuse_task():
+    runs = []
+
+    class Task(BaseTask):
+        def do_run(self):
+            value = self.env['value']
+            runs.append((self, value))
+            if value == 1:
+                # Nested run creates separate instance and env.
+                self.domain.run_task('test_task', content_db=None, value=2)
+                assert self.env['value'] == value
+
+    context = create_context()
+    domain = context.domains['python']
+    domain.test_task = Task
+
+    with context.settings.with_settings('py'):
+        domain.run_task('test_task', content_db=None, value=0)
+        domain.run_task('test_task', content_db=None, value=1)
+
+    assert [x[1] for x in runs] == [0, 1, 2]
+    assert runs[0][0] is runs[1][0]
+    assert runs[2][0] is not runs[1][0]
+    task, env = domain._tasks['test_task']
+    assert task.env is None
+    assert env == {}
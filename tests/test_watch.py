@@ -0,0 +1,154 @@
+# Copyright 2018 Luddite Labs Inc.
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+
+import os
+from unittest.mock import Mock
+from autodoc.contentdb import ContentDbError
+from autodoc.watch import FileIndex, Watcher
+from .dbutils import create_context, get_doc_blocks
+from .test_python_builder import SOURCE
+
+
+def touch(path, content, mtime):
+    path.write(content)
+    os.utime(str(path), (mtime, mtime))
+
+
+# Test: index detects modified, new and removed files.
+def test_index(tmpdir):
+    files = [tmpdir.join('a.py'), tmpdir.join('b.py'), tmpdir.join('c.py')]
+    for x in files[:2]:
+        touch(x, 'pass\n', 1000)
+
+    index = FileIndex(lambda: [str(x) for x in files])
+    index.scan()
+    assert index.poll() == ([], [])
+
+    touch(files[0], 'pass\n', 2000)   # mtime changed.
+    touch(files[1], 'pas\n', 1000)    # size changed.
+    touch(files[2], 'pass\n', 1000)   # new file.
+    assert index.poll() == ([str(x) for x in files], [])
+    assert index.poll() == ([], [])
+
+    files[0].remove()
+    assert index.poll() == ([], [str(files[0])])
+
+    touch(files[1], 'x = 1\n', 3000)
+    index.update({str(files[1]): index.get_state(str(files[1]))})
+    assert index.poll() == ([], [])
+
+    index.update({str(files[2]): None})
+    assert index.poll() == ([str(files[2])], [])
+
+
+def build(path):
+    context = create_context()
+    db = context.build_content_db(None, [str(path)], None, None, exe='python')
+    context.analyze(db)
+    db.finalize()
+    context.sync_sources(db)
+    return context, db
+
+
+# Test: only changed files are rebuilt, analyzed and synced.
+def test_watcher(tmpdir):
+    src = tmpdir.mkdir('src')
+    files = [src.join('mod%d.py' % i) for i in range(3)]
+    for x in files:
+        x.write(SOURCE)
+    context, db = build(src)
+    watcher = Watcher(context, db, [str(src)])
+    assert not watcher.check()
+
+    # Expected result of the processing a new file.
+    expected_dir = tmpdir.mkdir('expected')
+    expected_dir.join('mod.py').write(SOURCE.replace('Foo', 'Bar'))
+    build(expected_dir)
+    expected = expected_dir.join('mod.py').read()
+
+    synced = files[0].read()
+    for x in files:
+        os.utime(str(x), (1000, 1000))
+    touch(files[1], SOURCE.replace('Foo', 'Bar'), 1000)
+    files[2].remove()
+    new = src.join('new.py')
+    new.write(SOURCE.replace('Foo', 'Bar'))
+
+    assert watcher.check()
+    assert files[0].read() == synced
+    assert files[0].mtime() == 1000
+    assert files[1].read() == expected
+    assert new.read() == expected
+
+    names = [x[0] for x in db.conn.execute('SELECT name FROM files')]
+    assert sorted(names) == sorted([str(files[0]), str(files[1]), str(new)])
+    # Autodoc changes are not reported as modifications.
+    assert not watcher.check()
+
+    # DB is the same as built from scratch.
+    _, fresh_db = build(src)
+    assert len(get_doc_blocks(db.conn)) == len(get_doc_blocks(fresh_db.conn))
+    assert (db.conn.execute('SELECT count(*) FROM memberdef_params').fetchone()
+            == fresh_db.conn.execute(
+                'SELECT count(*) FROM memberdef_params').fetchone())
+
+
+# Test: files changed during processing are processed again.
+def test_change_while_processing(tmpdir, monkeypatch):
+    src = tmpdir.mkdir('src')
+    files = [src.join('mod%d.py' % i) for i in range(2)]
+    for x in files:
+        x.write(SOURCE)
+    context, db = build(src)
+    watcher = Watcher(context, db, [str(src)])
+
+    sync_sources = context.sync_sources
+
+    def edit_while_sync(*args, **kwargs):
+        result = sync_sources(*args, **kwargs)
+        # User saves both files after autodoc wrote them.
+        for x in files:
+            touch(x, SOURCE.replace('Foo', 'Bar'), 5000)
+        return result
+
+    for x in files:
+        touch(x, SOURCE.replace('Foo', 'Baz'), 1000)
+    monkeypatch.setattr(context, 'sync_sources', edit_while_sync)
+    assert watcher.check()
+    monkeypatch.undo()
+
+    assert watcher.check()
+    assert not watcher.check()
+    assert 'Bar' in files[0].read()
+
+
+# Test: watching continues after errors.
+def test_run_errors(tmpdir, monkeypatch):
+    src = tmpdir.mkdir('src')
+    src.join('mod.py').write(SOURCE)
+    context, db = build(src)
+    watcher = Watcher(context, db, [str(src)], interval=0)
+
+    errors = [OSError('removed'), ContentDbError('bad'), KeyboardInterrupt]
+    calls = []
+
+    def check():
+        calls.append(1)
+        raise errors[len(calls) - 1]
+
+    context.logger = Mock()
+    monkeypatch.setattr(watcher, 'check', check)
+    watcher.run()
+    assert len(calls) == 3
+    assert context.logger.error.call_count == 2